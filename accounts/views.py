@@ -2,8 +2,12 @@ from django.shortcuts import render
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView
 import logging
 
+from orders import guest
+
 from .serializers import RegisterSerializer, UserSerializer
 
 logger = logging.getLogger(__name__)
@@ -32,3 +36,23 @@ class MeView(generics.RetrieveAPIView):
 
 	def get_object(self):
 		return self.request.user
+
+
+class LoginView(TokenObtainPairView):
+	"""JWT login that also merges the visitor's guest cart (`X-Cart-Token` / `cart_token`) into their cart."""
+
+	def post(self, request, *args, **kwargs):
+		serializer = self.get_serializer(data=request.data)
+		try:
+			serializer.is_valid(raise_exception=True)
+		except TokenError as e:
+			raise InvalidToken(e.args[0])
+		data = dict(serializer.validated_data)
+		token = guest.request_token(request)
+		if token:
+			try:
+				data["cart_merge"] = guest.merge(serializer.user, token)
+			except Exception:
+				# Never fail a login because of the cart
+				logger.exception("Failed to merge guest cart at login")
+		return Response(data, status=status.HTTP_200_OK)
@@ -0,0 +1,34 @@
+from django.contrib import admin
+from .models import CategoryDailySales, Counter, DailyOrderStats, ProductDailySales, RollupState
+
+
+@admin.register(Counter)
+class CounterAdmin(admin.ModelAdmin):
+    list_display = ("name", "value", "updated_at")
+    search_fields = ("name",)
+
+
+@admin.register(DailyOrderStats)
+class DailyOrderStatsAdmin(admin.ModelAdmin):
+    list_display = ("day", "orders", "revenue", "paid_orders", "paid_revenue", "updated_at")
+    date_hierarchy = "day"
+
+
+@admin.register(ProductDailySales)
+class ProductDailySalesAdmin(admin.ModelAdmin):
+    list_display = ("day", "product", "category", "units", "revenue", "paid_units", "paid_revenue")
+    list_select_related = ("product", "category")
+    date_hierarchy = "day"
+    raw_id_fields = ("product", "category")
+
+
+@admin.register(CategoryDailySales)
+class CategoryDailySalesAdmin(admin.ModelAdmin):
+    list_display = ("day", "category", "units", "revenue", "paid_units", "paid_revenue")
+    list_select_related = ("category",)
+    date_hierarchy = "day"
+
+
+@admin.register(RollupState)
+class RollupStateAdmin(admin.ModelAdmin):
+    list_display = ("name", "high_water", "updated_at")
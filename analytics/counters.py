@@ -0,0 +1,91 @@
+"""Maintained row counts for the admin dashboard.
+
+Model signals (see analytics/signals.py) add +1 / -1 to a `Counter` row once
+the writing transaction commits, so a rolled back write never counts and the
+hot counter row is locked for one UPDATE instead of for the whole writing
+transaction. Bulk writes that skip signals, and anything lost between a
+commit and its counter update, are corrected by
+`manage.py reconcile_counters`; a counter that does not exist yet is seeded
+with an exact count the first time it is read or changed.
+
+For very large tables the reconciliation can use PostgreSQL's planner
+estimate (`pg_class.reltuples`) instead of a full COUNT(*).
+"""
+import logging
+
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+from .models import Counter
+
+logger = logging.getLogger(__name__)
+
+PRODUCTS = "products"
+CATEGORIES = "categories"
+ORDERS = "orders"
+
+# Counter name -> model label
+COUNTED = {
+    PRODUCTS: "catalog.Product",
+    CATEGORIES: "catalog.Category",
+    ORDERS: "orders.Order",
+}
+
+
+def estimated_count(model):
+    """PostgreSQL's row estimate for `model`'s table, or None where unavailable."""
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [model._meta.db_table])
+        row = cursor.fetchone()
+    # -1 (or 0 on old servers) until the table has been vacuumed / analyzed
+    return row[0] if row and row[0] > 0 else None
+
+
+def count_rows(name, estimate_above=None):
+    """Row count for counter `name`: estimated when the estimate exceeds `estimate_above`, else exact."""
+    model = apps.get_model(COUNTED[name])
+    if estimate_above is not None:
+        estimate = estimated_count(model)
+        if estimate is not None and estimate > estimate_above:
+            return estimate
+    return model._default_manager.count()
+
+
+def _apply(name, delta):
+    if Counter.objects.filter(name=name).update(value=F("value") + delta):
+        return
+    # First change ever: the exact count already includes this committed change
+    try:
+        with transaction.atomic():
+            Counter.objects.create(name=name, value=count_rows(name))
+    except IntegrityError:
+        Counter.objects.filter(name=name).update(value=F("value") + delta)
+
+
+def add(name, delta):
+    """Add `delta` to counter `name` once the current transaction commits."""
+    if delta:
+        transaction.on_commit(lambda: _apply(name, delta))
+
+
+def get_counts(names):
+    """`{name: value}` from the counter rows, seeding missing ones with an exact count."""
+    values = dict(Counter.objects.filter(name__in=names).values_list("name", "value"))
+    for name in names:
+        if name not in values:
+            values[name] = count_rows(name)
+            Counter.objects.get_or_create(name=name, defaults={"value": values[name]})
+    return values
+
+
+def reconcile(estimate_above=None):
+    """Reset every counter to the current row count. Returns `{name: value}`."""
+    values = {}
+    for name in COUNTED:
+        values[name] = count_rows(name, estimate_above=estimate_above)
+        Counter.objects.update_or_create(name=name, defaults={"value": values[name]})
+    logger.info(f"Reconciled counters: {values}")
+    return values
@@ -0,0 +1,132 @@
+"""Daily order / revenue rollups (`DailyOrderStats`).
+
+Order signals apply the change an order makes to its day's row (orders,
+revenue, paid orders, paid revenue) with one F() UPDATE after commit. Writes
+that bypass signals (queryset updates such as the admin "mark as paid"
+actions) call `refresh_days()` for the days they touched, which recomputes
+those rows from the orders themselves; `manage.py reconcile_counters --days N`
+does the same for the last N days. Days are local dates of
+`Order.created_at` in TIME_ZONE.
+"""
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import DailyOrderStats
+
+ZERO = Decimal("0.00")
+FIELDS = ("orders", "revenue", "paid_orders", "paid_revenue")
+
+
+def order_day(created_at):
+    return timezone.localdate(created_at)
+
+
+def order_deltas(total, is_paid, sign=1):
+    """The contribution of one order to its day's row, negated with `sign=-1`."""
+    total = Decimal(total or 0)
+    return {
+        "orders": sign,
+        "revenue": sign * total,
+        "paid_orders": sign if is_paid else 0,
+        "paid_revenue": sign * total if is_paid else ZERO,
+    }
+
+
+def _apply(day, deltas):
+    updates = {name: F(name) + value for name, value in deltas.items() if value}
+    if not updates:
+        return
+    if not DailyOrderStats.objects.filter(day=day).update(**updates):
+        # First order of the day: count it from the committed orders instead
+        refresh_days([day])
+    elif deltas["orders"] < 0:
+        # Same as refresh_days(): a day without orders has no row
+        DailyOrderStats.objects.filter(day=day, orders=0).delete()
+
+
+def add(day, deltas):
+    """Apply `deltas` to `day`'s row once the current transaction commits."""
+    transaction.on_commit(lambda: _apply(day, deltas))
+
+
+def refresh_days(days=None):
+    """Recompute the rows of `days` (all days when None) from Order. Returns the number of days written."""
+    from orders.models import Order
+
+    queryset = Order.objects.all()
+    if days is not None:
+        days = sorted(set(days))
+        if not days:
+            return 0
+        queryset = queryset.filter(
+            created_at__gte=timezone.make_aware(datetime.combine(days[0], time.min)),
+            created_at__lt=timezone.make_aware(datetime.combine(days[-1] + timedelta(days=1), time.min)),
+        )
+    rows = (
+        queryset.annotate(day=TruncDate("created_at")).values("day").order_by("day")
+        .annotate(
+            orders=Count("id"),
+            revenue=Sum("total_amount"),
+            paid_orders=Count("id", filter=Q(is_paid=True)),
+            paid_revenue=Sum("total_amount", filter=Q(is_paid=True)),
+        )
+    )
+    stats = [
+        DailyOrderStats(
+            day=row["day"],
+            orders=row["orders"],
+            revenue=row["revenue"] or ZERO,
+            paid_orders=row["paid_orders"],
+            paid_revenue=row["paid_revenue"] or ZERO,
+        )
+        for row in rows
+        if days is None or row["day"] in days
+    ]
+    with transaction.atomic():
+        # Days that no longer have any order drop to zero
+        empty = DailyOrderStats.objects.exclude(day__in=[s.day for s in stats])
+        if days is not None:
+            empty = empty.filter(day__in=days)
+        empty.delete()
+        DailyOrderStats.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["day"],
+            update_fields=[*FIELDS, "updated_at"],
+        )
+    return len(stats)
+
+
+def recent(days=30):
+    """Rows for the last `days` days, oldest first, including days without orders."""
+    today = timezone.localdate()
+    first = today - timedelta(days=days - 1)
+    found = {row.day: row for row in DailyOrderStats.objects.filter(day__gte=first)}
+    series = []
+    for offset in range(days):
+        day = first + timedelta(days=offset)
+        row = found.get(day)
+        series.append({
+            "day": day.isoformat(),
+            "orders": row.orders if row else 0,
+            "revenue": str(row.revenue if row else ZERO),
+            "paid_orders": row.paid_orders if row else 0,
+            "paid_revenue": str(row.paid_revenue if row else ZERO),
+        })
+    return series
+
+
+def order_days(orders):
+    """The days of the orders in a queryset, read before it is bulk-updated."""
+    return {order_day(created_at) for created_at in orders.values_list("created_at", flat=True)}
+
+
+def schedule_refresh(days):
+    """Recompute `days` once the current transaction commits (after a bulk update of their orders)."""
+    if days:
+        transaction.on_commit(lambda: refresh_days(days))
@@ -0,0 +1,32 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics import counters, daily
+
+
+class Command(BaseCommand):
+    help = (
+        "Reset the dashboard counters to the real row counts and recompute the daily order "
+        "rollups. Run it periodically (e.g. nightly) to correct drift from bulk writes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--estimate-above", type=int, default=None,
+            help="Use PostgreSQL's pg_class.reltuples estimate instead of COUNT(*) for tables estimated above this many rows",
+        )
+        parser.add_argument("--days", type=int, default=7, help="Recompute the rollups of the last N days")
+        parser.add_argument("--all-days", action="store_true", help="Recompute the rollups of every day")
+
+    def handle(self, *args, **options):
+        values = counters.reconcile(estimate_above=options["estimate_above"])
+        self.stdout.write(", ".join(f"{name}={value}" for name, value in values.items()))
+        if options["all_days"]:
+            days = None
+        else:
+            today = timezone.localdate()
+            days = [today - timedelta(days=n) for n in range(max(options["days"], 0))]
+        written = daily.refresh_days(days)
+        self.stdout.write(self.style.SUCCESS(f"Reconciled {len(values)} counters and {written} days of order rollups."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from analytics import sales
+
+
+class Command(BaseCommand):
+    help = (
+        "Incrementally roll up sales by day, product and category from the orders placed or paid "
+        "since the last run. Run it every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=0, help="Also recompute the last N days (catches cancellations and edits)")
+        parser.add_argument("--rebuild", action="store_true", help="Ignore the high-water marks and recompute every day")
+
+    def handle(self, *args, **options):
+        done = sales.run(recompute_days=max(options["days"], 0), rebuild=options["rebuild"])
+        summary = ", ".join(f"{name}: {days} days" for name, days in done.items())
+        self.stdout.write(self.style.SUCCESS(f"Sales rollup complete ({summary})."))
@@ -0,0 +1,90 @@
+from django.db import models
+
+
+class Counter(models.Model):
+    """A maintained row count (e.g. `orders`), so dashboards don't run COUNT(*)."""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+
+class DailyOrderStats(models.Model):
+    """Orders and revenue per day of `Order.created_at`, kept up to date from order signals."""
+    day = models.DateField(unique=True)
+    orders = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_orders = models.PositiveIntegerField(default=0)
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'daily order stats'
+
+    def __str__(self):
+        return f"{self.day}: {self.orders} orders"
+
+
+class ProductDailySales(models.Model):
+    """Units and revenue of one product per day, filled by `manage.py rollup_sales`.
+
+    `units` / `revenue` count order lines by the day the order was placed
+    (cancelled orders excluded); `paid_units` / `paid_revenue` by the day it
+    was paid.
+    """
+    day = models.DateField()
+    product = models.ForeignKey('catalog.Product', related_name='daily_sales', on_delete=models.CASCADE)
+    category = models.ForeignKey('catalog.Category', related_name='+', on_delete=models.CASCADE)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_units = models.PositiveIntegerField(default=0)
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='productdailysales_day_product_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['product', 'day'], name='productdailysales_product_idx'),
+        ]
+        verbose_name_plural = 'product daily sales'
+
+    def __str__(self):
+        return f"{self.day} product {self.product_id}: {self.units} units"
+
+
+class CategoryDailySales(models.Model):
+    """Per-day totals of ProductDailySales by the product's category."""
+    day = models.DateField()
+    category = models.ForeignKey('catalog.Category', related_name='daily_sales', on_delete=models.CASCADE)
+    units = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    paid_units = models.PositiveIntegerField(default=0)
+    paid_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'category'], name='categorydailysales_day_cat_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['category', 'day'], name='categorydailysales_cat_idx'),
+        ]
+        verbose_name_plural = 'category daily sales'
+
+    def __str__(self):
+        return f"{self.day} category {self.category_id}: {self.units} units"
+
+
+class RollupState(models.Model):
+    """High-water mark of an incremental rollup: rows up to `high_water` have been processed."""
+    name = models.CharField(max_length=100, unique=True)
+    high_water = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.high_water}"
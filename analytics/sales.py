@@ -0,0 +1,151 @@
+"""Incremental sales rollups by day, product and category.
+
+`run()` (see `manage.py rollup_sales`) keeps two high-water marks in
+`RollupState`: one on `Order.created_at` for booked sales and one on
+`Order.paid_at` for paid sales. Each run finds the days that have orders
+placed (or paid) after the mark, recomputes those days from `OrderItem`
+with one grouped query per batch of days, upserts `ProductDailySales` and
+`CategoryDailySales`, and moves the mark forward. Recomputing whole days
+makes a run idempotent.
+
+The mark stops SALES_ROLLUP_LAG seconds short of now so orders committed a
+little after their `created_at` are not skipped. Changes a mark cannot see
+(cancelling, un-paying, edits to old orders) are picked up by recomputing
+recent days with `rollup_sales --days N`.
+
+The admin reports (see analytics/views.py) read only the rollup tables.
+"""
+import logging
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from .models import CategoryDailySales, ProductDailySales, RollupState
+
+logger = logging.getLogger(__name__)
+
+ZERO = Decimal("0.00")
+# Days recomputed per query
+DAY_BATCH = 31
+
+
+@dataclass(frozen=True)
+class Basis:
+    name: str
+    order_field: str
+    units: str
+    revenue: str
+    # Which orders count, as a filter on Order and on OrderItem
+    orders: Q
+    items: Q
+
+
+BOOKED = Basis("booked", "created_at", "units", "revenue", ~Q(status="cancelled"), ~Q(order__status="cancelled"))
+PAID = Basis("paid", "paid_at", "paid_units", "paid_revenue", Q(is_paid=True), Q(order__is_paid=True))
+BASES = {basis.name: basis for basis in (BOOKED, PAID)}
+
+
+def _start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def refresh(basis, days):
+    """Recompute `basis` columns of the product and category rows for `days`. Returns rows written."""
+    days = sorted(set(days))
+    if not days:
+        return 0
+    field = f"order__{basis.order_field}"
+    window = Q()
+    for day in days:
+        window |= Q(**{f"{field}__gte": _start_of(day), f"{field}__lt": _start_of(day + timedelta(days=1))})
+    rows = (
+        OrderItem.objects.filter(window).filter(basis.items)
+        .annotate(day=TruncDate(field))
+        .values("day", "product_id", "product__category_id")
+        .order_by()
+        .annotate(
+            units=Sum("quantity"),
+            revenue=Sum(F("price") * F("quantity"), output_field=DecimalField(max_digits=14, decimal_places=2)),
+        )
+    )
+    wanted = set(days)
+    products = []
+    categories = defaultdict(lambda: [0, ZERO])
+    for row in rows:
+        if row["day"] not in wanted:
+            continue
+        products.append(ProductDailySales(
+            day=row["day"],
+            product_id=row["product_id"],
+            category_id=row["product__category_id"],
+            **{basis.units: row["units"], basis.revenue: row["revenue"] or ZERO},
+        ))
+        totals = categories[(row["day"], row["product__category_id"])]
+        totals[0] += row["units"]
+        totals[1] += row["revenue"] or ZERO
+
+    reset = {basis.units: 0, basis.revenue: ZERO}
+    empty = Q(units=0, paid_units=0)
+    with transaction.atomic():
+        ProductDailySales.objects.filter(day__in=days).update(**reset)
+        CategoryDailySales.objects.filter(day__in=days).update(**reset)
+        ProductDailySales.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=["day", "product"],
+            update_fields=[basis.units, basis.revenue, "category", "updated_at"],
+        )
+        CategoryDailySales.objects.bulk_create(
+            [
+                CategoryDailySales(day=day, category_id=category_id, **{basis.units: units, basis.revenue: revenue})
+                for (day, category_id), (units, revenue) in categories.items()
+            ],
+            update_conflicts=True,
+            unique_fields=["day", "category"],
+            update_fields=[basis.units, basis.revenue, "updated_at"],
+        )
+        ProductDailySales.objects.filter(empty, day__in=days).delete()
+        CategoryDailySales.objects.filter(empty, day__in=days).delete()
+    return len(products)
+
+
+def _pending_days(basis, after, upto):
+    """Local days with orders whose `order_field` lies in (after, upto]."""
+    orders = Order.objects.filter(basis.orders, **{f"{basis.order_field}__lte": upto})
+    if after is not None:
+        orders = orders.filter(**{f"{basis.order_field}__gt": after})
+    return set(
+        orders.annotate(day=TruncDate(basis.order_field)).order_by().values_list("day", flat=True).distinct()
+    )
+
+
+def run(now=None, recompute_days=0, rebuild=False):
+    """Roll up everything since the high-water marks. Returns `{basis: days recomputed}`."""
+    now = now or timezone.now()
+    upto = now - timedelta(seconds=settings.SALES_ROLLUP_LAG)
+    today = timezone.localdate(now)
+    recent = {today - timedelta(days=n) for n in range(recompute_days)}
+    done = {}
+    for basis in BASES.values():
+        state, _ = RollupState.objects.get_or_create(name=f"sales.{basis.name}")
+        after = None if rebuild else state.high_water
+        days = _pending_days(basis, after, upto) | recent
+        if rebuild:
+            # Also clear days whose orders are all gone
+            days |= set(ProductDailySales.objects.values_list("day", flat=True).distinct())
+        days = sorted(days)
+        for start in range(0, len(days), DAY_BATCH):
+            refresh(basis, days[start:start + DAY_BATCH])
+        state.high_water = upto
+        state.save(update_fields=["high_water", "updated_at"])
+        done[basis.name] = len(days)
+        logger.info(f"Sales rollup ({basis.name}): recomputed {len(days)} days up to {upto.isoformat()}")
+    return done
@@ -0,0 +1,52 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from catalog.models import Category, Product
+from orders.models import Order
+from . import counters, daily
+
+COUNTER_NAMES = {Product: counters.PRODUCTS, Category: counters.CATEGORIES, Order: counters.ORDERS}
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Order)
+def count_created(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        counters.add(COUNTER_NAMES[sender], 1)
+
+
+@receiver(post_delete, sender=Product)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Order)
+def count_deleted(sender, instance, **kwargs):
+    counters.add(COUNTER_NAMES[sender], -1)
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_totals(sender, instance, raw=False, **kwargs):
+    # What the row counted for before this save, to apply only the difference
+    if raw or instance.pk is None:
+        return
+    instance.__dict__["_daily_before"] = (
+        Order.objects.filter(pk=instance.pk).values_list("total_amount", "is_paid").first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def update_daily_stats(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    before = instance.__dict__.pop("_daily_before", None)
+    deltas = daily.order_deltas(instance.total_amount, instance.is_paid)
+    if not created:
+        if before is None:
+            return
+        old = daily.order_deltas(*before)
+        deltas = {name: deltas[name] - old[name] for name in daily.FIELDS}
+    daily.add(daily.order_day(instance.created_at), deltas)
+
+
+@receiver(post_delete, sender=Order)
+def remove_from_daily_stats(sender, instance, **kwargs):
+    daily.add(daily.order_day(instance.created_at), daily.order_deltas(instance.total_amount, instance.is_paid, sign=-1))
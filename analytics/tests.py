@@ -0,0 +1,238 @@
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from catalog.models import Category, Product
+from orders import transitions
+from orders.models import Order, OrderItem
+from . import counters, daily, sales
+from .models import CategoryDailySales, Counter, DailyOrderStats, ProductDailySales
+
+
+class AnalyticsTestCase(APITestCase):
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.today = timezone.localdate(self.now)
+        self.user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        self.shoes = Category.objects.create(name="Shoes")
+        self.hats = Category.objects.create(name="Hats")
+        self.runner = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=50, category=self.shoes)
+        self.walker = Product.objects.create(name="Walker", sku="WALK-1", price=20, stock=50, category=self.shoes)
+        self.cap = Product.objects.create(name="Cap", sku="CAP-1", price=5, stock=50, category=self.hats)
+
+    def order(self, days_ago, lines, **fields):
+        """An order placed `days_ago` days before now, with `(product, quantity)` lines at the product price."""
+        total = sum(product.price * quantity for product, quantity in lines)
+        order = Order.objects.create(user=self.user, total_amount=total, **fields)
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price) for product, quantity in lines
+        ])
+        # created_at is auto_now_add
+        order.created_at = self.now - timedelta(days=days_ago)
+        Order.objects.filter(pk=order.pk).update(created_at=order.created_at)
+        return order
+
+    def day(self, days_ago):
+        return self.today - timedelta(days=days_ago)
+
+
+class SalesRollupTests(AnalyticsTestCase):
+
+    def snapshot(self):
+        fields = ("day", "units", "revenue", "paid_units", "paid_revenue")
+        return (
+            sorted(ProductDailySales.objects.values_list("product_id", *fields)),
+            sorted(CategoryDailySales.objects.values_list("category_id", *fields)),
+        )
+
+    def test_running_twice_gives_the_same_result(self):
+        self.order(3, [(self.runner, 2), (self.cap, 1)])
+        self.order(3, [(self.runner, 1), (self.walker, 1)])
+        self.order(1, [(self.walker, 4)], is_paid=True, paid_at=self.now - timedelta(days=1))
+
+        call_command("rollup_sales", stdout=io.StringIO())
+        first = self.snapshot()
+        call_command("rollup_sales", stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), first)
+        call_command("rollup_sales", "--rebuild", stdout=io.StringIO())
+        self.assertEqual(self.snapshot(), first)
+
+        runner = ProductDailySales.objects.get(product=self.runner, day=self.day(3))
+        self.assertEqual((runner.units, runner.revenue, runner.paid_units), (3, Decimal("30.00"), 0))
+        shoes = CategoryDailySales.objects.get(category=self.shoes, day=self.day(3))
+        self.assertEqual((shoes.units, shoes.revenue), (4, Decimal("50.00")))
+        walker = ProductDailySales.objects.get(product=self.walker, day=self.day(1))
+        self.assertEqual((walker.units, walker.paid_units, walker.paid_revenue), (4, 4, Decimal("80.00")))
+
+    def test_order_paid_after_the_day_it_was_placed(self):
+        order = self.order(3, [(self.runner, 2)])
+        sales.run(now=self.now)
+        self.assertFalse(ProductDailySales.objects.filter(paid_units__gt=0).exists())
+
+        # Paid a day later, after the previous run's high-water mark
+        paid_at = self.now + timedelta(days=1)
+        Order.objects.filter(pk=order.pk).update(is_paid=True, paid_at=paid_at)
+        sales.run(now=paid_at + timedelta(hours=1))
+
+        booked = ProductDailySales.objects.get(product=self.runner, day=self.day(3))
+        self.assertEqual((booked.units, booked.paid_units), (2, 0))
+        paid = ProductDailySales.objects.get(product=self.runner, day=timezone.localdate(paid_at))
+        self.assertEqual((paid.units, paid.paid_units, paid.paid_revenue), (0, 2, Decimal("20.00")))
+        self.assertEqual(CategoryDailySales.objects.get(category=self.shoes, day=timezone.localdate(paid_at)).paid_units, 2)
+
+    def test_cancelling_is_picked_up_by_recomputing_recent_days(self):
+        order = self.order(1, [(self.runner, 2), (self.cap, 1)])
+        self.order(1, [(self.walker, 1)])
+        call_command("rollup_sales", stdout=io.StringIO())
+        self.assertEqual(ProductDailySales.objects.count(), 3)
+
+        Order.objects.filter(pk=order.pk).update(status="cancelled")
+        # The order is older than the high-water mark, so a plain run misses it
+        call_command("rollup_sales", stdout=io.StringIO())
+        self.assertEqual(ProductDailySales.objects.count(), 3)
+
+        call_command("rollup_sales", "--days", "3", stdout=io.StringIO())
+        self.assertEqual(list(ProductDailySales.objects.values_list("product_id", flat=True)), [self.walker.pk])
+        # Rows left with nothing on either basis are deleted
+        self.assertEqual(list(CategoryDailySales.objects.values_list("category_id", "units")), [(self.shoes.pk, 1)])
+
+    def test_cancelled_order_stays_in_paid_sales(self):
+        self.order(1, [(self.runner, 2)], status="cancelled", is_paid=True, paid_at=self.now - timedelta(days=1))
+        sales.run(now=self.now)
+        row = ProductDailySales.objects.get()
+        self.assertEqual((row.units, row.paid_units), (0, 2))
+
+
+class SalesReportTests(AnalyticsTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", "admin@example.com"))
+        self.order(3, [(self.runner, 2), (self.cap, 3)])
+        self.order(1, [(self.walker, 1)], is_paid=True, paid_at=self.now - timedelta(days=1))
+        sales.run(now=self.now)
+        self.range = {"start": self.day(4).isoformat(), "end": self.day(0).isoformat()}
+
+    def test_series_has_every_day_of_the_range(self):
+        data = self.client.get("/api/analytics/sales/series/", self.range).data
+        self.assertEqual([row["day"] for row in data["series"]], [self.day(n).isoformat() for n in range(4, -1, -1)])
+        self.assertEqual([row["units"] for row in data["series"]], [0, 5, 0, 1, 0])
+        self.assertEqual([row["revenue"] for row in data["series"]], ["0.00", "35.00", "0.00", "20.00", "0.00"])
+        self.assertEqual((data["units"], data["revenue"]), (6, "55.00"))
+
+    def test_series_for_one_product_and_basis(self):
+        data = self.client.get("/api/analytics/sales/series/", {**self.range, "product": self.runner.pk, "basis": "paid"}).data
+        self.assertEqual([row["units"] for row in data["series"]], [0, 0, 0, 0, 0])
+        self.assertEqual(data["revenue"], "0.00")
+        data = self.client.get("/api/analytics/sales/series/", {**self.range, "category": self.hats.pk}).data
+        self.assertEqual([row["units"] for row in data["series"]], [0, 3, 0, 0, 0])
+
+    def test_top_sellers(self):
+        data = self.client.get("/api/analytics/sales/top/", self.range).data
+        self.assertEqual([row["sku"] for row in data["results"]], ["RUN-1", "WALK-1", "CAP-1"])
+        data = self.client.get("/api/analytics/sales/top/", {**self.range, "metric": "units", "by": "category"}).data
+        self.assertEqual([(row["id"], row["units"]) for row in data["results"]], [(self.shoes.pk, 3), (self.hats.pk, 3)])
+        # Products without paid sales are left out rather than listed with zeros
+        data = self.client.get("/api/analytics/sales/top/", {**self.range, "basis": "paid"}).data
+        self.assertEqual([(row["sku"], row["units"]) for row in data["results"]], [("WALK-1", 1)])
+
+    def test_empty_range(self):
+        empty = {"start": self.day(30).isoformat(), "end": self.day(20).isoformat()}
+        series = self.client.get("/api/analytics/sales/series/", empty).data["series"]
+        self.assertEqual(len(series), 11)
+        self.assertTrue(all(row["units"] == 0 and row["revenue"] == "0.00" for row in series))
+        self.assertEqual(self.client.get("/api/analytics/sales/top/", empty).data["results"], [])
+
+    def test_bad_parameters(self):
+        for params in ({"start": "tomorrow"}, {"start": "2026-02-01", "end": "2026-01-01"}, {"basis": "shipped"}, {"by": "user"}):
+            self.assertEqual(self.client.get("/api/analytics/sales/top/", params).status_code, 400, params)
+
+
+class CounterTests(AnalyticsTestCase):
+
+    def create_product(self, sku):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Product.objects.create(name=sku, sku=sku, price=1, stock=1, category=self.hats)
+
+    def test_counter_is_seeded_with_an_exact_count_on_first_change(self):
+        self.assertFalse(Counter.objects.exists())
+        self.create_product("NEW-1")
+        self.assertEqual(Counter.objects.get(name=counters.PRODUCTS).value, 4)
+        self.create_product("NEW-2")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.runner.delete()
+        self.assertEqual(Counter.objects.get(name=counters.PRODUCTS).value, 4)
+
+    def test_missing_counters_are_seeded_when_read(self):
+        self.assertEqual(counters.get_counts([counters.CATEGORIES, counters.ORDERS]), {counters.CATEGORIES: 2, counters.ORDERS: 0})
+        self.assertEqual(dict(Counter.objects.values_list("name", "value")), {counters.CATEGORIES: 2, counters.ORDERS: 0})
+
+    def test_rolled_back_write_is_not_counted(self):
+        self.create_product("NEW-1")
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Product.objects.create(name="Gone", sku="GONE", price=1, stock=1, category=self.hats)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+        self.assertEqual(Counter.objects.get(name=counters.PRODUCTS).value, 4)
+
+    def test_reconcile_corrects_drift_from_bulk_writes(self):
+        self.create_product("NEW-1")
+        Product.objects.filter(sku="NEW-1").delete()
+        Counter.objects.filter(name=counters.PRODUCTS).update(value=99)
+        self.assertEqual(counters.reconcile()[counters.PRODUCTS], 3)
+        self.assertEqual(Counter.objects.get(name=counters.PRODUCTS).value, 3)
+
+
+class DailyOrderStatsTests(AnalyticsTestCase):
+
+    def rows(self):
+        return sorted(DailyOrderStats.objects.values_list("day", "orders", "revenue", "paid_orders", "paid_revenue"))
+
+    def assert_matches_a_fresh_refresh(self):
+        maintained = self.rows()
+        daily.refresh_days()
+        self.assertEqual(maintained, self.rows())
+        return maintained
+
+    def test_signal_and_queryset_writes_match_a_fresh_refresh(self):
+        admin_user = get_user_model().objects.create_superuser("admin", "admin@example.com")
+        self.client.force_login(admin_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            orders = [self.order(2, [(self.runner, 1)]), self.order(2, [(self.walker, 2)]), self.order(0, [(self.cap, 3)])]
+        # The test helper backdates created_at with a queryset update
+        daily.refresh_days()
+
+        # Signal write: a save that pays one order
+        with self.captureOnCommitCallbacks(execute=True):
+            orders[0].is_paid = True
+            orders[0].save()
+        # Queryset writes: the admin action and a bulk transition
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/admin/orders/order/", {"action": "mark_as_paid", "_selected_action": [orders[1].pk, orders[2].pk]})
+        self.assertEqual(response.status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            transitions.transition(Order.objects.filter(pk=orders[2].pk), "cancelled", is_paid=False)
+
+        rows = self.assert_matches_a_fresh_refresh()
+        self.assertEqual(rows, [
+            (self.day(2), 2, Decimal("50.00"), 2, Decimal("50.00")),
+            (self.day(0), 1, Decimal("15.00"), 0, Decimal("0.00")),
+        ])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/admin/orders/order/", {"action": "mark_as_unpaid", "_selected_action": [orders[0].pk]})
+        self.assertEqual(response.status_code, 302)
+        with self.captureOnCommitCallbacks(execute=True):
+            orders[2].delete()
+        rows = self.assert_matches_a_fresh_refresh()
+        self.assertEqual(rows, [(self.day(2), 2, Decimal("50.00"), 1, Decimal("40.00"))])
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import SalesSeriesView, TopSellersView
+
+app_name = "analytics"
+
+urlpatterns = [
+    path("sales/series/", SalesSeriesView.as_view(), name="sales-series"),
+    path("sales/top/", TopSellersView.as_view(), name="sales-top"),
+]
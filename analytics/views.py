@@ -0,0 +1,161 @@
+"""Admin sales reports read from the rollup tables (see analytics/sales.py).
+
+Both endpoints take `start` / `end` (ISO dates, inclusive; default the last
+30 days, at most 366 days) and `basis` (`booked`: by the day orders were
+placed, without cancelled orders; `paid`: by the day they were paid).
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from orders.pricing import money
+from .models import CategoryDailySales, ProductDailySales
+from .sales import BASES
+
+ZERO = Decimal("0.00")
+MAX_DAYS = 366
+DEFAULT_DAYS = 30
+MAX_TOP = 100
+
+
+class ReportError(Exception):
+    pass
+
+
+def _date_range(params):
+    today = timezone.localdate()
+    try:
+        end = date.fromisoformat(params["end"]) if params.get("end") else today
+        start = date.fromisoformat(params["start"]) if params.get("start") else end - timedelta(days=DEFAULT_DAYS - 1)
+    except ValueError:
+        raise ReportError("start and end must be dates (YYYY-MM-DD)")
+    if start > end:
+        raise ReportError("start must not be after end")
+    if (end - start).days >= MAX_DAYS:
+        raise ReportError(f"The range can cover at most {MAX_DAYS} days")
+    return start, end
+
+
+def _basis(params):
+    basis = BASES.get(params.get("basis", "booked"))
+    if basis is None:
+        raise ReportError(f"basis must be one of: {', '.join(BASES)}")
+    return basis
+
+
+def _int_param(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ReportError(f"{name} must be a number")
+
+
+class SalesSeriesView(APIView):
+    """Units and revenue per day, for everything or for one `product` / `category`.
+
+    Days without sales are included with zeros.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            start, end = _date_range(params)
+            basis = _basis(params)
+            product_id = _int_param(params, "product")
+            category_id = _int_param(params, "category")
+        except ReportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if product_id is not None:
+            queryset = ProductDailySales.objects.filter(product_id=product_id)
+        else:
+            queryset = CategoryDailySales.objects.all()
+            if category_id is not None:
+                queryset = queryset.filter(category_id=category_id)
+        rows = (
+            queryset.filter(day__range=(start, end))
+            .values("day").order_by()
+            .annotate(units=Sum(basis.units), revenue=Sum(basis.revenue))
+        )
+        found = {row["day"]: row for row in rows}
+
+        series = []
+        total_units, total_revenue = 0, ZERO
+        for offset in range((end - start).days + 1):
+            day = start + timedelta(days=offset)
+            row = found.get(day)
+            units = row["units"] if row else 0
+            revenue = (row["revenue"] if row else None) or ZERO
+            total_units += units
+            total_revenue += revenue
+            series.append({"day": day.isoformat(), "units": units, "revenue": str(money(revenue))})
+        return Response({
+            "basis": basis.name,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "product": product_id,
+            "category": category_id,
+            "units": total_units,
+            "revenue": str(money(total_revenue)),
+            "series": series,
+        })
+
+
+class TopSellersView(APIView):
+    """The best selling products or categories over a date range.
+
+    `by` is `product` (default) or `category`, `metric` is `revenue` (default)
+    or `units`, and `limit` caps the list (default 10, max 100).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        params = request.query_params
+        try:
+            start, end = _date_range(params)
+            basis = _basis(params)
+            by = params.get("by", "product")
+            if by not in ("product", "category"):
+                raise ReportError("by must be product or category")
+            metric = params.get("metric", "revenue")
+            if metric not in ("revenue", "units"):
+                raise ReportError("metric must be revenue or units")
+            limit = min(max(_int_param(params, "limit") or 10, 1), MAX_TOP)
+        except ReportError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if by == "product":
+            queryset = ProductDailySales.objects.values("product_id", "product__name", "product__sku")
+        else:
+            queryset = CategoryDailySales.objects.values("category_id", "category__name")
+        rows = (
+            queryset.filter(day__range=(start, end))
+            .annotate(units=Sum(basis.units), revenue=Sum(basis.revenue))
+            .filter(units__gt=0)
+            .order_by(f"-{metric}", f"{by}_id")[:limit]
+        )
+        results = []
+        for row in rows:
+            entry = {"id": row[f"{by}_id"], "name": row[f"{by}__name"]}
+            if by == "product":
+                entry["sku"] = row["product__sku"]
+            entry.update(units=row["units"], revenue=str(money(row["revenue"] or ZERO)))
+            results.append(entry)
+        return Response({
+            "basis": basis.name,
+            "by": by,
+            "metric": metric,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "results": results,
+        })
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blogs', '0005_remove_blog_pdf_type_blog_blog_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogimage',
+            name='variants',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -37,6 +37,8 @@ class BlogImage(models.Model):
     image = models.ImageField(upload_to="blogs/images/", blank=True, null=True)
     alt_text = models.CharField(max_length=255, blank=True)
     ordering = models.PositiveIntegerField(default=0)
+    # Resized derivatives by format and width, see core.images
+    variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
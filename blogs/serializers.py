@@ -1,13 +1,18 @@
 from rest_framework import serializers
+from core.images import build_srcset
 from .models import Blog, BlogImage
 
 
 class BlogImageSerializer(serializers.ModelSerializer):
     image = serializers.ImageField(use_url=True)
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = BlogImage
-        fields = ("id", "image", "alt_text", "ordering")
+        fields = ("id", "image", "alt_text", "ordering", "srcset")
+
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
 
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -0,0 +1,20 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import media
+from .models import Blog, BlogImage
+
+# Blog images share deduplicated blobs; see core/media.py
+media.track(Blog, 'featured_image')
+media.track(BlogImage, 'image')
+
+
+@receiver(post_save, sender=BlogImage)
+@receiver(post_delete, sender=BlogImage)
+def touch_blog(sender, instance, raw=False, **kwargs):
+    # Gallery images are part of the blog payload, so they move the blog's
+    # updated_at (used for Last-Modified / ETag validators).
+    if raw:
+        return
+    Blog.objects.filter(pk=instance.blog_id).update(updated_at=timezone.now())
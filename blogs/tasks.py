@@ -0,0 +1,18 @@
+from core.images import refresh_variants
+from jobs.queue import task
+from .models import Blog, BlogImage
+from .pdf_utils import save_blog_as_pdf
+
+
+@task(priority=10, max_attempts=3)
+def generate_blog_image_derivatives(image_id):
+    blog_image = BlogImage.objects.filter(pk=image_id).first()
+    if blog_image is not None:
+        refresh_variants(blog_image)
+
+
+@task(max_attempts=3, concurrency=2)
+def render_blog_pdf(blog_id):
+    blog = Blog.objects.filter(pk=blog_id).first()
+    if blog is not None:
+        save_blog_as_pdf(blog)
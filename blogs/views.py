@@ -2,17 +2,21 @@ import logging
 from django.core.files.storage import default_storage
 import os
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.conf import settings
+from core.conditional import ConditionalGetMixin
+from jobs.queue import enqueue
 from .models import Blog, BlogImage
 from .serializers import BlogSerializer, BlogImageSerializer
+from .tasks import generate_blog_image_derivatives, render_blog_pdf
 
 logger = logging.getLogger(__name__)
 
 
-class BlogViewSet(viewsets.ModelViewSet):
+class BlogViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     serializer_class = BlogSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -22,7 +26,7 @@ class BlogViewSet(viewsets.ModelViewSet):
         return context
 
     def get_queryset(self):
-        queryset = Blog.objects.filter(is_published=True)
+        queryset = Blog.objects.filter(is_published=True).prefetch_related('images')
         return queryset
 
 
@@ -53,6 +57,13 @@ class AdminBlogViewSet(viewsets.ModelViewSet):
             logger.exception(f"Error updating blog: {str(e)}")
             raise
 
+    @action(detail=True, methods=['post'], url_path='generate-pdf')
+    def generate_pdf(self, request, pk=None):
+        """Queue rendering of the blog content into `pdf_file`."""
+        blog = self.get_object()
+        job = enqueue(render_blog_pdf, blog.id)
+        return Response({"job_id": job.id, "status": job.status}, status=status.HTTP_202_ACCEPTED)
+
 
 class UploadBlogImageView(APIView):
     permission_classes = [permissions.IsAdminUser]
@@ -144,7 +155,6 @@ class UploadBlogMultiImageView(APIView):
 
             orig_name = getattr(image_file, 'name', 'upload')
             storage_name = os.path.join('blogs', 'images', orig_name)
-            storage_name = default_storage.get_available_name(storage_name)
             saved_name = default_storage.save(storage_name, image_file)
 
             blog_image = BlogImage.objects.create(
@@ -155,6 +165,8 @@ class UploadBlogMultiImageView(APIView):
             )
             logger.info(f"Saved image to storage: {saved_name}")
 
+            enqueue(generate_blog_image_derivatives, blog_image.id)
+
             image_serializer = BlogImageSerializer(blog_image, context={"request": request})
             blog_serializer = BlogSerializer(blog, context={"request": request})
             return Response({
@@ -175,11 +187,6 @@ class DeleteBlogImageView(APIView):
         except BlogImage.DoesNotExist:
             return Response({"error": "Image not found"}, status=status.HTTP_404_NOT_FOUND)
 
-        if blog_image.image:
-            try:
-                blog_image.image.delete(save=False)
-            except Exception:
-                logger.exception("Failed to delete image file from storage")
-
+        # The file and its derivatives are released in the background once unreferenced
         blog_image.delete()
         return Response({"message": "Image deleted"}, status=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Category, Product, ProductImage, ProductDiscount
+from .models import Category, Product, ProductImage, ProductDiscount, ProductCard
 
 
 @admin.register(Category)
@@ -89,3 +89,16 @@ class ProductDiscountAdmin(admin.ModelAdmin):
 			'classes': ('collapse',)
 		}),
 	)
+
+
+@admin.register(ProductCard)
+class ProductCardAdmin(admin.ModelAdmin):
+	list_display = ("product", "name", "category_name", "effective_price", "stock", "image_count", "is_active")
+	list_filter = ("is_active", "on_discount")
+	search_fields = ("name", "sku")
+
+	def has_add_permission(self, request):
+		return False
+
+	def has_change_permission(self, request, obj=None):
+		return False
@@ -0,0 +1,102 @@
+"""Set-based writes to products and discounts.
+
+`bulk_create` / `bulk_update` / queryset updates do not send model signals,
+so the bookkeeping `catalog.signals` normally does per row (search index,
+ProductCard rows, cache versions) is done here once per batch instead.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from orders import stock
+from . import cache, cards, search
+from .models import Product, ProductDiscount
+
+# Largest number of rows accepted by one bulk product update
+MAX_BULK_UPDATE = 1000
+BULK_UPDATE_FIELDS = ("price", "stock", "is_active")
+
+
+def products_changed(product_ids, discounts=False):
+    """Reindex, refresh cards and bump cache versions for `product_ids` after commit."""
+    product_ids = sorted({int(pk) for pk in product_ids})
+    if not product_ids:
+        return
+
+    def refresh():
+        search.index_products(product_ids)
+        cards.refresh_cards(product_ids)
+        cache.bump_version(cache.PRODUCT)
+        if discounts:
+            cache.bump_version(cache.DISCOUNT)
+
+    transaction.on_commit(refresh)
+
+
+def upsert_discounts(prices):
+    """Create or update active discounts from `{product_id: (original_price, discount_price)}` in one statement."""
+    if not prices:
+        return
+    now = timezone.now()
+    ProductDiscount.objects.bulk_create(
+        [
+            ProductDiscount(product_id=pk, original_price=original, discount_price=discounted, is_active=True, updated_at=now)
+            for pk, (original, discounted) in prices.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=["original_price", "discount_price", "is_active", "updated_at"],
+    )
+
+
+def remove_discounts(product_ids):
+    """Delete the discounts of `product_ids` with one query per batch."""
+    if product_ids:
+        ProductDiscount.objects.filter(product_id__in=product_ids).delete()
+
+
+def update_products(changes):
+    """Apply validated `{id, price?, stock?, is_active?, discount_price?, original_price?}` rows.
+
+    Only the keys present in a row change; `discount_price: None` removes the
+    discount and a missing `original_price` defaults to the product's price.
+    `stock` is the on-hand count; units held by carts are subtracted from it
+    (see orders.stock.available_stock).
+    Everything is written in one transaction: one locking SELECT, one
+    `bulk_update`, one discount upsert and one discount delete. Returns
+    `{id: "updated" | "not_found"}`.
+    """
+    ids = [row["id"] for row in changes]
+    now = timezone.now()
+    with transaction.atomic():
+        # Lock in primary key order so concurrent bulk updates cannot deadlock,
+        # and so columns written back unchanged by bulk_update are current
+        products = {
+            p.pk: p
+            for p in Product.objects.select_for_update().filter(pk__in=ids)
+            .only("id", *BULK_UPDATE_FIELDS, "updated_at").order_by("pk")
+        }
+        # Read the holds only now that the rows are locked
+        available = stock.available_stock({row["id"]: row["stock"] for row in changes if "stock" in row and row["id"] in products})
+        fields, discounts, removed = set(), {}, set()
+        for row in changes:
+            product = products.get(row["id"])
+            if product is None:
+                continue
+            for name in BULK_UPDATE_FIELDS:
+                if name in row:
+                    setattr(product, name, available[product.pk] if name == "stock" else row[name])
+                    fields.add(name)
+            product.updated_at = now
+            if "discount_price" in row:
+                if row["discount_price"] is None:
+                    removed.add(product.pk)
+                else:
+                    original = row.get("original_price")
+                    discounts[product.pk] = (original if original is not None else product.price, row["discount_price"])
+
+        if products:
+            Product.objects.bulk_update(list(products.values()), sorted(fields | {"updated_at"}))
+        upsert_discounts(discounts)
+        remove_discounts(removed)
+        products_changed(products, discounts=bool(discounts or removed))
+    return {pk: "updated" if pk in products else "not_found" for pk in ids}
@@ -0,0 +1,123 @@
+"""Response cache for the public catalog read endpoints.
+
+Cached responses are keyed on the absolute request URI (host, path and query
+string) plus the current version of every model the view reads. Each model
+version is a counter in the cache that is bumped after any save or delete
+commits (see `catalog.signals`), so writes invalidate all affected responses
+at once without waiting for a TTL or enumerating keys.
+
+Configure the backend with the CACHES setting; CATALOG_CACHE_ALIAS picks the
+cache and CATALOG_CACHE_TIMEOUT (seconds, 0 disables) bounds entry lifetime.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+from core.conditional import ConditionalGetMixin, not_modified, set_validators
+
+VERSION_KEY = "catalog:version:{}"
+RESPONSE_KEY = "catalog:response:{}:{}"
+
+PRODUCT = "product"
+IMAGE = "image"
+DISCOUNT = "discount"
+CATEGORY = "category"
+ALL_MODELS = (PRODUCT, IMAGE, DISCOUNT, CATEGORY)
+
+
+def get_cache():
+    return caches[getattr(settings, "CATALOG_CACHE_ALIAS", "default")]
+
+
+def cache_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def _initial_version():
+    # Seed from the clock so a counter evicted from the cache never restarts
+    # at a value that older cached responses were stored under.
+    return int(time.time() * 1000)
+
+
+def get_versions(names):
+    cache = get_cache()
+    keys = [VERSION_KEY.format(name) for name in names]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions.append(found[key])
+    return versions
+
+
+def bump_version(name):
+    cache = get_cache()
+    key = VERSION_KEY.format(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def schedule_bump(name):
+    """Bump a model version once the current transaction commits."""
+    transaction.on_commit(lambda: bump_version(name))
+
+
+def response_cache_key(request, names):
+    versions = ".".join(str(v) for v in get_versions(names))
+    uri = hashlib.md5(request.build_absolute_uri().encode("utf-8")).hexdigest()
+    return RESPONSE_KEY.format(versions, uri)
+
+
+class CachedResponseMixin:
+    """Serve GET responses from the versioned catalog cache.
+
+    Set `cache_models` to the model versions the view's output depends on.
+    Only successful responses are stored, together with their ETag and
+    Last-Modified validators so a cache hit can still answer with a 304.
+    """
+    cache_models = ALL_MODELS
+
+    def get(self, request, *args, **kwargs):
+        timeout = cache_timeout()
+        if not timeout:
+            return super().get(request, *args, **kwargs)
+        cache = get_cache()
+        key = response_cache_key(request, self.cache_models)
+        entry = cache.get(key)
+        if entry is not None:
+            etag, last_modified = entry["etag"], entry["last_modified"]
+            response = not_modified(request, etag, last_modified)
+            if response is None:
+                response = Response(entry["data"])
+            return set_validators(response, etag, last_modified)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            entry = {
+                "data": response.data,
+                "etag": response.get("ETag"),
+                "last_modified": parse_http_date_safe(response.get("Last-Modified", "")),
+            }
+            cache.set(key, entry, timeout=timeout)
+        return response
+
+
+class CatalogConditionalGetMixin(ConditionalGetMixin):
+    """Conditional GET for catalog reads.
+
+    The model versions in `cache_models` are mixed into the ETag, so changes
+    that do not move any `updated_at` (a deleted image, a renamed category
+    seen through a card) still produce a new validator.
+    """
+    cache_models = ALL_MODELS
+
+    def get_validator_extra(self):
+        return ".".join(str(v) for v in get_versions(self.cache_models))
@@ -0,0 +1,149 @@
+"""Maintenance of the denormalized `ProductCard` read model.
+
+Every write to a Product, ProductImage, ProductDiscount or Category schedules
+a refresh of the affected cards (see `catalog.signals`). Refreshes run on
+transaction commit so cascaded deletes have finished before the card is
+rebuilt, and a card whose product is gone is simply removed.
+"""
+import logging
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from .models import Product, ProductCard, ProductImage
+
+logger = logging.getLogger(__name__)
+
+CARD_FIELDS = (
+    "name",
+    "slug",
+    "sku",
+    "category_id",
+    "category_name",
+    "category_slug",
+    "price",
+    "delivery_charges",
+    "effective_price",
+    "discount_price",
+    "original_price",
+    "on_discount",
+    "stock",
+    "is_active",
+    "image",
+    "image_count",
+    "updated_at",
+)
+
+
+def _card_queryset():
+    first_image = (
+        ProductImage.objects.filter(product=OuterRef("pk"))
+        .exclude(Q(image="") | Q(image__isnull=True))
+        .order_by("ordering", "id")
+        .values("image")[:1]
+    )
+    return (
+        Product.objects.select_related("category", "discount")
+        .annotate(card_image_count=Count("images"), card_first_image=Subquery(first_image))
+        .order_by("pk")
+    )
+
+
+def build_card(product):
+    """Build an unsaved ProductCard from a product loaded by `_card_queryset`."""
+    try:
+        discount = product.discount
+    except ObjectDoesNotExist:
+        discount = None
+    on_discount = bool(discount and discount.is_active)
+    if product.image:
+        image = product.image.name
+    else:
+        image = product.card_first_image or ""
+    return ProductCard(
+        product_id=product.pk,
+        name=product.name,
+        slug=product.slug,
+        sku=product.sku,
+        category_id=product.category_id,
+        category_name=product.category.name,
+        category_slug=product.category.slug,
+        price=product.price,
+        delivery_charges=product.delivery_charges,
+        effective_price=discount.discount_price if on_discount else product.price,
+        discount_price=discount.discount_price if discount else None,
+        original_price=discount.original_price if discount else None,
+        on_discount=on_discount,
+        stock=product.stock,
+        is_active=product.is_active,
+        image=image,
+        image_count=product.card_image_count,
+        updated_at=product.updated_at,
+    )
+
+
+def _upsert(cards):
+    if cards:
+        ProductCard.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=list(CARD_FIELDS),
+        )
+
+
+def refresh_cards(product_ids):
+    """Rebuild the cards for the given products, dropping cards of deleted ones."""
+    product_ids = {int(pk) for pk in product_ids if pk is not None}
+    if not product_ids:
+        return
+    cards = [build_card(p) for p in _card_queryset().filter(pk__in=product_ids)]
+    _upsert(cards)
+    missing = product_ids - {card.product_id for card in cards}
+    if missing:
+        ProductCard.objects.filter(product_id__in=missing).delete()
+
+
+def refresh_category(category):
+    """Propagate a category rename to its cards with a single UPDATE."""
+    ProductCard.objects.filter(category_id=category.pk).update(
+        category_name=category.name,
+        category_slug=category.slug,
+        updated_at=timezone.now(),
+    )
+
+
+def schedule_refresh(product_id):
+    """Refresh one product's card once the current transaction commits."""
+    if product_id is None:
+        return
+    transaction.on_commit(lambda: refresh_cards([product_id]))
+
+
+def rebuild_all(batch_size=1000):
+    """Rebuild every card in batches and remove orphans. Returns the number of cards written."""
+    written = 0
+    batch = []
+    for product in _card_queryset().iterator(chunk_size=batch_size):
+        batch.append(build_card(product))
+        if len(batch) >= batch_size:
+            _upsert(batch)
+            written += len(batch)
+            batch = []
+    _upsert(batch)
+    written += len(batch)
+    ProductCard.objects.exclude(product_id__in=Product.objects.values("pk")).delete()
+    return written
+
+
+def sync_stock(product_ids):
+    """Copy Product.stock and updated_at into the cards of `product_ids` with a single UPDATE."""
+    product_ids = {int(pk) for pk in product_ids if pk is not None}
+    if product_ids:
+        products = Product.objects.filter(pk=OuterRef("product_id"))
+        ProductCard.objects.filter(product_id__in=product_ids).update(
+            stock=Subquery(products.values("stock")[:1]),
+            updated_at=Subquery(products.values("updated_at")[:1]),
+        )
@@ -0,0 +1,52 @@
+"""Product export rows for core.exports.
+
+The columns match what `catalog.importer` reads, so an export can be edited
+and imported back. `stock` is the on-hand count (units held by carts
+included), the same number the importer writes.
+"""
+from core.exports import DEFAULT_CHUNK_SIZE, keyset_pages
+from orders import stock
+from .filters import _parse_bool
+from .models import Category, Product, ProductDiscount
+
+PRODUCT_COLUMNS = (
+    "id", "sku", "name", "slug", "description", "price", "delivery_charges", "stock", "is_active",
+    "category", "category_id", "discount_price", "original_price", "created_at", "updated_at",
+)
+
+_PRODUCT_VALUES = (
+    "id", "sku", "name", "slug", "description", "price", "delivery_charges", "stock", "is_active",
+    "category_id", "created_at", "updated_at",
+)
+
+
+def product_rows(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one flat dict per product, in id order."""
+    queryset = Product.objects.all() if queryset is None else queryset
+    # Categories are a small table: one query for all of them
+    category_slugs = dict(Category.objects.values_list("id", "slug"))
+    for chunk in keyset_pages(queryset.values(*_PRODUCT_VALUES), ("id",), chunk_size):
+        discounts = {
+            d["product_id"]: d
+            for d in ProductDiscount.objects.filter(product_id__in=[r["id"] for r in chunk], is_active=True)
+            .values("product_id", "discount_price", "original_price")
+        }
+        on_hand = stock.on_hand_stock({r["id"]: r["stock"] for r in chunk})
+        for row in chunk:
+            row["stock"] = on_hand[row["id"]]
+            discount = discounts.get(row["id"], {})
+            row["category"] = category_slugs.get(row["category_id"])
+            row["discount_price"] = discount.get("discount_price")
+            row["original_price"] = discount.get("original_price")
+            yield row
+
+
+def export_queryset(params):
+    """Products selected by the `is_active` and `category` (slug) parameters."""
+    queryset = Product.objects.all()
+    is_active = _parse_bool(params, "is_active")
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if params.get("category"):
+        queryset = queryset.filter(category__slug=params["category"])
+    return queryset
@@ -0,0 +1,175 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, CharField, Count, DecimalField, Exists, F, Max, Min, OuterRef, Q, Value, When
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import ProductImage
+
+TWO_PLACES = Decimal("0.01")
+TRUE_VALUES = ("1", "true", "yes", "on")
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def effective_price():
+    """Discounted price while a ProductDiscount is active, otherwise the list price."""
+    return Case(
+        When(discount__is_active=True, then=F("discount__discount_price")),
+        default=F("price"),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+
+
+def _parse_bool(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    value = value.lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise serializers.ValidationError({name: "Expected true or false."})
+
+
+def _parse_decimal(params, name):
+    value = params.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise serializers.ValidationError({name: "Expected a number."})
+    # NaN / Infinity parse fine but cannot be compared with a price column
+    if not number.is_finite():
+        raise serializers.ValidationError({name: "Expected a number."})
+    return number
+
+
+class ProductFacetFilter(BaseFilterBackend):
+    """Filter the public product listings.
+
+    Supported query parameters:
+      * `min_price` / `max_price` - bounds on the effective (discounted) price
+      * `in_stock` - true for `stock > 0`, false for sold-out products
+      * `on_discount` - true for products with an active ProductDiscount
+      * `color` - one or more ProductImage colors, comma separated
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        min_price = _parse_decimal(params, "min_price")
+        max_price = _parse_decimal(params, "max_price")
+        if min_price is not None or max_price is not None:
+            queryset = queryset.annotate(effective_price=effective_price())
+            if min_price is not None:
+                queryset = queryset.filter(effective_price__gte=min_price)
+            if max_price is not None:
+                queryset = queryset.filter(effective_price__lte=max_price)
+
+        in_stock = _parse_bool(params, "in_stock")
+        if in_stock is True:
+            queryset = queryset.filter(stock__gt=0)
+        elif in_stock is False:
+            queryset = queryset.filter(stock=0)
+
+        on_discount = _parse_bool(params, "on_discount")
+        if on_discount is True:
+            queryset = queryset.filter(discount__is_active=True)
+        elif on_discount is False:
+            queryset = queryset.exclude(discount__is_active=True)
+
+        colors = [c.strip() for c in params.get("color", "").split(",") if c.strip()]
+        if colors:
+            queryset = queryset.filter(
+                Exists(ProductImage.objects.filter(product=OuterRef("pk"), color__in=colors))
+            )
+
+        return queryset
+
+
+class ProductCardFilter(BaseFilterBackend):
+    """Filter the ProductCard listing.
+
+    Accepts `category` (slug) plus the `min_price`, `max_price`, `in_stock`
+    and `on_discount` parameters of ProductFacetFilter. All of them are plain
+    columns on the card, so no joins are needed.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+
+        category_slug = params.get("category")
+        if category_slug:
+            queryset = queryset.filter(category_slug=category_slug)
+
+        min_price = _parse_decimal(params, "min_price")
+        if min_price is not None:
+            queryset = queryset.filter(effective_price__gte=min_price)
+        max_price = _parse_decimal(params, "max_price")
+        if max_price is not None:
+            queryset = queryset.filter(effective_price__lte=max_price)
+
+        in_stock = _parse_bool(params, "in_stock")
+        if in_stock is True:
+            queryset = queryset.filter(stock__gt=0)
+        elif in_stock is False:
+            queryset = queryset.filter(stock=0)
+
+        on_discount = _parse_bool(params, "on_discount")
+        if on_discount is not None:
+            queryset = queryset.filter(on_discount=on_discount)
+
+        return queryset
+
+
+def _format_price(value):
+    if value is None:
+        return None
+    return str(Decimal(value).quantize(TWO_PLACES))
+
+
+def product_facets(queryset):
+    """Facet counts for an already-filtered product queryset, in one query.
+
+    The scalar facets are one aggregate row (its `color` is NULL) and the
+    color facet is a GROUP BY over the product images; both are read with one
+    UNION ALL, so the cost does not grow with the number of facets.
+    """
+    queryset = queryset.order_by()
+    price = DecimalField(max_digits=10, decimal_places=2)
+    totals = (
+        queryset.annotate(color=Value(None, output_field=CharField())).values("color")
+        .annotate(
+            total=Count("id"),
+            in_stock=Count("id", filter=Q(stock__gt=0)),
+            on_discount=Count("id", filter=Q(discount__is_active=True)),
+            min_price=Min(effective_price()),
+            max_price=Max(effective_price()),
+        )
+    )
+    colors = (
+        ProductImage.objects.filter(product__in=queryset.values("pk"))
+        .values("color").order_by()
+        .annotate(
+            total=Count("product", distinct=True),
+            in_stock=Value(0),
+            on_discount=Value(0),
+            min_price=Value(None, output_field=price),
+            max_price=Value(None, output_field=price),
+        )
+    )
+    rows = list(totals.union(colors, all=True))
+    summary = next(row for row in rows if row["color"] is None)
+    colors = sorted((row for row in rows if row["color"] is not None), key=lambda row: (-row["total"], row["color"]))
+    return {
+        "total": summary["total"],
+        "in_stock": summary["in_stock"],
+        "on_discount": summary["on_discount"],
+        "price": {
+            "min": _format_price(summary["min_price"]),
+            "max": _format_price(summary["max_price"]),
+        },
+        "colors": [{"color": row["color"], "count": row["total"]} for row in colors],
+    }
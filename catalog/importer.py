@@ -0,0 +1,355 @@
+"""Streaming bulk product import from CSV or NDJSON.
+
+Rows are parsed lazily and processed in batches. For every batch the existing
+products are fetched with one `sku IN (...)` query, slug conflicts are checked
+with one `slug IN (...)` query, categories are resolved from a map loaded once
+per run, and the writes are one `bulk_create`, one `bulk_update` and one
+discount upsert. A row that fails validation is reported with its line number
+and skipped; the rest of the batch and the run carry on.
+
+Columns (CSV header or NDJSON keys), matched on `sku`:
+  sku, name, slug, description, price, delivery_charges, stock, is_active,
+  category (slug) or category_id, discount_price, original_price
+New products need name, price and a category; existing products only change
+the columns present in the row; empty cells are ignored, except that an
+empty `description` clears it and an empty `discount_price` removes the
+product's discount. `stock` is the on-hand count: for existing products the
+units held by carts are subtracted from it (see orders.stock).
+"""
+import csv
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from analytics import counters
+from orders import stock
+from . import bulk
+from .filters import FALSE_VALUES, TRUE_VALUES
+from .models import Category, Product
+
+FORMATS = ("csv", "ndjson")
+DEFAULT_BATCH_SIZE = 1000
+TWO_PLACES = Decimal("0.01")
+MAX_PRICE = Decimal("99999999.99")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: list = field(default_factory=list)
+    max_errors: int = 1000
+    # Called with (line, sku, errors) for every failed row, e.g. to print it
+    on_error: object = None
+
+    def add_error(self, line, sku, errors):
+        self.failed += 1
+        if self.on_error is not None:
+            self.on_error(line, sku, errors)
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "sku": sku, "errors": errors})
+
+    def as_dict(self):
+        return {
+            "created": self.created,
+            "updated": self.updated,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+        }
+
+
+def detect_format(filename, default="csv"):
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def _text_lines(fileobj):
+    """Decode a binary file line by line as UTF-8 (an optional BOM is dropped).
+
+    Raises ImportFormatError naming the line and byte offset of the first
+    undecodable byte, e.g. for a Latin-1 export from a spreadsheet.
+    """
+    offset = 0
+    for line_number, raw in enumerate(fileobj, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_number == 1 else "utf-8")
+        except UnicodeDecodeError as e:
+            raise ImportFormatError(
+                f"File is not UTF-8 encoded: undecodable byte on line {line_number} (byte offset {offset + e.start})"
+            ) from e
+        offset += len(raw)
+
+
+def iter_rows(fileobj, fmt):
+    """Yield `(line_number, row_dict)` from a binary file without reading it all."""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unsupported format: {fmt}")
+    text = _text_lines(fileobj)
+    if fmt == "csv":
+        reader = csv.DictReader(text)
+        if not reader.fieldnames or "sku" not in reader.fieldnames:
+            raise ImportFormatError("CSV header must include a sku column")
+        for row in reader:
+            yield reader.line_num, {k: v for k, v in row.items() if k is not None}
+    else:
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+                continue
+            yield line_number, row if isinstance(row, dict) else ValueError("Expected a JSON object")
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _blank(value):
+    return value is None or (isinstance(value, str) and value.strip() == "")
+
+
+def _decimal(value):
+    try:
+        number = Decimal(str(value).strip()).quantize(TWO_PLACES)
+    except (InvalidOperation, ValueError):
+        raise ValueError("Expected a number.")
+    if not number.is_finite():
+        raise ValueError("Expected a number.")
+    if number < 0 or number > MAX_PRICE:
+        raise ValueError("Must be between 0 and 99999999.99.")
+    return number
+
+
+def _int(value):
+    try:
+        number = int(str(value).strip())
+    except ValueError:
+        raise ValueError("Expected a whole number.")
+    if number < 0:
+        raise ValueError("Must not be negative.")
+    return number
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError("Expected true or false.")
+
+
+def _text(max_length):
+    def parse(value):
+        text = str(value).strip()
+        if len(text) > max_length:
+            raise ValueError(f"Must be at most {max_length} characters.")
+        return text
+    return parse
+
+
+PARSERS = {
+    "name": _text(255),
+    "slug": _text(260),
+    "description": lambda value: "" if value is None else str(value),
+    "price": _decimal,
+    "delivery_charges": _decimal,
+    "stock": _int,
+    "is_active": _bool,
+}
+
+
+class ProductImporter:
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, dry_run=False, max_errors=1000, on_error=None):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.result = ImportResult(max_errors=max_errors, on_error=on_error)
+        categories = list(Category.objects.values_list("id", "slug"))
+        self.category_by_slug = {slug: pk for pk, slug in categories}
+        self.category_ids = {pk for pk, _ in categories}
+
+    def run(self, fileobj, fmt, progress=None):
+        for batch in _batches(iter_rows(fileobj, fmt), self.batch_size):
+            self.import_batch(batch)
+            if progress:
+                progress(self.result)
+        return self.result
+
+    def _parse(self, row):
+        """Return (sku, values, discount, errors); `discount` is None (untouched), False (remove) or prices."""
+        errors = {}
+        values = {}
+        sku = str(row.get("sku") or "").strip()
+        if not sku:
+            errors["sku"] = "This field is required."
+        elif len(sku) > 50:
+            errors["sku"] = "Must be at most 50 characters."
+
+        for name, parse in PARSERS.items():
+            if name not in row or (_blank(row[name]) and name not in ("description",)):
+                continue
+            try:
+                values[name] = parse(row[name])
+            except ValueError as e:
+                errors[name] = str(e)
+
+        if not _blank(row.get("category_id")):
+            try:
+                category_id = int(str(row["category_id"]).strip())
+            except ValueError:
+                category_id = None
+            if category_id not in self.category_ids:
+                errors["category_id"] = "Category not found."
+            else:
+                values["category_id"] = category_id
+        elif not _blank(row.get("category")):
+            category_id = self.category_by_slug.get(str(row["category"]).strip())
+            if category_id is None:
+                errors["category"] = "Category not found."
+            else:
+                values["category_id"] = category_id
+
+        discount = None
+        if "discount_price" in row:
+            if _blank(row["discount_price"]):
+                discount = False
+            else:
+                try:
+                    discounted = _decimal(row["discount_price"])
+                    original = None if _blank(row.get("original_price")) else _decimal(row["original_price"])
+                    discount = (original, discounted)
+                except ValueError as e:
+                    errors["discount_price"] = str(e)
+        return sku, values, discount, errors
+
+    def import_batch(self, batch):
+        parsed = []
+        skus_in_batch = set()
+        for line, row in batch:
+            if isinstance(row, Exception):
+                self.result.add_error(line, None, {"row": str(row)})
+                continue
+            sku, values, discount, errors = self._parse(row)
+            if not errors and sku in skus_in_batch:
+                errors["sku"] = "SKU appears more than once in this batch."
+            if errors:
+                self.result.add_error(line, sku or None, errors)
+                continue
+            skus_in_batch.add(sku)
+            parsed.append((line, sku, values, discount))
+        if not parsed:
+            return
+
+        existing = {p.sku: p for p in Product.objects.filter(sku__in=skus_in_batch)}
+
+        # Slugs are derived from the name (as Product.save does) unless given
+        for line, sku, values, discount in parsed:
+            product = existing.get(sku)
+            if "slug" not in values and (product is None or "name" in values) and values.get("name"):
+                values["slug"] = slugify(values["name"])
+        slugs = {values["slug"] for _, _, values, _ in parsed if values.get("slug")}
+        slug_owner = dict(Product.objects.filter(slug__in=slugs).values_list("slug", "sku")) if slugs else {}
+
+        to_create, to_update, update_fields = [], [], set()
+        on_hand = {}
+        discounts, removed_discounts = {}, set()
+        claimed_slugs = {}
+        accepted = []
+        now = timezone.now()
+        for line, sku, values, discount in parsed:
+            product = existing.get(sku)
+            errors = {}
+            if product is None:
+                missing = [name for name in ("name", "price", "category_id") if name not in values]
+                for name in missing:
+                    errors["category" if name == "category_id" else name] = "Required for new products."
+            slug = values.get("slug")
+            if slug is not None:
+                if not slug:
+                    errors["slug"] = "Could not derive a slug from the name."
+                elif slug_owner.get(slug, sku) != sku or claimed_slugs.get(slug, sku) != sku:
+                    errors["name"] = "A product with a similar name (slug) already exists."
+            if errors:
+                self.result.add_error(line, sku, errors)
+                continue
+            if slug:
+                claimed_slugs[slug] = sku
+
+            if product is None:
+                product = Product(sku=sku, **values)
+                to_create.append(product)
+            else:
+                for name, value in values.items():
+                    setattr(product, name, value)
+                update_fields.update(values)
+                if "stock" in values:
+                    on_hand[product.pk] = values["stock"]
+                product.updated_at = now
+                to_update.append(product)
+            accepted.append((line, product, discount))
+
+        if not accepted:
+            return
+        try:
+            with transaction.atomic():
+                Product.objects.bulk_create(to_create)
+                if on_hand:
+                    # Lock before reading the holds so none is taken or handed back in between
+                    list(Product.objects.select_for_update().filter(pk__in=on_hand).order_by("pk").values_list("pk"))
+                    available = stock.available_stock(on_hand)
+                    for product in to_update:
+                        if product.pk in available:
+                            product.stock = available[product.pk]
+                if to_update:
+                    # Stock is written only for the rows that set it; the others'
+                    # loaded values may be stale by now
+                    Product.objects.bulk_update(to_update, sorted(update_fields - {"stock"} | {"updated_at"}))
+                if on_hand:
+                    Product.objects.bulk_update([p for p in to_update if p.pk in on_hand], ["stock"])
+                for _, product, discount in accepted:
+                    if discount is False:
+                        removed_discounts.add(product.pk)
+                    elif discount is not None:
+                        original, discounted = discount
+                        discounts[product.pk] = (original if original is not None else product.price, discounted)
+                bulk.upsert_discounts(discounts)
+                bulk.remove_discounts(removed_discounts)
+                if self.dry_run:
+                    transaction.set_rollback(True)
+                else:
+                    bulk.products_changed([p.pk for _, p, _ in accepted], discounts=bool(discounts or removed_discounts))
+                    # bulk_create skips the signal that maintains the product counter
+                    counters.add(counters.PRODUCTS, len(to_create))
+        except DatabaseError as e:
+            # e.g. a concurrent writer took a SKU or slug; report the batch and keep going
+            for line, product, _ in accepted:
+                self.result.add_error(line, product.sku, {"batch": str(e)})
+            return
+        self.result.created += len(to_create)
+        self.result.updated += len(to_update)
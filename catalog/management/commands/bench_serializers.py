@@ -0,0 +1,111 @@
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from catalog.models import Category, Product, ProductDiscount, ProductImage
+from catalog.serializers import ProductSerializer
+from core.fastserializers import serialize
+from orders.models import Cart, CartItem, Order, OrderItem
+from orders.serializers import CartSerializer, OrderSerializer
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the compiled read-only serializers against the DRF serializers for product, "
+        "cart and order payloads. Sample rows are created in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=500, help="Number of sample products")
+        parser.add_argument("--images", type=int, default=3, help="Images per product")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (best is reported)")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback()
+        except _Rollback:
+            pass
+
+    def _run(self, options):
+        n_products = options["products"]
+        n_images = options["images"]
+        repeat = options["repeat"]
+
+        category = Category.objects.create(name="Benchmark category", slug="benchmark-category")
+        products = Product.objects.bulk_create(
+            Product(
+                category=category,
+                name=f"Benchmark product {i}",
+                slug=f"benchmark-product-{i}",
+                sku=f"BENCH-{i:06d}",
+                price=Decimal("100.00") + i,
+                stock=i % 7,
+                image=f"products/bench_{i}.jpg",
+            )
+            for i in range(n_products)
+        )
+        ProductImage.objects.bulk_create(
+            ProductImage(product=p, image=f"products/images/bench_{p.pk}_{j}.jpg", color=f"Color {j}", ordering=j)
+            for p in products
+            for j in range(n_images)
+        )
+        ProductDiscount.objects.bulk_create(
+            ProductDiscount(product=p, original_price=p.price, discount_price=p.price - 10)
+            for p in products[::2]
+        )
+
+        user = get_user_model().objects.create_user(username="benchmark-user", email="bench@example.com", password="x")
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, product=p, quantity=2) for p in products[:50])
+        order = Order.objects.create(user=user, cart=cart, total_amount=Decimal("0"))
+        OrderItem.objects.bulk_create(OrderItem(order=order, product=p, quantity=1, price=p.price) for p in products[:50])
+
+        request = APIRequestFactory().get("/api/catalog/products/")
+        product_qs = Product.objects.filter(category=category).select_related("category", "discount").prefetch_related("images")
+        nested_product = Prefetch("product", queryset=Product.objects.select_related("category", "discount").prefetch_related("images"))
+        product_list = list(product_qs)
+        cart_obj = Cart.objects.prefetch_related(Prefetch("items", queryset=CartItem.objects.prefetch_related(nested_product))).get(pk=cart.pk)
+        order_obj = Order.objects.select_related("user").prefetch_related(Prefetch("items", queryset=OrderItem.objects.prefetch_related(nested_product))).get(pk=order.pk)
+
+        cases = [
+            ("product list", lambda: ProductSerializer(product_list, many=True, context={"request": request}).data,
+             lambda: serialize(ProductSerializer, product_list, many=True, context={"request": request})),
+            ("product detail", lambda: ProductSerializer(product_list[0], context={"request": request}).data,
+             lambda: serialize(ProductSerializer, product_list[0], context={"request": request})),
+            ("cart", lambda: CartSerializer(cart_obj).data, lambda: serialize(CartSerializer, cart_obj)),
+            ("order", lambda: OrderSerializer(order_obj).data, lambda: serialize(OrderSerializer, order_obj)),
+        ]
+
+        renderer = JSONRenderer()
+        self.stdout.write(f"{'case':<16}{'drf ms':>10}{'fast ms':>10}{'speedup':>10}")
+        for name, drf, fast in cases:
+            if renderer.render(drf()) != renderer.render(fast()):
+                raise CommandError(f"{name}: fast serializer output differs from the DRF serializer")
+            drf_time = self._best(drf, repeat)
+            fast_time = self._best(fast, repeat)
+            self.stdout.write(
+                f"{name:<16}{drf_time * 1000:>10.2f}{fast_time * 1000:>10.2f}{drf_time / fast_time:>9.1f}x"
+            )
+        self.stdout.write(self.style.SUCCESS("Outputs are byte-identical."))
+
+    @staticmethod
+    def _best(func, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,53 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.media import REFERENCES, is_blob_name, release
+
+
+class Command(BaseCommand):
+    help = (
+        "Move existing product/blog media into content-addressed blobs, pointing every "
+        "referencing row at the shared blob and deleting the now-unused originals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report what would change")
+
+    def handle(self, *args, **options):
+        names = set()
+        for model, field_name in REFERENCES:
+            names.update(
+                model._default_manager.exclude(**{field_name: ""}).exclude(**{f"{field_name}__isnull": True})
+                .values_list(field_name, flat=True).distinct()
+            )
+        pending = sorted(name for name in names if not is_blob_name(name))
+        self.stdout.write(f"{len(pending)} of {len(names)} referenced files are not content-addressed yet.")
+        if options["dry_run"] or not pending:
+            return
+
+        moved = missing = 0
+        blobs = set()
+        for name in pending:
+            if not default_storage.exists(name):
+                missing += 1
+                self.stderr.write(f"Missing file: {name}")
+                continue
+            with default_storage.open(name, "rb") as fh:
+                blob = default_storage.save(name, fh)
+            blobs.add(blob)
+            with transaction.atomic():
+                for model, field_name in REFERENCES:
+                    updates = {field_name: blob}
+                    # Derivatives were named after the old file; regenerate them for the blob
+                    if any(f.name == "variants" for f in model._meta.concrete_fields):
+                        updates["variants"] = {}
+                    model._default_manager.filter(**{field_name: name}).update(**updates)
+            moved += 1
+
+        # Deletes the old names (and their derivatives) now that nothing references them
+        released = release(pending)
+        self.stdout.write(self.style.SUCCESS(
+            f"Moved {moved} files into {len(blobs)} blobs, removed {len(released)} originals ({missing} missing). "
+            "Run generate_image_derivatives to rebuild responsive images."
+        ))
@@ -0,0 +1,32 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from catalog.exports import PRODUCT_COLUMNS, export_queryset, product_rows
+from core.exports import DEFAULT_CHUNK_SIZE, FORMATS, write_export
+
+
+class Command(BaseCommand):
+    help = "Export products as CSV or NDJSON (importable with import_products), streaming in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="File to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--is-active", choices=("true", "false"), dest="is_active")
+        parser.add_argument("--category", help="Category slug")
+
+    def handle(self, *args, **options):
+        params = {k: options[k] for k in ("is_active", "category") if options[k]}
+        try:
+            queryset = export_queryset(params)
+        except serializers.ValidationError as e:
+            raise CommandError(e.detail)
+        rows = product_rows(queryset, chunk_size=options["chunk_size"])
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+                count = write_export(options["format"], PRODUCT_COLUMNS, rows, fh)
+            self.stderr.write(self.style.SUCCESS(f"Exported {count} products to {options['output']}."))
+        else:
+            write_export(options["format"], PRODUCT_COLUMNS, rows, sys.stdout)
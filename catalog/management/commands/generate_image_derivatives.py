@@ -0,0 +1,81 @@
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from blogs.models import BlogImage
+from catalog.models import ProductImage
+from core.images import generate_derivatives
+
+MODELS = {
+    "products": ProductImage,
+    "blogs": BlogImage,
+}
+
+
+def _init_worker():
+    # Spawned workers (Windows/macOS) start without Django configured
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def _generate(name):
+    return generate_derivatives(name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate responsive WebP/JPEG derivatives for existing product and blog images. "
+        "Images are resized in a process pool; rows are updated from the main process."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes")
+        parser.add_argument("--only", choices=sorted(MODELS), help="Limit to product or blog images")
+        parser.add_argument("--force", action="store_true", help="Regenerate images that already have derivatives")
+
+    def handle(self, *args, **options):
+        targets = [options["only"]] if options["only"] else sorted(MODELS)
+        # Rows sharing a deduplicated blob share its derivatives: generate them once
+        # per name, so no two workers write the same derivative files at once
+        jobs = defaultdict(list)
+        for key in targets:
+            queryset = MODELS[key].objects.exclude(image="").exclude(image__isnull=True)
+            if not options["force"]:
+                queryset = queryset.filter(variants={})
+            for pk, name in queryset.values_list("pk", "image").iterator():
+                jobs[name].append((MODELS[key], pk))
+
+        if not jobs:
+            self.stdout.write("No images need derivatives.")
+            return
+
+        # Don't hand open connections to forked workers
+        connections.close_all()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=max(1, options["workers"]), initializer=_init_worker) as pool:
+            futures = {pool.submit(_generate, name): name for name in jobs}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    variants = future.result()
+                except Exception as exc:
+                    for model, pk in jobs[name]:
+                        failed += 1
+                        self.stderr.write(f"{model.__name__} {pk} ({name}): {exc}")
+                    continue
+                for model, pk in jobs[name]:
+                    instance = model.objects.filter(pk=pk).first()
+                    if instance is None:
+                        continue
+                    instance.variants = variants
+                    # save() so the catalog cache, product cards and ETags see the new srcset
+                    instance.save(update_fields=["variants"])
+                    done += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Generated derivatives for {done} images ({failed} failed)."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.importer import DEFAULT_BATCH_SIZE, FORMATS, ImportFormatError, ProductImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Create or update products from a CSV or NDJSON file, matched on sku. "
+        "The file is streamed in batches; invalid rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or NDJSON file")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension (csv otherwise)")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate and roll back every batch")
+
+    def handle(self, *args, **options):
+        fmt = options["format"] or detect_format(options["path"])
+
+        def report_error(line, sku, errors):
+            details = "; ".join(f"{name}: {message}" for name, message in errors.items())
+            self.stderr.write(f"line {line} ({sku or 'no sku'}): {details}")
+
+        def progress(result):
+            self.stdout.write(f"created {result.created}, updated {result.updated}, failed {result.failed}")
+
+        # Errors are printed as they happen rather than collected
+        importer = ProductImporter(
+            batch_size=options["batch_size"], dry_run=options["dry_run"], max_errors=0, on_error=report_error,
+        )
+
+        try:
+            with open(options["path"], "rb") as fh:
+                result = importer.run(fh, fmt, progress=progress)
+        except (OSError, ImportFormatError) as e:
+            raise CommandError(str(e))
+
+        prefix = "Dry run: " if options["dry_run"] else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{result.created} created, {result.updated} updated, {result.failed} rows failed."
+        ))
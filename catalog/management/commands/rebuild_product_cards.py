@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from catalog import cards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized ProductCard read model from the product tables."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Products per upsert batch")
+
+    def handle(self, *args, **options):
+        written = cards.rebuild_all(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} product cards."))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from catalog import search
+from catalog.models import Product
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text product search index (tsvector on PostgreSQL, FTS5 on SQLite)."
+
+    def handle(self, *args, **options):
+        kind = search.backend()
+        if kind is None:
+            self.stdout.write(self.style.WARNING("No search index for this database; search falls back to a table scan."))
+            return
+        search.rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f"Reindexed {Product.objects.count()} products ({kind})."))
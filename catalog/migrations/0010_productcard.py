@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_product_facet_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='catalog.product')),
+                ('name', models.CharField(max_length=255)),
+                ('slug', models.SlugField(max_length=260)),
+                ('sku', models.CharField(max_length=50)),
+                ('category_id', models.BigIntegerField()),
+                ('category_name', models.CharField(max_length=100)),
+                ('category_slug', models.SlugField(max_length=120)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('delivery_charges', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('effective_price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('original_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('on_discount', models.BooleanField(default=False)),
+                ('stock', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('image', models.CharField(blank=True, max_length=500)),
+                ('image_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['is_active', 'name', 'product'], name='productcard_active_name_idx'), models.Index(fields=['category_slug', 'is_active', 'name', 'product'], name='productcard_cat_name_idx'), models.Index(condition=models.Q(('is_active', True)), fields=['effective_price'], name='productcard_active_price_idx')],
+            },
+        ),
+    ]
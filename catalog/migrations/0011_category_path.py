@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-17 20:54
+
+from django.db import migrations, models
+
+
+def backfill_paths(apps, schema_editor):
+    Category = apps.get_model('catalog', 'Category')
+    categories = {c.pk: c for c in Category.objects.all()}
+    paths = {}
+
+    def path_for(category, seen=()):
+        if category.pk in paths:
+            return paths[category.pk]
+        parent = categories.get(category.parent_category_id)
+        prefix = ''
+        if parent is not None and parent.pk not in seen:
+            prefix = path_for(parent, seen + (category.pk,))
+        paths[category.pk] = prefix + '{:010d}/'.format(category.pk)
+        return paths[category.pk]
+
+    for category in categories.values():
+        category.path = path_for(category)
+        category.depth = category.path.count('/') - 1
+    Category.objects.bulk_update(categories.values(), ['path', 'depth'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_productcard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.RunPython(backfill_paths, migrations.RunPython.noop),
+    ]
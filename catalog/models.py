@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
 from django.utils.text import slugify
 
 
@@ -9,16 +11,47 @@ class Category(models.Model):
     image = models.URLField(blank=True)
     is_active = models.BooleanField(default=True)
     parent_category = models.ForeignKey('self', null=True, blank=True, on_delete=models.CASCADE, related_name='subcategories')
+    # Materialized path of zero-padded ancestor ids ending with this category's
+    # own id, e.g. "0000000001/0000000007/". Maintained by save(); lets the
+    # whole subtree be selected with one indexed prefix (range) lookup.
+    path = models.CharField(max_length=255, blank=True, editable=False, db_index=True)
+    depth = models.PositiveSmallIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
 
+    PATH_SEGMENT = "{:010d}/"
+
     def save(self, *args, **kwargs):
         if not self.slug:
             self.slug = slugify(self.name)
+        old_path = self.path
+        parent_path = ""
+        if self.parent_category_id:
+            parent_path = Category.objects.filter(pk=self.parent_category_id).values_list("path", flat=True).first() or ""
+            if old_path and parent_path.startswith(old_path):
+                raise ValueError("A category cannot be moved under itself or one of its descendants.")
         super().save(*args, **kwargs)
+        path = parent_path + self.PATH_SEGMENT.format(self.pk)
+        if path != old_path:
+            depth = path.count("/") - 1
+            Category.objects.filter(pk=self.pk).update(path=path, depth=depth)
+            if old_path:
+                # Re-root the subtree in one UPDATE
+                Category.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                    path=Concat(Value(path), Substr("path", len(old_path) + 1)),
+                    depth=F("depth") + (depth - self.depth),
+                )
+            self.path = path
+            self.depth = depth
+
+    def get_descendants(self, include_self=True):
+        queryset = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            queryset = queryset.exclude(pk=self.pk)
+        return queryset
 
     def __str__(self) -> str:
         return self.name
@@ -40,6 +73,17 @@ class Product(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Keyset pagination on the public listings (see catalog.pagination)
+            models.Index(fields=["is_active", "name", "id"], name="product_active_name_idx"),
+            models.Index(fields=["category", "is_active", "name", "id"], name="product_cat_active_name_idx"),
+            # Faceted filtering (see catalog.filters)
+            models.Index(fields=["is_active", "category", "price"], name="product_active_cat_price_idx"),
+            models.Index(fields=["price"], condition=models.Q(is_active=True), name="product_active_price_idx"),
+            models.Index(fields=["category", "price"], condition=models.Q(is_active=True, stock__gt=0), name="product_in_stock_idx"),
+            # Admin dashboard "low stock" list (stock < 10 ORDER BY stock)
+            models.Index(fields=["stock"], condition=models.Q(stock__lt=10), name="product_low_stock_idx"),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.slug:
@@ -56,10 +100,15 @@ class ProductImage(models.Model):
     color = models.CharField(max_length=100, default="Default")
     alt_text = models.CharField(max_length=255, blank=True)
     ordering = models.PositiveIntegerField(default=0)
+    # Resized derivatives by format and width, see core.images
+    variants = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["ordering", "id"]
+        indexes = [
+            models.Index(fields=["color", "product"], name="productimage_color_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Image for {self.product.name} - {self.color}"
@@ -75,6 +124,48 @@ class ProductDiscount(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["product", "discount_price"], condition=models.Q(is_active=True), name="productdiscount_active_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Discount for {self.product.name}"
+
+
+class ProductCard(models.Model):
+    """Denormalized listing row for a Product.
+
+    Holds the pre-flattened fields the listing endpoints need so they can read
+    one narrow table without joins or prefetches. Rows are maintained by
+    `catalog.cards` from model signals; `manage.py rebuild_product_cards`
+    rebuilds the whole table.
+    """
+    product = models.OneToOneField(Product, primary_key=True, related_name="card", on_delete=models.CASCADE)
+    name = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=260)
+    sku = models.CharField(max_length=50)
+    category_id = models.BigIntegerField()
+    category_name = models.CharField(max_length=100)
+    category_slug = models.SlugField(max_length=120)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    delivery_charges = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    effective_price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    original_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    on_discount = models.BooleanField(default=False)
+    stock = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    image = models.CharField(max_length=500, blank=True)
+    image_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["name"]
+        indexes = [
+            models.Index(fields=["is_active", "name", "product"], name="productcard_active_name_idx"),
+            models.Index(fields=["category_slug", "is_active", "name", "product"], name="productcard_cat_name_idx"),
+            models.Index(fields=["effective_price"], condition=models.Q(is_active=True), name="productcard_active_price_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Card for {self.name}"
@@ -0,0 +1,32 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class ProductCursorPagination(CursorPagination):
+    """Keyset pagination for the public product listings.
+
+    Pages are addressed by an opaque cursor on (`name`, `id`) instead of an
+    OFFSET, so fetching a deep page costs the same as fetching the first one.
+    The ordering matches the `product_active_name_idx` and
+    `product_cat_active_name_idx` indexes on `Product`.
+    """
+    ordering = ("name", "id")
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
+
+
+class ProductCardCursorPagination(ProductCursorPagination):
+    """Same keyset as ProductCursorPagination, over the ProductCard table."""
+    ordering = ("name", "product_id")
+
+
+class ProductSearchPagination(PageNumberPagination):
+    """Page-number pagination for relevance-ranked search results.
+
+    Results are ordered by rank rather than a column, so a keyset cursor does
+    not apply; the ranked id list is computed by the index and only the
+    requested page of products is loaded.
+    """
+    page_size = 24
+    page_size_query_param = "page_size"
+    max_page_size = 100
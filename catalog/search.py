@@ -0,0 +1,250 @@
+"""Full-text product search backed by a maintained index.
+
+PostgreSQL keeps a weighted `search_vector` tsvector column on
+`catalog_product` with a GIN index. SQLite (local runs) keeps an FTS5 table,
+`catalog_product_fts`, whose rowid is the product id. Both indexes cover the
+product name, SKU, description and category name, are created by migration
+`0008_product_search_index` and are kept current by the handlers in
+`catalog.signals`. Bulk writes that bypass signals can be repaired with
+`manage.py rebuild_search_index`.
+
+Other database vendors fall back to an unindexed `icontains` scan.
+"""
+import logging
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Product
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "catalog_product_fts"
+PG_CONFIG = "english"
+
+# name, description, sku, category_name
+FTS_WEIGHTS = (10.0, 1.0, 8.0, 4.0)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def backend(using=None):
+    """Return the search backend name for the given connection vendor."""
+    vendor = (using or connection).vendor
+    if vendor == "postgresql":
+        return "postgresql"
+    if vendor == "sqlite" and _fts_table_exists(using or connection):
+        return "sqlite"
+    return None
+
+
+def _fts_table_exists(conn):
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+# --------------------------------------------------------------------------
+# Index DDL (used by migrations)
+# --------------------------------------------------------------------------
+
+def create_index(schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor == "postgresql":
+        schema_editor.execute("ALTER TABLE catalog_product ADD COLUMN IF NOT EXISTS search_vector tsvector")
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS catalog_product_search_gin ON catalog_product USING GIN (search_vector)"
+        )
+    elif conn.vendor == "sqlite":
+        try:
+            schema_editor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                "USING fts5(name, description, sku, category_name, tokenize = 'unicode61')"
+            )
+        except Exception:
+            logger.warning("SQLite was built without FTS5; product search will use a table scan")
+            return
+    else:
+        return
+    rebuild_index(using=conn)
+
+
+def drop_index(schema_editor):
+    conn = schema_editor.connection
+    if conn.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS catalog_product_search_gin")
+        schema_editor.execute("ALTER TABLE catalog_product DROP COLUMN IF EXISTS search_vector")
+    elif conn.vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+# --------------------------------------------------------------------------
+# Index maintenance
+# --------------------------------------------------------------------------
+
+_PG_VECTOR = (
+    "setweight(to_tsvector('{cfg}', coalesce(p.name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(p.sku, '')), 'A') || "
+    "setweight(to_tsvector('{cfg}', coalesce(c.name, '')), 'B') || "
+    "setweight(to_tsvector('{cfg}', coalesce(p.description, '')), 'C')"
+).format(cfg=PG_CONFIG)
+
+
+def _reindex(where, params, using=None):
+    conn = using or connection
+    kind = backend(conn)
+    if kind is None:
+        return
+    with conn.cursor() as cursor:
+        if kind == "postgresql":
+            cursor.execute(
+                f"UPDATE catalog_product p SET search_vector = {_PG_VECTOR} "
+                f"FROM catalog_category c WHERE c.id = p.category_id AND {where}",
+                params,
+            )
+        else:
+            cursor.execute(
+                f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT p.id FROM catalog_product p WHERE {where})",
+                params,
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description, sku, category_name) "
+                "SELECT p.id, p.name, p.description, p.sku, c.name "
+                f"FROM catalog_product p JOIN catalog_category c ON c.id = p.category_id WHERE {where}",
+                params,
+            )
+
+
+def index_products(product_ids, using=None):
+    """(Re)index the given products."""
+    product_ids = [int(pk) for pk in product_ids if pk is not None]
+    if not product_ids:
+        return
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    _reindex(f"p.id IN ({placeholders})", product_ids, using=using)
+
+
+def index_category(category_id, using=None):
+    """Reindex every product in a category, e.g. after it is renamed."""
+    _reindex("p.category_id = %s", [category_id], using=using)
+
+
+def remove_products(product_ids, using=None):
+    """Drop deleted products from the index.
+
+    PostgreSQL needs nothing here because the vector lives on the product row.
+    """
+    product_ids = [int(pk) for pk in product_ids if pk is not None]
+    conn = using or connection
+    if not product_ids or backend(conn) != "sqlite":
+        return
+    placeholders = ", ".join(["%s"] * len(product_ids))
+    with conn.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", product_ids)
+
+
+def rebuild_index(using=None):
+    """Rebuild the whole index from the product table."""
+    conn = using or connection
+    kind = backend(conn)
+    if kind == "sqlite":
+        with conn.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+    if kind is not None:
+        _reindex("1 = 1", [], using=conn)
+
+
+# --------------------------------------------------------------------------
+# Querying
+# --------------------------------------------------------------------------
+
+def _fts_match_expression(query):
+    """Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term so user input can never be parsed
+    as FTS5 syntax, and all terms must match.
+    """
+    tokens = _TOKEN_RE.findall(query)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class ProductSearchResults:
+    """Lazy, ranked search result set.
+
+    Implements the `count()` / slicing protocol used by Django's `Paginator`,
+    so only the requested page of ids is ranked and fetched.
+    """
+
+    def __init__(self, query, queryset=None):
+        self.query = (query or "").strip()
+        self.queryset = queryset if queryset is not None else Product.objects.filter(is_active=True)
+        self.kind = backend()
+        self._count = None
+        if self.kind == "sqlite":
+            self.match = _fts_match_expression(self.query)
+            if not self.match:
+                self.query = ""
+
+    def count(self):
+        if self._count is None:
+            if not self.query:
+                self._count = 0
+            elif self.kind is None:
+                self._count = self._fallback_queryset().count()
+            else:
+                sql, params = self._ranked_sql(count=True)
+                with connection.cursor() as cursor:
+                    cursor.execute(sql, params)
+                    self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item:item + 1][0]
+        start = item.start or 0
+        stop = item.stop if item.stop is not None else self.count()
+        if not self.query or stop <= start:
+            return []
+        if self.kind is None:
+            return list(self._fallback_queryset()[start:stop])
+        sql, params = self._ranked_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(sql + " LIMIT %s OFFSET %s", params + [stop - start, start])
+            ids = [row[0] for row in cursor.fetchall()]
+        products = self.queryset.in_bulk(ids)
+        return [products[pk] for pk in ids if pk in products]
+
+    def _ranked_sql(self, count=False):
+        if self.kind == "postgresql":
+            select = "COUNT(*)" if count else "p.id"
+            sql = (
+                f"SELECT {select} FROM catalog_product p, websearch_to_tsquery('{PG_CONFIG}', %s) q "
+                "WHERE p.is_active AND p.search_vector @@ q"
+            )
+            if not count:
+                sql += " ORDER BY ts_rank_cd(p.search_vector, q) DESC, p.id"
+            return sql, [self.query]
+        select = "COUNT(*)" if count else "f.rowid"
+        weights = ", ".join(str(w) for w in FTS_WEIGHTS)
+        sql = (
+            f"SELECT {select} FROM {FTS_TABLE} f JOIN catalog_product p ON p.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND p.is_active"
+        )
+        if not count:
+            sql += f" ORDER BY bm25({FTS_TABLE}, {weights}), f.rowid"
+        return sql, [self.match]
+
+    def _fallback_queryset(self):
+        q = Q()
+        for token in self.query.split():
+            q &= (
+                Q(name__icontains=token)
+                | Q(description__icontains=token)
+                | Q(sku__icontains=token)
+                | Q(category__name__icontains=token)
+            )
+        return self.queryset.filter(q).order_by("name", "id")
@@ -1,7 +1,12 @@
 from rest_framework import serializers
 from django.conf import settings
-from .models import Category, Product, ProductImage, ProductDiscount
+from django.core.files.storage import default_storage
+from django.db import transaction
+from .models import Category, Product, ProductImage, ProductDiscount, ProductCard
 from decimal import Decimal
+from core.fastserializers import FastRepresentationMixin
+from core.images import build_srcset
+from orders import stock
 
 
 class ProductDiscountSerializer(serializers.ModelSerializer):
@@ -11,31 +16,46 @@ class ProductDiscountSerializer(serializers.ModelSerializer):
         read_only_fields = ("created_at",)
 
 
-class ProductImageSerializer(serializers.ModelSerializer):
+class ProductBulkUpdateItemSerializer(serializers.Serializer):
+    """One row of a bulk admin product update; only the fields sent are changed."""
+    id = serializers.IntegerField()
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False)
+    stock = serializers.IntegerField(min_value=0, max_value=2147483647, required=False)
+    is_active = serializers.BooleanField(required=False)
+    # null removes the product's discount
+    discount_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False, allow_null=True)
+    original_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal("0"), required=False, allow_null=True)
+
+
+def absolute_media_url(url, request):
+    """Prefix bare storage names with /media/ and make them absolute when a request is available."""
+    if url and not url.startswith('http'):
+        if not url.startswith('/media/'):
+            url = f"/media/{url}"
+        if request:
+            return request.build_absolute_uri(url)
+    return url
+
+
+class ProductImageSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     # Ensure serializer returns a URL for the image field (use_url=True)
     image = serializers.ImageField(use_url=True)
+    srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = ProductImage
-        fields = ("id", "image", "color", "alt_text", "ordering")
+        fields = ("id", "image", "color", "alt_text", "ordering", "srcset")
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
+    def get_srcset(self, obj):
+        return build_srcset(obj.variants, self.context.get('request'))
+
+    def finalize_representation(self, ret, instance):
         if ret.get('image'):
-            image_url = ret['image']
-            if image_url and not image_url.startswith('http'):
-                if not image_url.startswith('/media/'):
-                    image_url = f"/media/{image_url}"
-                request = self.context.get('request')
-                if request:
-                    ret['image'] = request.build_absolute_uri(image_url)
-                else:
-                    ret['image'] = image_url
-            return ret
+            ret['image'] = absolute_media_url(ret['image'], self.context.get('request'))
         return ret
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     image = serializers.ImageField(use_url=True, required=False, allow_null=True)
     images = ProductImageSerializer(many=True, read_only=True)
     category = serializers.SerializerMethodField(read_only=True)
@@ -75,38 +95,14 @@ class ProductSerializer(serializers.ModelSerializer):
             }
         return None
 
-    def to_representation(self, instance):
-        ret = super().to_representation(instance)
-        if ret.get('image'):
-            image_url = ret['image']
-            if image_url and not image_url.startswith('http'):
-                if not image_url.startswith('/media/'):
-                    image_url = f"/media/{image_url}"
-                request = self.context.get('request')
-                if request:
-                    ret['image'] = request.build_absolute_uri(image_url)
-                else:
-                    ret['image'] = image_url
-        return ret
-
-    def to_representation(self, instance):
-        # Use base representation then expose a top-level `discount_price` for convenience
-        ret = super().to_representation(instance)
+    def finalize_representation(self, ret, instance):
         # ensure image URL is absolute when possible (same logic as ProductImageSerializer)
         if ret.get('image'):
-            image_url = ret['image']
-            if image_url and not image_url.startswith('http'):
-                if not image_url.startswith('/media/'):
-                    image_url = f"/media/{image_url}"
-                request = self.context.get('request')
-                if request:
-                    ret['image'] = request.build_absolute_uri(image_url)
-                else:
-                    ret['image'] = image_url
+            ret['image'] = absolute_media_url(ret['image'], self.context.get('request'))
 
+        # expose the discount at top level for frontend convenience
         try:
             if hasattr(instance, 'discount') and instance.discount:
-                # expose numeric/string value at top level for frontend convenience
                 ret['discount_price'] = str(instance.discount.discount_price)
                 ret['original_price'] = str(instance.discount.original_price)
             else:
@@ -193,7 +189,13 @@ class ProductSerializer(serializers.ModelSerializer):
         discount_price = validated_data.pop('discount_price', None)
         original_price = validated_data.pop('original_price', None)
 
-        product = super().update(instance, validated_data)
+        with transaction.atomic():
+            if 'stock' in validated_data:
+                # `stock` is the on-hand count; store what is left after cart holds,
+                # read with the row locked so no hold moves in between
+                list(Product.objects.select_for_update().filter(pk=instance.pk).values_list('pk'))
+                validated_data['stock'] = stock.available_stock({instance.pk: validated_data['stock']})[instance.pk]
+            product = super().update(instance, validated_data)
 
         # Manage discount creation/update/deletion based on incoming data
         try:
@@ -220,6 +222,23 @@ class ProductSerializer(serializers.ModelSerializer):
         return product
 
 
+class AdminProductSerializer(ProductSerializer):
+    """ProductSerializer for the admin API: `stock` reads as the on-hand count it is written as.
+
+    Lists annotate `held_units` (see AdminProductViewSet); other instances
+    look their holds up.
+    """
+
+    def finalize_representation(self, ret, instance):
+        ret = super().finalize_representation(ret, instance)
+        held = getattr(instance, 'held_units', None)
+        if held is None:
+            ret['stock'] = stock.on_hand_stock({instance.pk: instance.stock})[instance.pk]
+        else:
+            ret['stock'] = instance.stock + held
+        return ret
+
+
 class CategorySerializer(serializers.ModelSerializer):
     image = serializers.SerializerMethodField()
     subcategories = serializers.SerializerMethodField()
@@ -233,8 +252,19 @@ class CategorySerializer(serializers.ModelSerializer):
         return obj.image if obj.image else None
     
     def get_subcategories(self, obj):
-        subcats = obj.subcategories.filter(is_active=True)
+        # Views that render many categories pass a preloaded CategoryTree to avoid a query per category
+        tree = self.context.get('category_tree')
+        if tree is not None:
+            subcats = tree.children_of(obj)
+        else:
+            subcats = obj.subcategories.filter(is_active=True)
         return CategorySubcategorySerializer(subcats, many=True).data
+
+    def validate_parent_category_id(self, value):
+        if value and self.instance and self.instance.path:
+            if Category.objects.filter(pk=value, path__startswith=self.instance.path).exists():
+                raise serializers.ValidationError("A category cannot be moved under itself or one of its descendants.")
+        return value
     
     def to_representation(self, instance):
         ret = super().to_representation(instance)
@@ -268,3 +298,48 @@ class CategorySubcategorySerializer(serializers.ModelSerializer):
 
     def get_image(self, obj):
         return obj.image if obj.image else None
+
+
+class ProductCardSerializer(serializers.ModelSerializer):
+    """Flat listing representation read straight from the ProductCard table."""
+    id = serializers.IntegerField(source="product_id", read_only=True)
+    category = serializers.SerializerMethodField()
+    image = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductCard
+        fields = (
+            "id",
+            "name",
+            "slug",
+            "sku",
+            "price",
+            "delivery_charges",
+            "effective_price",
+            "discount_price",
+            "original_price",
+            "on_discount",
+            "stock",
+            "category",
+            "image",
+            "image_count",
+        )
+        read_only_fields = fields
+
+    def get_category(self, obj):
+        return {
+            "id": obj.category_id,
+            "name": obj.category_name,
+            "slug": obj.category_slug,
+        }
+
+    def get_image(self, obj):
+        if not obj.image:
+            return None
+        if obj.image.startswith('http'):
+            return obj.image
+        image_url = default_storage.url(obj.image)
+        request = self.context.get('request')
+        if request:
+            return request.build_absolute_uri(image_url)
+        return image_url
@@ -0,0 +1,92 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core import media
+from . import cache, cards, search
+from .models import Category, Product, ProductDiscount, ProductImage
+
+# Product images share deduplicated blobs; see core/media.py
+media.track(Product, 'image')
+media.track(ProductImage, 'image')
+
+
+@receiver(post_save, sender=Product)
+def index_product_for_search(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_search(sender, instance, **kwargs):
+    search.remove_products([instance.pk])
+
+
+@receiver(post_save, sender=Category)
+def reindex_category_for_search(sender, instance, created=False, raw=False, **kwargs):
+    # A new category has no products yet; a renamed one changes their documents
+    if raw or created:
+        return
+    search.index_category(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductDiscount)
+@receiver(post_delete, sender=ProductDiscount)
+def touch_product(sender, instance, raw=False, **kwargs):
+    # Images and discounts are part of the product payload, so they move the
+    # product's updated_at (used for Last-Modified / ETag validators).
+    if raw:
+        return
+    Product.objects.filter(pk=instance.product_id).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_card_for_product(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cards.schedule_refresh(instance.pk)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+@receiver(post_save, sender=ProductDiscount)
+@receiver(post_delete, sender=ProductDiscount)
+def refresh_card_for_related(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    cards.schedule_refresh(instance.product_id)
+
+
+@receiver(post_save, sender=Category)
+def refresh_cards_for_category(sender, instance, created=False, raw=False, **kwargs):
+    if raw or created:
+        return
+    cards.refresh_category(instance)
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_product_cache_version(sender, **kwargs):
+    cache.schedule_bump(cache.PRODUCT)
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def bump_image_cache_version(sender, **kwargs):
+    cache.schedule_bump(cache.IMAGE)
+
+
+@receiver(post_save, sender=ProductDiscount)
+@receiver(post_delete, sender=ProductDiscount)
+def bump_discount_cache_version(sender, **kwargs):
+    cache.schedule_bump(cache.DISCOUNT)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_category_cache_version(sender, **kwargs):
+    cache.schedule_bump(cache.CATEGORY)
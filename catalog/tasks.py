@@ -0,0 +1,10 @@
+from core.images import refresh_variants
+from jobs.queue import task
+from .models import ProductImage
+
+
+@task(priority=10, max_attempts=3)
+def generate_product_image_derivatives(image_id):
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is not None:
+        refresh_variants(product_image)
@@ -1,3 +1,115 @@
+import io
+import os
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from rest_framework.test import APITestCase
+
+from core.media import ContentAddressedStorage, release
+from jobs.models import Job
+from .filters import product_facets
+from .importer import ImportFormatError, iter_rows
+from .models import Category, Product, ProductDiscount, ProductImage
+
+
+class MediaReleaseTests(TestCase):
+    """A blob a save has just written or reused must survive release() until its row commits."""
+
+    def setUp(self):
+        self.location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.location, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.location)
+
+    def age(self, name):
+        old = time.time() - 24 * 3600
+        os.utime(self.storage.path(name), (old, old))
+
+    def test_old_unreferenced_blob_is_deleted(self):
+        name = self.storage.save("products/images/a.jpg", ContentFile(b"photo"))
+        self.age(name)
+        self.assertEqual(release([name], storage=self.storage), [name])
+        self.assertFalse(self.storage.exists(name))
+
+    def test_reused_blob_is_kept_and_checked_again_later(self):
+        name = self.storage.save("products/images/a.jpg", ContentFile(b"photo"))
+        self.age(name)
+        # An identical upload reuses the blob; its row is not committed yet
+        self.assertEqual(self.storage.save("products/images/b.jpg", ContentFile(b"photo")), name)
+
+        self.assertEqual(release([name], storage=self.storage), [])
+        self.assertTrue(self.storage.exists(name))
+        retry = Job.objects.get(name="jobs.tasks.release_media")
+        self.assertEqual(retry.args, [[name]])
+
+
+class PriceFilterTests(TestCase):
+
+    def test_non_finite_prices_are_rejected(self):
+        for value in ("NaN", "Infinity", "-Infinity", "sNaN"):
+            response = self.client.get("/api/catalog/products/", {"min_price": value})
+            self.assertEqual(response.status_code, 400, value)
+            self.assertIn("min_price", response.json())
+
+
+class FacetTests(TestCase):
+
+    def test_facets_come_from_one_query(self):
+        shoes = Category.objects.create(name="Shoes")
+        hats = Category.objects.create(name="Hats")
+        runner = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=3, category=shoes)
+        walker = Product.objects.create(name="Walker", sku="WALK-1", price=20, stock=0, category=shoes)
+        cap = Product.objects.create(name="Cap", sku="CAP-1", price=5, stock=1, category=hats)
+        ProductDiscount.objects.create(product=walker, original_price=20, discount_price=8, is_active=True)
+        for product, color in ((runner, "red"), (runner, "red"), (runner, "blue"), (walker, "red"), (cap, "green")):
+            ProductImage.objects.create(product=product, image="products/images/a.jpg", color=color)
+
+        with self.assertNumQueries(1):
+            facets = product_facets(Product.objects.filter(category=shoes))
+        self.assertEqual(facets, {
+            "total": 2,
+            "in_stock": 1,
+            "on_discount": 1,
+            "price": {"min": "8.00", "max": "10.00"},
+            "colors": [{"color": "red", "count": 2}, {"color": "blue", "count": 1}],
+        })
+
+        empty = product_facets(Product.objects.filter(stock__gt=100))
+        self.assertEqual((empty["total"], empty["price"], empty["colors"]), (0, {"min": None, "max": None}, []))
+
+
+class ImporterEncodingTests(APITestCase):
+
+    def test_bom_and_quoted_newlines_are_read(self):
+        data = '\ufeffsku,name,description\r\nA-1,Runner,"two\r\nlines"\r\nA-2,Walker,\r\n'.encode()
+        rows = list(iter_rows(io.BytesIO(data), "csv"))
+        self.assertEqual([row["sku"] for _, row in rows], ["A-1", "A-2"])
+        self.assertEqual(rows[0][1]["description"], "two\r\nlines")
+
+    def test_non_utf8_file_names_the_line(self):
+        data = "sku,name\nA-1,Runner\nA-2,Caf\u00e9\n".encode("latin-1")
+        with self.assertRaisesMessage(ImportFormatError, "line 3 (byte offset 27)"):
+            list(iter_rows(io.BytesIO(data), "csv"))
+
+    def test_non_utf8_upload_is_a_bad_request(self):
+        Category.objects.create(name="Shoes", slug="shoes")
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", "admin@example.com"))
+        data = "sku,name,price,category\nA-1,Caf\u00e9,10,shoes\n".encode("latin-1")
+        upload = SimpleUploadedFile("products.csv", data, content_type="text/csv")
+        response = self.client.post("/api/catalog/admin/products/import/", {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("line 2", response.json()["error"])
+        self.assertFalse(Product.objects.exists())
 
-# Create your tests here.
+    def test_non_utf8_file_is_a_command_error(self):
+        path = os.path.join(tempfile.mkdtemp(), "products.csv")
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, "wb") as fh:
+            fh.write("sku,name\nA-1,Caf\u00e9\n".encode("latin-1"))
+        with self.assertRaisesMessage(CommandError, "line 2"):
+            call_command("import_products", path, stdout=io.StringIO())
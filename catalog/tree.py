@@ -0,0 +1,28 @@
+"""In-memory category tree assembled from a single query.
+
+Categories are loaded once, ordered by name, and grouped by parent id so the
+serializers can nest subcategories without a query per category.
+"""
+from collections import defaultdict
+
+from .models import Category
+
+
+class CategoryTree:
+    def __init__(self, categories):
+        self.nodes = list(categories)
+        self.children = defaultdict(list)
+        for category in self.nodes:
+            self.children[category.parent_category_id].append(category)
+
+    @classmethod
+    def load(cls, queryset=None):
+        if queryset is None:
+            queryset = Category.objects.filter(is_active=True)
+        return cls(queryset.order_by("name", "id"))
+
+    def roots(self):
+        return list(self.children.get(None, []))
+
+    def children_of(self, category):
+        return list(self.children.get(category.pk, []))
@@ -2,6 +2,8 @@ from django.urls import path, include
 from rest_framework import routers
 from .views import (
     ProductListView,
+    ProductSearchView,
+    ProductCardListView,
     ProductDetailView,
     CategoryListView,
     CategoryProductsView,
@@ -19,6 +21,8 @@ router.register(r"admin/categories", AdminCategoryViewSet, basename="admin-categ
 
 urlpatterns = [
     path("products/", ProductListView.as_view(), name="product-list"),
+    path("products/cards/", ProductCardListView.as_view(), name="product-card-list"),
+    path("products/search/", ProductSearchView.as_view(), name="product-search"),
     path("products/<int:pk>/", ProductDetailView.as_view(), name="product-detail"),
     path("categories/", CategoryListView.as_view(), name="category-list"),
     path("categories/<slug:slug>/products/", CategoryProductsView.as_view(), name="category-products"),
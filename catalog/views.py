@@ -1,21 +1,52 @@
 import logging
 import os
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
-from rest_framework import generics, permissions, viewsets, status
+from rest_framework import generics, permissions, serializers, viewsets, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from .models import Product, Category, ProductImage, ProductDiscount
-from .serializers import ProductSerializer, CategorySerializer, ProductImageSerializer
+from core.exports import FORMATS as EXPORT_FORMATS, streaming_response
+from core.fastserializers import FastReadSerializerMixin
+from jobs.queue import enqueue
+from .models import Product, Category, ProductImage, ProductDiscount, ProductCard
+from .serializers import AdminProductSerializer, ProductSerializer, CategorySerializer, ProductImageSerializer, ProductCardSerializer, ProductBulkUpdateItemSerializer
+from .pagination import ProductCursorPagination, ProductCardCursorPagination, ProductSearchPagination
+from .search import ProductSearchResults
+from .tree import CategoryTree
+from .tasks import generate_product_image_derivatives
+from .cache import CATEGORY, CachedResponseMixin, CatalogConditionalGetMixin
+from .filters import ProductCardFilter, ProductFacetFilter, TRUE_VALUES, product_facets
+from .importer import ImportFormatError, ProductImporter, detect_format
+from .exports import PRODUCT_COLUMNS, export_queryset, product_rows
+from .bulk import MAX_BULK_UPDATE, update_products
 
 logger = logging.getLogger(__name__)
 
 
-class ProductListView(generics.ListAPIView):
+class FacetedProductListMixin:
+	"""Price / stock / discount / color filters for product lists.
+	Pass `?facets=true` to include facet counts for the filtered set alongside the page.
+	"""
+	filter_backends = [ProductFacetFilter]
+
+	def list(self, request, *args, **kwargs):
+		response = super().list(request, *args, **kwargs)
+		if request.query_params.get('facets', '').lower() in TRUE_VALUES:
+			response.data['facets'] = product_facets(self.filter_queryset(self.get_queryset()))
+		return response
+
+
+class ProductListView(CachedResponseMixin, CatalogConditionalGetMixin, FacetedProductListMixin, FastReadSerializerMixin, generics.ListAPIView):
 	serializer_class = ProductSerializer
 	permission_classes = [permissions.AllowAny]
+	pagination_class = ProductCursorPagination
+	validator_fields = ('updated_at', 'category__updated_at')
 
 	def get_queryset(self):
 		# select_related/prefetch_related to reduce DB queries during serialization
@@ -32,11 +63,46 @@ class ProductListView(generics.ListAPIView):
 
 
 
-class ProductDetailView(generics.RetrieveAPIView):
+class ProductCardListView(CatalogConditionalGetMixin, generics.ListAPIView):
+	"""Flat product listing served from the denormalized ProductCard table (no joins, no prefetch)."""
+	serializer_class = ProductCardSerializer
+	permission_classes = [permissions.AllowAny]
+	pagination_class = ProductCardCursorPagination
+	filter_backends = [ProductCardFilter]
+
+	def get_queryset(self):
+		return ProductCard.objects.filter(is_active=True)
+
+
+class ProductSearchView(CatalogConditionalGetMixin, FastReadSerializerMixin, generics.ListAPIView):
+	"""Relevance-ranked full-text search over product name, SKU, description and category name.
+	Query with `?q=`; results are paginated with `?page=` / `?page_size=`.
+	"""
+	serializer_class = ProductSerializer
+	permission_classes = [permissions.AllowAny]
+	pagination_class = ProductSearchPagination
+	validator_fields = ('updated_at', 'category__updated_at')
+
+	def get_validator_queryset(self):
+		# Validate against every searchable product rather than running the ranked query twice
+		return Product.objects.filter(is_active=True)
+
+	def get_queryset(self):
+		queryset = Product.objects.filter(is_active=True).select_related('category', 'discount').prefetch_related('images')
+		return ProductSearchResults(self.request.query_params.get('q', ''), queryset=queryset)
+
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		context['request'] = self.request
+		return context
+
+
+class ProductDetailView(CachedResponseMixin, CatalogConditionalGetMixin, FastReadSerializerMixin, generics.RetrieveAPIView):
 	# Include related objects to avoid extra queries during serialization
 	queryset = Product.objects.filter(is_active=True).select_related('category', 'discount').prefetch_related('images')
 	serializer_class = ProductSerializer
 	permission_classes = [permissions.AllowAny]
+	validator_fields = ('updated_at', 'category__updated_at')
 
 	def get_serializer_context(self):
 		context = super().get_serializer_context()
@@ -44,21 +110,48 @@ class ProductDetailView(generics.RetrieveAPIView):
 		return context
 
 
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(CachedResponseMixin, CatalogConditionalGetMixin, generics.ListAPIView):
 	serializer_class = CategorySerializer
 	permission_classes = [permissions.AllowAny]
+	cache_models = (CATEGORY,)
 	
+	def get_category_tree(self):
+		if not hasattr(self, '_category_tree'):
+			self._category_tree = CategoryTree.load()
+		return self._category_tree
+
 	def get_queryset(self):
-		return Category.objects.filter(is_active=True, parent_category__isnull=True)
+		# Top-level categories come from the same single-query tree used for nesting
+		return self.get_category_tree().roots()
+
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		context['category_tree'] = self.get_category_tree()
+		return context
+
+	def get_validator_queryset(self):
+		# Subcategories are nested in the payload, so validate against the whole table
+		return Category.objects.all()
 
 
-class CategoryProductsView(generics.ListAPIView):
+class CategoryProductsView(CachedResponseMixin, CatalogConditionalGetMixin, FacetedProductListMixin, FastReadSerializerMixin, generics.ListAPIView):
 	serializer_class = ProductSerializer
 	permission_classes = [permissions.AllowAny]
+	pagination_class = ProductCursorPagination
+	validator_fields = ('updated_at', 'category__updated_at')
 
 	def get_queryset(self):
+		"""Products in the category; with `?include_descendants=true` also those in all of its subcategories,
+		selected with one prefix lookup on the category path.
+		"""
 		slug = self.kwargs.get('slug')
-		return Product.objects.filter(category__slug=slug, is_active=True)
+		queryset = Product.objects.filter(is_active=True).select_related('category', 'discount').prefetch_related('images')
+		if self.request.query_params.get('include_descendants', '').lower() in TRUE_VALUES:
+			path = Category.objects.filter(slug=slug).values_list('path', flat=True).first()
+			if not path:
+				return queryset.none()
+			return queryset.filter(category__path__startswith=path)
+		return queryset.filter(category__slug=slug)
 
 	def get_serializer_context(self):
 		context = super().get_serializer_context()
@@ -68,10 +161,19 @@ class CategoryProductsView(generics.ListAPIView):
 
 class AdminProductViewSet(viewsets.ModelViewSet):
 	queryset = Product.objects.all()
-	serializer_class = ProductSerializer
+	serializer_class = AdminProductSerializer
 	permission_classes = [permissions.IsAdminUser]
 	parser_classes = (JSONParser, MultiPartParser, FormParser)
 
+	def get_queryset(self):
+		queryset = super().get_queryset()
+		if self.action == 'list':
+			# On-hand stock for the whole page in the list query (AdminProductSerializer)
+			queryset = queryset.annotate(
+				held_units=Coalesce(Sum('cart_items__reserved_quantity', filter=Q(cart_items__reserved_quantity__gt=0)), 0),
+			)
+		return queryset
+
 	def get_serializer_context(self):
 		context = super().get_serializer_context()
 		context['request'] = self.request
@@ -150,12 +252,83 @@ class AdminProductViewSet(viewsets.ModelViewSet):
 			logger.exception(f"Error updating product: {str(e)}")
 			raise
 
+	@action(detail=False, methods=['post'], url_path='import', parser_classes=[MultiPartParser, FormParser])
+	def import_products(self, request):
+		"""Create or update products from an uploaded CSV / NDJSON `file` (see catalog.importer).
+
+		Optional fields: `format` (csv / ndjson, default from the filename) and `dry_run`.
+		"""
+		upload = request.FILES.get("file")
+		if not upload:
+			return Response({"error": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
+		fmt = request.data.get("format") or detect_format(upload.name)
+		dry_run = str(request.data.get("dry_run", "false")).lower() in TRUE_VALUES
+		try:
+			result = ProductImporter(dry_run=dry_run).run(upload, fmt)
+		except ImportFormatError as e:
+			return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+		logger.info(f"Product import from {upload.name}: {result.created} created, {result.updated} updated, {result.failed} failed")
+		return Response({**result.as_dict(), "dry_run": dry_run}, status=status.HTTP_200_OK)
+
+
+	@action(detail=False, methods=['get'], url_path='export')
+	def export_products(self, request):
+		"""Stream every product as CSV or NDJSON (`?as=csv|ndjson`), optionally filtered by `is_active` / `category`."""
+		fmt = request.query_params.get("as", "csv")
+		if fmt not in EXPORT_FORMATS:
+			return Response({"error": f"as must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+		rows = product_rows(export_queryset(request.query_params))
+		return streaming_response(fmt, "products", PRODUCT_COLUMNS, rows)
+
+	@action(detail=False, methods=['patch'], url_path='bulk', parser_classes=[JSONParser])
+	def bulk_update(self, request):
+		"""Update price / stock / is_active / discount of many products in one transaction.
+
+		Takes a JSON list of `{id, price, stock, is_active, discount_price, original_price}`
+		(only `id` is required) and returns one `{id, status[, errors]}` entry per row.
+		Invalid rows are reported and skipped; the valid ones are applied together.
+		"""
+		rows = request.data
+		if not isinstance(rows, list):
+			return Response({"error": "Expected a list of product updates"}, status=status.HTTP_400_BAD_REQUEST)
+		if len(rows) > MAX_BULK_UPDATE:
+			return Response({"error": f"At most {MAX_BULK_UPDATE} products per request"}, status=status.HTTP_400_BAD_REQUEST)
+
+		item_serializer = ProductBulkUpdateItemSerializer()
+		results, changes, seen = [], [], set()
+		for row in rows:
+			try:
+				change = item_serializer.run_validation(row)
+			except serializers.ValidationError as e:
+				results.append({"id": row.get("id") if isinstance(row, dict) else None, "status": "invalid", "errors": e.detail})
+				continue
+			if change["id"] in seen:
+				results.append({"id": change["id"], "status": "invalid", "errors": {"id": ["Duplicate id in this request."]}})
+				continue
+			seen.add(change["id"])
+			changes.append(change)
+			results.append({"id": change["id"], "status": None})
+
+		outcome = update_products(changes) if changes else {}
+		for result in results:
+			if result["status"] is None:
+				result["status"] = outcome[result["id"]]
+		updated = sum(1 for result in results if result["status"] == "updated")
+		logger.info(f"Bulk product update: {updated} updated, {len(results) - updated} failed")
+		return Response({"updated": updated, "failed": len(results) - updated, "results": results}, status=status.HTTP_200_OK)
+
 
 class AdminCategoryViewSet(viewsets.ModelViewSet):
 	queryset = Category.objects.all()
 	serializer_class = CategorySerializer
 	permission_classes = [permissions.IsAdminUser]
 
+	def get_serializer_context(self):
+		context = super().get_serializer_context()
+		if self.action == 'list':
+			context['category_tree'] = CategoryTree.load()
+		return context
+
 
 class UploadProductImageView(APIView):
 	permission_classes = [permissions.IsAdminUser]
@@ -194,22 +367,20 @@ class UploadProductImageView(APIView):
 
 		try:
 			if clear_old:
-				old_images = ProductImage.objects.filter(product=product)
-				logger.debug(f"Deleting {old_images.count()} old images")
-				for old_img in old_images:
-					if old_img.image:
-						old_img.image.delete(save=False)
-					old_img.delete()
+				# One bulk delete; the files are released by a single background job
+				# once no other row references them (see core/media.py)
+				with transaction.atomic():
+					deleted, _ = ProductImage.objects.filter(product=product).delete()
+				logger.debug(f"Deleted {deleted} old images")
 
 			# Save file explicitly into storage to ensure it's written and to log the saved path
 			# Ensure media subdirs exist
 			media_dir = os.path.join(str(settings.MEDIA_ROOT), 'products', 'images')
 			os.makedirs(media_dir, exist_ok=True)
 
-			# Build a safe storage name and save
+			# Storage names the file by its content hash and skips the write for duplicates
 			orig_name = getattr(image_file, 'name', 'upload')
 			storage_name = os.path.join('products', 'images', orig_name)
-			storage_name = default_storage.get_available_name(storage_name)
 			saved_name = default_storage.save(storage_name, image_file)
 
 			# Create ProductImage and assign the saved path
@@ -221,6 +392,9 @@ class UploadProductImageView(APIView):
 			)
 			logger.info(f"Saved uploaded file to storage: {saved_name}")
 
+			# Resized WebP/JPEG copies for srcset are generated by the job worker
+			enqueue(generate_product_image_derivatives, product_image.id)
+
 			# If product doesn't have a main image set, set this uploaded image as the main image
 			try:
 				if not product.image:
@@ -232,7 +406,7 @@ class UploadProductImageView(APIView):
 
 			# Return both the created ProductImage and the updated Product so the admin UI can refresh immediately
 			image_serializer = ProductImageSerializer(product_image, context={"request": request})
-			product_serializer = ProductSerializer(product, context={"request": request})
+			product_serializer = AdminProductSerializer(product, context={"request": request})
 			return Response({
 				"image": image_serializer.data,
 				"product": product_serializer.data,
@@ -257,17 +431,13 @@ class DeleteProductImageView(APIView):
 		except Exception:
 			product = None
 
-		# Delete the image file and the model
-		if product_image.image:
-			try:
-				product_image.image.delete(save=False)
-			except Exception:
-				logger.exception("Failed to delete image file from storage")
-
+		# The file and its derivatives are released in the background once unreferenced
 		product_image.delete()
 
-		# If the product's main image pointed to this file, clear it
-		if product and product.image and getattr(product.image, 'name', None) == getattr(product_image.image, 'name', None):
+		# If the product's main image pointed to this file, clear it (unless another
+		# gallery image of the product is the same deduplicated file)
+		if product and product.image and getattr(product.image, 'name', None) == getattr(product_image.image, 'name', None) \
+				and not ProductImage.objects.filter(product=product, image=product.image.name).exists():
 			product.image = None
 			product.save()
 
@@ -0,0 +1,89 @@
+"""Conditional GET support (ETag / Last-Modified) for DRF read views.
+
+Validators are computed from cheap aggregates before anything is serialized:
+`MAX(updated_at)` and `COUNT(*)` over the filtered queryset for lists, and the
+row's `updated_at` for detail views. A request whose `If-None-Match` or
+`If-Modified-Since` header still matches gets a 304 with no body.
+"""
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+def _latest(values):
+    values = [v for v in values if v is not None]
+    return max(values) if values else None
+
+
+def make_validators(parts, last_modified):
+    """Build a weak ETag from `parts` and an integer Last-Modified timestamp."""
+    digest = hashlib.md5("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    return f'W/"{digest}"', timestamp
+
+
+def not_modified(request, etag, last_modified):
+    """Return a 304 response if the request's validators match, else None."""
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if etag:
+        response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """Answer conditional GETs on `list` and `retrieve` before serialization.
+
+    `validator_fields` are the timestamp fields aggregated with MAX for lists
+    and read from the instance for detail views; related fields use the usual
+    `__` / `.` paths (e.g. `category__updated_at`). Override
+    `get_validator_extra` to mix other state into the ETag.
+    """
+    validator_fields = ("updated_at",)
+
+    def get_validator_extra(self):
+        return ""
+
+    def get_validator_queryset(self):
+        return self.filter_queryset(self.get_queryset())
+
+    def get_list_validators(self):
+        queryset = self.get_validator_queryset().order_by()
+        aggregates = {f"v{i}": Max(field) for i, field in enumerate(self.validator_fields)}
+        row = queryset.aggregate(validator_count=Count("pk"), **aggregates)
+        latest = _latest(row[f"v{i}"] for i in range(len(self.validator_fields)))
+        parts = [latest.isoformat() if latest else "", row["validator_count"], self.get_validator_extra()]
+        return make_validators(parts, latest)
+
+    def get_object_validators(self, instance):
+        values = []
+        for field in self.validator_fields:
+            value = instance
+            for attr in field.split("__"):
+                value = getattr(value, attr, None) if value is not None else None
+            values.append(value)
+        latest = _latest(values)
+        parts = [instance.pk, latest.isoformat() if latest else "", self.get_validator_extra()]
+        return make_validators(parts, latest)
+
+    def list(self, request, *args, **kwargs):
+        etag, last_modified = self.get_list_validators()
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        etag, last_modified = self.get_object_validators(instance)
+        response = not_modified(request, etag, last_modified)
+        if response is None:
+            response = Response(self.get_serializer(instance).data)
+        return set_validators(response, etag, last_modified)
@@ -0,0 +1,319 @@
+"""Precompiled read-only serialization for hot read paths.
+
+DRF rebuilds and walks its field machinery for every serializer instance and
+every row. `compile_serializer()` inspects a serializer class once, turns each
+readable field into a small (name, getter, converter) step and caches the
+result per class; `serialize()` then converts model instances or `.values()`
+rows into plain dicts/lists.
+
+The output is identical to `SerializerClass(instance, context=...).data`:
+ * common scalar fields (CharField, IntegerField, BooleanField, ...) use an
+   inlined conversion,
+ * FileField / ImageField reproduce DRF's URL building with the request,
+ * everything else reuses the field's own `get_attribute()` /
+   `to_representation()`,
+ * SerializerMethodField and `finalize_representation()` are called on a
+   serializer instance that carries the request context.
+
+A serializer that customizes `to_representation` must do it through
+`FastRepresentationMixin.finalize_representation` so both paths run the same
+code; anything else is rejected when compiling.
+"""
+import re
+from collections.abc import Mapping
+from operator import attrgetter
+
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+from rest_framework.fields import SkipField, empty, is_simple_callable
+from rest_framework.relations import PKOnlyObject
+from rest_framework.settings import api_settings
+
+_PLANS = {}
+
+# Characters iri_to_uri() leaves untouched; URLs made only of these need no re-quoting
+_URI_SAFE = re.compile(r"^[A-Za-z0-9_.\-~/#%\[\]=:;$&()+,!?*@']*$")
+
+_STR_FIELDS = (serializers.CharField, serializers.SlugField, serializers.EmailField, serializers.URLField)
+
+
+class FastRepresentationMixin:
+    """Route representation post-processing through `finalize_representation`.
+
+    Keeps DRF's regular `to_representation` and the compiled fast path in sync.
+    """
+
+    def to_representation(self, instance):
+        ret = super().to_representation(instance)
+        return self.finalize_representation(ret, instance)
+
+    def finalize_representation(self, ret, instance):
+        return ret
+
+
+def _check_compilable(serializer_class):
+    impl = serializer_class.to_representation
+    if impl not in (serializers.Serializer.to_representation, FastRepresentationMixin.to_representation):
+        raise ImproperlyConfigured(
+            f"{serializer_class.__name__} overrides to_representation(); move the logic into "
+            "finalize_representation() (FastRepresentationMixin) to use the fast path."
+        )
+
+
+def _bool(value):
+    if value in serializers.BooleanField.TRUE_VALUES:
+        return True
+    if value in serializers.BooleanField.FALSE_VALUES:
+        return False
+    return bool(value)
+
+
+def _needs_urljoin(path):
+    """True if urljoin() would rewrite the path (dot segments or empty segments)."""
+    return path in (".", "..") or path.startswith(("./", "../")) or "/./" in path or "/../" in path \
+        or path.endswith(("/.", "/..")) or "//" in path
+
+
+def _file_url(use_url):
+    def convert(value, runner):
+        if not value:
+            return None
+        if use_url:
+            try:
+                url = runner.storage_url(value)
+            except AttributeError:
+                return None
+            request = runner.context.get("request", None)
+            if request is not None:
+                return runner.absolute_uri(request, url)
+            return url
+        return value.name
+    return convert
+
+
+def _model_attribute_is_plain(model, attr):
+    """True if `attr` is a concrete column (or forward FK) that can never raise or be callable."""
+    if model is None:
+        return False
+    try:
+        model_field = model._meta.get_field(attr)
+    except Exception:
+        return False
+    return getattr(model_field, "concrete", False) and not model_field.many_to_many
+
+
+def _field_getters(field, attrs, model):
+    """Return (object getter, mapping getter) equivalent to `Field.get_attribute`."""
+    if len(attrs) != 1 or isinstance(field, serializers.RelatedField):
+        return field.get_attribute, field.get_attribute
+    attr = attrs[0]
+
+    def handle_missing():
+        if field.default is not empty:
+            return field.get_default()
+        if field.allow_null:
+            return None
+        if not field.required:
+            raise SkipField()
+        return empty
+
+    def map_get(instance):
+        try:
+            return instance[attr]
+        except KeyError:
+            value = handle_missing()
+            if value is empty:
+                raise
+            return value
+
+    if _model_attribute_is_plain(model, attr):
+        return attrgetter(attr), map_get
+
+    def obj_get(instance):
+        try:
+            value = getattr(instance, attr)
+        except ObjectDoesNotExist:
+            return None
+        except AttributeError:
+            value = handle_missing()
+            if value is empty:
+                raise
+            return value
+        if is_simple_callable(value):
+            value = value()
+        return value
+
+    return obj_get, map_get
+
+
+class _Plan:
+    def __init__(self, serializer_class):
+        _check_compilable(serializer_class)
+        self.serializer_class = serializer_class
+        self.has_finalize = issubclass(serializer_class, FastRepresentationMixin)
+        meta = getattr(serializer_class, "Meta", None)
+        self.model = getattr(meta, "model", None)
+        prototype = serializer_class()
+        self.obj_steps = []
+        self.map_steps = []
+        for field in prototype._readable_fields:
+            name, obj_get, map_get, convert = self._compile_field(field)
+            self.obj_steps.append((name, obj_get, convert))
+            self.map_steps.append((name, map_get, convert))
+
+    def _compile_field(self, field):
+        name = field.field_name
+
+        if isinstance(field, serializers.SerializerMethodField):
+            method_name = field.method_name
+            serializer_class = self.serializer_class
+
+            def method(instance, runner):
+                return getattr(runner.serializer_for(serializer_class), method_name)(instance)
+            return name, None, None, method
+
+        obj_get, map_get = _field_getters(field, field.source_attrs, self.model)
+
+        if isinstance(field, serializers.ListSerializer):
+            child = compile_serializer(type(field.child))
+
+            def convert(value, runner):
+                if isinstance(value, models.manager.BaseManager):
+                    value = value.all()
+                return [child.run(item, runner) for item in value]
+        elif isinstance(field, serializers.BaseSerializer):
+            child = compile_serializer(type(field))
+            convert = child.run
+        elif isinstance(field, serializers.FileField):
+            convert = _file_url(getattr(field, "use_url", api_settings.UPLOADED_FILES_USE_URL))
+        elif type(field) in _STR_FIELDS:
+            convert = lambda value, runner: str(value)  # noqa: E731
+        elif type(field) is serializers.IntegerField:
+            convert = lambda value, runner: int(value)  # noqa: E731
+        elif type(field) is serializers.BooleanField:
+            convert = lambda value, runner: _bool(value)  # noqa: E731
+        elif type(field) is serializers.ReadOnlyField:
+            convert = lambda value, runner: value  # noqa: E731
+        else:
+            to_representation = field.to_representation
+            convert = lambda value, runner: to_representation(value)  # noqa: E731
+        return name, obj_get, map_get, convert
+
+    def run(self, instance, runner):
+        ret = {}
+        steps = self.map_steps if isinstance(instance, Mapping) else self.obj_steps
+        for name, getter, convert in steps:
+            if getter is None:
+                ret[name] = convert(instance, runner)
+                continue
+            try:
+                value = getter(instance)
+            except SkipField:
+                continue
+            if value is None or (type(value) is PKOnlyObject and value.pk is None):
+                ret[name] = None
+            else:
+                ret[name] = convert(value, runner)
+        if self.has_finalize:
+            ret = runner.serializer_for(self.serializer_class).finalize_representation(ret, instance)
+        return ret
+
+
+class _Runner:
+    """Per-call state shared by every row of one `serialize()` call.
+
+    Holds the context, serializer instances for method fields, and the
+    per-storage / per-request URL prefixes so file URLs are built by string
+    concatenation instead of `urljoin` + `build_absolute_uri` for every row.
+    """
+
+    def __init__(self, context):
+        self.context = context or {}
+        self._serializers = {}
+        self._storage_base_urls = {}
+        self._scheme_host = {}
+
+    def serializer_for(self, serializer_class):
+        serializer = self._serializers.get(serializer_class)
+        if serializer is None:
+            serializer = self._serializers[serializer_class] = serializer_class(context=self.context)
+        return serializer
+
+    def storage_url(self, value):
+        """`value.url`, skipping urljoin for FileSystemStorage when the result is identical."""
+        storage = value.storage
+        key = id(storage)
+        base_url = self._storage_base_urls.get(key, empty)
+        if base_url is empty:
+            base_url = None
+            if getattr(storage.url, "__func__", None) is FileSystemStorage.url:
+                candidate = storage.base_url
+                if candidate and candidate.startswith("/") and candidate.endswith("/") and not candidate.startswith("//"):
+                    base_url = candidate
+            self._storage_base_urls[key] = base_url
+        name = value.name
+        if base_url is None or name is None:
+            return value.url
+        path = filepath_to_uri(name).lstrip("/")
+        if _needs_urljoin(path):
+            return value.url
+        return base_url + path
+
+    def absolute_uri(self, request, url):
+        """`request.build_absolute_uri(url)` for the common absolute-path case."""
+        if not url.startswith("/") or url.startswith("//") or "/./" in url or "/../" in url or not _URI_SAFE.match(url):
+            return request.build_absolute_uri(url)
+        prefix = self._scheme_host.get(id(request))
+        if prefix is None:
+            prefix = self._scheme_host[id(request)] = request.build_absolute_uri("/")[:-1]
+        return prefix + url
+
+
+def compile_serializer(serializer_class):
+    """Return the cached compiled plan for a serializer class."""
+    plan = _PLANS.get(serializer_class)
+    if plan is None:
+        plan = _PLANS[serializer_class] = _Plan(serializer_class)
+    return plan
+
+
+def serialize(serializer_class, instance, many=False, context=None):
+    """Fast equivalent of `serializer_class(instance, many=many, context=context).data`."""
+    plan = compile_serializer(serializer_class)
+    runner = _Runner(context)
+    if many:
+        if isinstance(instance, models.manager.BaseManager):
+            instance = instance.all()
+        return [plan.run(item, runner) for item in instance]
+    return plan.run(instance, runner)
+
+
+class FastSerializer:
+    """Read-only stand-in for a serializer instance whose `.data` uses the compiled plan."""
+
+    def __init__(self, serializer_class, instance, many=False, context=None):
+        self.serializer_class = serializer_class
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @property
+    def data(self):
+        return serialize(self.serializer_class, self.instance, many=self.many, context=self.context)
+
+
+class FastReadSerializerMixin:
+    """Generic-view mixin serializing safe-method responses with the compiled plan."""
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method in ("GET", "HEAD", "OPTIONS") and args and "data" not in kwargs:
+            return FastSerializer(
+                self.get_serializer_class(),
+                args[0],
+                many=kwargs.get("many", False),
+                context=self.get_serializer_context(),
+            )
+        return super().get_serializer(*args, **kwargs)
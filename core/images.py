@@ -0,0 +1,151 @@
+"""Responsive image derivatives for uploaded product and blog images.
+
+`generate_derivatives()` resizes an uploaded original with Pillow into every
+configured width and format and stores the results next to it under a
+`derivatives/` folder. The returned mapping is saved on the image row
+(`ProductImage.variants` / `BlogImage.variants`) and turned into `srcset`
+strings for the API by `build_srcset()`.
+
+Configured with IMAGE_DERIVATIVE_WIDTHS, IMAGE_DERIVATIVE_FORMATS and
+IMAGE_DERIVATIVE_QUALITY in settings.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WIDTHS = (320, 640, 1024, 1600)
+DEFAULT_FORMATS = ("webp", "jpeg")
+DEFAULT_QUALITY = 80
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "jpeg": "image/jpeg",
+}
+EXTENSIONS = {
+    "webp": "webp",
+    "jpeg": "jpg",
+}
+
+
+def derivative_widths():
+    return tuple(getattr(settings, "IMAGE_DERIVATIVE_WIDTHS", DEFAULT_WIDTHS))
+
+
+def derivative_formats():
+    return tuple(getattr(settings, "IMAGE_DERIVATIVE_FORMATS", DEFAULT_FORMATS))
+
+
+def derivative_dir(name):
+    """(directory, filename prefix) shared by every derivative of `name`."""
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, "derivatives").replace("\\", "/"), f"{stem}_"
+
+
+def derivative_name(name, width, fmt):
+    directory, prefix = derivative_dir(name)
+    return f"{directory}/{prefix}{width}w.{EXTENSIONS[fmt]}"
+
+
+def generate_derivatives(name, storage=None, widths=None, formats=None):
+    """Create resized copies of the image stored as `name`.
+
+    Returns `{"webp": {"320": "<storage name>", ...}, "jpeg": {...}}`. Widths
+    larger than the original are skipped, but the original width is always
+    included so every format has at least one entry. Existing derivatives are
+    overwritten.
+    """
+    from PIL import Image, ImageOps
+
+    storage = storage or default_storage
+    widths = sorted(set(widths or derivative_widths()))
+    formats = formats or derivative_formats()
+    quality = getattr(settings, "IMAGE_DERIVATIVE_QUALITY", DEFAULT_QUALITY)
+
+    with storage.open(name, "rb") as fh:
+        original = Image.open(fh)
+        original = ImageOps.exif_transpose(original)
+        original.load()
+
+    targets = [w for w in widths if w < original.width] + [original.width]
+    # Derivative names are derived from the original's name, so content-addressed
+    # storages must keep them as-is rather than renaming them by hash
+    save = getattr(storage, "save_exact", None)
+    variants = {fmt: {} for fmt in formats}
+    for width in targets:
+        if width == original.width:
+            resized = original
+        else:
+            height = max(1, round(original.height * width / original.width))
+            resized = original.resize((width, height), Image.Resampling.LANCZOS)
+        for fmt in formats:
+            image = resized
+            if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+                image = image.convert("RGB")
+            elif fmt == "webp" and image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format=fmt.upper(), quality=quality, optimize=True)
+            target = derivative_name(name, width, fmt)
+            if save is None:
+                if storage.exists(target):
+                    storage.delete(target)
+                variants[fmt][str(width)] = storage.save(target, ContentFile(buffer.getvalue()))
+            else:
+                variants[fmt][str(width)] = save(target, ContentFile(buffer.getvalue()))
+    return variants
+
+
+def variant_names(variants):
+    """Storage names of every derivative in a `variants` mapping."""
+    return [derivative for names in (variants or {}).values() for derivative in names.values()]
+
+
+def delete_derivatives(variants, storage=None):
+    storage = storage or default_storage
+    for derivative in variant_names(variants):
+        try:
+            storage.delete(derivative)
+        except Exception:
+            logger.exception("Failed to delete image derivative %s", derivative)
+
+
+def build_srcset(variants, request=None, storage=None):
+    """`{"webp": "<url> 320w, <url> 640w", ...}` for the stored variants."""
+    storage = storage or default_storage
+    srcset = {}
+    for fmt, names in (variants or {}).items():
+        entries = []
+        for width, derivative in sorted(names.items(), key=lambda item: int(item[0])):
+            url = storage.url(derivative)
+            if request is not None:
+                url = request.build_absolute_uri(url)
+            entries.append(f"{url} {width}w")
+        if entries:
+            srcset[fmt] = ", ".join(entries)
+    return srcset
+
+
+def refresh_variants(obj, field_name="image"):
+    """Regenerate derivatives for `obj.<field_name>` and save them on `obj.variants`."""
+    file = getattr(obj, field_name)
+    if not file:
+        return obj
+    # Rows sharing a deduplicated blob share its derivatives too
+    shared = (
+        type(obj)._default_manager.filter(**{field_name: file.name})
+        .exclude(pk=obj.pk).exclude(variants={})
+        .values_list("variants", flat=True).first()
+    )
+    if shared and all(file.storage.exists(n) for n in variant_names(shared)):
+        obj.variants = shared
+    else:
+        obj.variants = generate_derivatives(file.name, storage=file.storage)
+    obj.save(update_fields=["variants"])
+    return obj
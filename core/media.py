@@ -0,0 +1,290 @@
+"""Content-addressed, deduplicated media storage.
+
+`ContentAddressedStorage` (the default storage, see STORAGES in settings) names
+every saved file after the SHA-256 of its content:
+`products/images/3a/3a7f...e1.jpg`. The hash is computed while the upload is
+streamed to a temporary file next to MEDIA_ROOT, and when a blob with that
+hash already exists the temporary copy is dropped instead of written again, so
+re-uploading the same photo costs no disk space.
+
+Because rows can share a blob, files are never deleted directly. Models
+register their file fields with `track()`; when a row is deleted or its file
+replaced, the old name is handed to the job queue, and `release()` deletes the
+blob (and its image derivatives) only if no registered field references it
+any more.
+
+A save that finds its blob already on disk only commits the row pointing at
+it later, so `release()` must not delete a blob that was just (re)used: both
+sides run under a per-blob file lock (`blob_lock()`), a reused blob has its
+mtime refreshed, and blobs touched less than MEDIA_RELEASE_GRACE seconds ago
+are released again once the grace period has passed.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows; the grace period still applies
+    fcntl = None
+
+from django.conf import settings
+
+from django.core.files import File
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.files.utils import validate_file_name
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+TEMP_DIR = '.incoming'
+LOCK_DIR = '.locks'
+CHUNK_SIZE = 64 * 1024
+
+# (model, file field name) pairs whose values reference blobs, filled by track()
+REFERENCES = []
+
+_pending = threading.local()
+
+
+BLOB_NAME = re.compile(r'(^|/)([0-9a-f]{2})/\2[0-9a-f]{62}(\.[^/]*)?$')
+
+
+def is_blob_name(name):
+    return bool(name and BLOB_NAME.search(name))
+
+
+def blob_name(name, digest):
+    """Storage name of the blob with SHA-256 `digest` uploaded as `name`."""
+    directory = os.path.dirname(name)
+    extension = os.path.splitext(name)[1].lower()
+    return os.path.join(directory, digest[:2], f"{digest}{extension}").replace("\\", "/")
+
+
+@contextmanager
+def blob_lock(storage, name):
+    """Exclusive lock shared by every process saving or releasing blob `name`.
+
+    Locks are striped over 256 files under MEDIA_ROOT/.locks, so unrelated
+    blobs rarely wait on each other and no lock file is left per blob.
+    """
+    if fcntl is None or not hasattr(storage, 'path'):
+        yield
+        return
+    directory = storage.path(LOCK_DIR)
+    os.makedirs(directory, exist_ok=True)
+    stripe = hashlib.sha256(name.encode('utf-8')).hexdigest()[:2]
+    with open(os.path.join(directory, f"{stripe}.lock"), 'a') as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct content once, named by its SHA-256."""
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        validate_file_name(name, allow_relative_path=True)
+
+        if hasattr(content, 'temporary_file_path'):
+            # Large uploads already sit on disk: hash them in place and move, no copy
+            source = content.temporary_file_path()
+            digest = hashlib.sha256()
+            with open(source, 'rb') as fh:
+                for chunk in iter(lambda: fh.read(CHUNK_SIZE), b''):
+                    digest.update(chunk)
+            final = blob_name(name, digest.hexdigest())
+            with blob_lock(self, final):
+                if not self._reuse(final):
+                    self._place(source, final, move=lambda src, dst: file_move_safe(src, dst, allow_overwrite=True))
+            return final
+
+        # Hash while streaming into a temp file inside MEDIA_ROOT, then rename into place
+        temp_dir = self.path(TEMP_DIR)
+        os.makedirs(temp_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=temp_dir)
+        try:
+            digest = hashlib.sha256()
+            with os.fdopen(fd, 'wb') as out:
+                if hasattr(content, 'seek'):
+                    content.seek(0)
+                for chunk in content.chunks():
+                    if isinstance(chunk, str):
+                        chunk = chunk.encode()
+                    digest.update(chunk)
+                    out.write(chunk)
+            final = blob_name(name, digest.hexdigest())
+            with blob_lock(self, final):
+                if not self._reuse(final):
+                    self._place(temp_path, final, move=os.replace)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return final
+
+    def save_exact(self, name, content):
+        """Save under exactly `name`, replacing any existing file (used for derivatives)."""
+        if self.exists(name):
+            self.delete(name)
+        return super().save(name, content)
+
+    def _reuse(self, name):
+        """Whether blob `name` exists; if so, refresh its mtime so release() leaves it alone for a while."""
+        try:
+            os.utime(self.path(name))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def _place(self, source, name, move):
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        if self.directory_permissions_mode is not None:
+            old_umask = os.umask(0o777 & ~self.directory_permissions_mode)
+            try:
+                os.makedirs(directory, self.directory_permissions_mode, exist_ok=True)
+            finally:
+                os.umask(old_umask)
+        else:
+            os.makedirs(directory, exist_ok=True)
+        # Same content under the same name, so a concurrent identical upload is harmless
+        move(source, full_path)
+        if self.file_permissions_mode is not None:
+            os.chmod(full_path, self.file_permissions_mode)
+
+
+def track(model, field_name):
+    """Count `model.<field_name>` as a blob reference and release replaced/deleted files."""
+    REFERENCES.append((model, field_name))
+    uid = f"media-{model._meta.label}-{field_name}"
+
+    def remember_old(sender, instance, update_fields=None, **kwargs):
+        if instance.pk is None or (update_fields is not None and field_name not in update_fields):
+            return
+        old = sender._default_manager.filter(pk=instance.pk).values_list(field_name, flat=True).first()
+        new = getattr(instance, field_name)
+        if old and old != (new.name if new else new):
+            instance.__dict__.setdefault('_replaced_media', []).append(old)
+
+    def release_replaced(sender, instance, **kwargs):
+        replaced = instance.__dict__.pop('_replaced_media', None)
+        if replaced:
+            schedule_release(replaced)
+
+    def release_deleted(sender, instance, **kwargs):
+        file = getattr(instance, field_name)
+        if file:
+            schedule_release([file.name])
+
+    pre_save.connect(remember_old, sender=model, weak=False, dispatch_uid=f"{uid}-pre")
+    post_save.connect(release_replaced, sender=model, weak=False, dispatch_uid=f"{uid}-post")
+    post_delete.connect(release_deleted, sender=model, weak=False, dispatch_uid=f"{uid}-delete")
+
+
+def schedule_release(names):
+    """Queue a reference check for `names` once the current transaction commits.
+
+    Names released in the same transaction (e.g. a cascade or a bulk delete)
+    are batched into one job.
+    """
+    names = {n for n in names if n}
+    if not names:
+        return
+    pending = getattr(_pending, 'names', None)
+    if pending is None:
+        pending = _pending.names = set()
+    pending.update(names)
+    transaction.on_commit(_flush_release)
+
+
+def _flush_release():
+    from jobs.queue import enqueue
+    from jobs.tasks import release_media
+
+    # Later callbacks of the same transaction find nothing left to flush.
+    # Names left over from a rolled back transaction are flushed with the next
+    # one, which is harmless because release() re-checks references.
+    names = getattr(_pending, 'names', None)
+    _pending.names = None
+    if names:
+        enqueue(release_media, sorted(names))
+
+
+def reference_counts(names):
+    """Number of tracked rows referencing each of `names` (one query per tracked field)."""
+    counts = Counter()
+    for model, field_name in REFERENCES:
+        rows = (
+            model._default_manager.filter(**{f"{field_name}__in": names})
+            .values(field_name).annotate(n=Count('pk')).order_by()
+        )
+        for row in rows:
+            counts[row[field_name]] += row['n']
+    return counts
+
+
+def _recently_used(storage, name, now):
+    try:
+        modified = storage.get_modified_time(name)
+    except (OSError, NotImplementedError):
+        return False
+    return modified > now - timedelta(seconds=settings.MEDIA_RELEASE_GRACE)
+
+
+def release(names, storage=None):
+    """Delete the blobs in `names` that are no longer referenced. Returns the deleted names.
+
+    Blobs (re)used within the grace period are checked again by a delayed job.
+    """
+    from .images import derivative_dir
+
+    storage = storage or default_storage
+    counts = reference_counts(names)
+    now = timezone.now()
+    deleted, recent = [], []
+    for name in names:
+        if counts[name]:
+            continue
+        with blob_lock(storage, name):
+            if not storage.exists(name):
+                continue
+            if is_blob_name(name) and _recently_used(storage, name, now):
+                recent.append(name)
+                continue
+            storage.delete(name)
+        deleted.append(name)
+        logger.info(f"Released unreferenced blob {name}")
+        directory, prefix = derivative_dir(name)
+        try:
+            files = storage.listdir(directory)[1] if storage.exists(directory) else []
+        except (OSError, NotImplementedError):
+            files = []
+        for filename in files:
+            if filename.startswith(prefix):
+                storage.delete(f"{directory}/{filename}")
+    if recent:
+        _retry_release(recent)
+    return deleted
+
+
+def _retry_release(names):
+    from jobs.queue import enqueue
+    from jobs.tasks import release_media
+
+    enqueue(release_media, sorted(names), delay=settings.MEDIA_RELEASE_GRACE)
@@ -56,6 +56,9 @@ INSTALLED_APPS = [
     'orders',
     'blogs',
     'newsletter',
+    'jobs',
+    'uploads',
+    'analytics',
 ]
 
 MIDDLEWARE = [
@@ -101,6 +104,40 @@ DATABASES = {
         conn_max_age=600,
     )
 }
+# The default URL is a transaction-pooling PgBouncer, which cannot keep the
+# named cursors of QuerySet.iterator() open between statements
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = os.getenv('DB_DISABLE_SERVER_SIDE_CURSORS', 'true').lower() == 'true'
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    },
+    # Guest carts are user data, not a disposable cache: in production point this
+    # at a backend shared by every worker that does not evict early (e.g. Redis)
+    'guest_carts': {
+        'BACKEND': os.getenv('GUEST_CART_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('GUEST_CART_CACHE_LOCATION', 'guest-carts'),
+    },
+}
+
+# Versioned response cache for public catalog reads (see catalog/cache.py); 0 disables it
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.getenv('CATALOG_CACHE_TIMEOUT', '300'))
+
+# Responsive derivatives generated for uploaded product/blog images (see core/images.py)
+IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in os.getenv('IMAGE_DERIVATIVE_WIDTHS', '320,640,1024,1600').split(',') if w]
+IMAGE_DERIVATIVE_FORMATS = [f for f in os.getenv('IMAGE_DERIVATIVE_FORMATS', 'webp,jpeg').split(',') if f]
+IMAGE_DERIVATIVE_QUALITY = int(os.getenv('IMAGE_DERIVATIVE_QUALITY', '80'))
+
+# Database job queue (see jobs/queue.py); JOBS_EAGER runs jobs in-process after commit
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'false').lower() == 'true'
+JOBS_BACKOFF_BASE = int(os.getenv('JOBS_BACKOFF_BASE', '10'))
+JOBS_BACKOFF_MAX = int(os.getenv('JOBS_BACKOFF_MAX', '3600'))
 
 
 # Password validation
@@ -152,6 +189,39 @@ STATICFILES_DIRS = [BASE_DIR / 'static'] if (BASE_DIR / 'static').exists() else
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are stored once per distinct content, named by SHA-256 (see core/media.py)
+STORAGES = {
+    'default': {'BACKEND': 'core.media.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+# Blobs written or reused less than this many seconds ago are not released yet
+MEDIA_RELEASE_GRACE = int(os.getenv('MEDIA_RELEASE_GRACE', '900'))
+
+# Resumable chunked uploads (see uploads/); sizes in bytes, TTL in seconds
+UPLOAD_TEMP_DIR = os.getenv('UPLOAD_TEMP_DIR', str(MEDIA_ROOT / '.uploads'))
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', str(5 * 1024 * 1024)))
+UPLOAD_MIN_CHUNK_SIZE = 256 * 1024
+UPLOAD_MAX_CHUNK_SIZE = 64 * 1024 * 1024
+UPLOAD_MAX_SIZE = int(os.getenv('UPLOAD_MAX_SIZE', str(500 * 1024 * 1024)))
+UPLOAD_SESSION_TTL = int(os.getenv('UPLOAD_SESSION_TTL', str(24 * 3600)))
+
+# Seconds a cart item keeps its stock reserved without cart activity (see orders/stock.py)
+STOCK_HOLD_TTL = int(os.getenv('STOCK_HOLD_TTL', str(15 * 60)))
+
+# Anonymous carts kept in the cache (see orders/guest.py); TTL in seconds.
+# The alias must use a shared backend when more than one process serves requests
+GUEST_CART_CACHE_ALIAS = 'guest_carts'
+GUEST_CART_TTL = int(os.getenv('GUEST_CART_TTL', str(7 * 24 * 3600)))
+GUEST_CART_MAX_LINES = 100
+
+# Idempotency-Key handling for checkout and cart changes (see orders/idempotency.py); seconds
+IDEMPOTENCY_KEY_TTL = int(os.getenv('IDEMPOTENCY_KEY_TTL', str(24 * 3600)))
+IDEMPOTENCY_WAIT = float(os.getenv('IDEMPOTENCY_WAIT', '10'))
+IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', '60'))
+
+# Sales rollups (see analytics/sales.py) stop this many seconds short of now
+SALES_ROLLUP_LAG = int(os.getenv('SALES_ROLLUP_LAG', '120'))
+
 # REST framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
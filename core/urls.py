@@ -24,6 +24,8 @@ urlpatterns = [
     path("api/accounts/", include("accounts.urls", namespace="accounts")),
     path("api/catalog/", include("catalog.urls", namespace="catalog")),
     path("api/blogs/", include("blogs.urls", namespace="blogs")),
+    path("api/uploads/", include("uploads.urls", namespace="uploads")),
+    path("api/analytics/", include("analytics.urls", namespace="analytics")),
     path("api/", include((
         [
             path("", include("orders.urls")),
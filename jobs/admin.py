@@ -0,0 +1,19 @@
+from django.contrib import admin
+from .models import Job
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "queue", "priority", "status", "attempts", "max_attempts", "run_at", "finished_at")
+    list_filter = ("status", "queue", "name")
+    search_fields = ("name", "last_error")
+    readonly_fields = ("attempts", "locked_by", "locked_at", "last_error", "created_at", "finished_at")
+    actions = ("retry_jobs",)
+
+    @admin.action(description="Retry selected jobs now")
+    def retry_jobs(self, request, queryset):
+        from django.utils import timezone
+        updated = queryset.exclude(status=Job.RUNNING).update(
+            status=Job.QUEUED, attempts=0, run_at=timezone.now(), finished_at=None, last_error="",
+        )
+        self.message_user(request, f"{updated} job(s) queued again.")
@@ -0,0 +1,99 @@
+import os
+import signal
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connections
+
+from jobs.queue import claim_job, execute, heartbeat, requeue_stale
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background jobs from the database queue. Each thread claims one job at a time "
+        "with SELECT ... FOR UPDATE SKIP LOCKED and renews its lease while the job runs; "
+        "stop with SIGINT/SIGTERM after the current jobs finish."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", action="append", dest="queues", help="Queue to consume (repeatable, default: all queues)")
+        parser.add_argument("--concurrency", type=int, default=1, help="Jobs run in parallel by this worker")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when the queue is empty")
+        parser.add_argument("--stale-after", type=int, default=600, help="Requeue running jobs whose worker sent no heartbeat for this many seconds")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        queues = options["queues"]
+        concurrency = max(1, options["concurrency"])
+        self.poll_interval = options["poll_interval"]
+        self.burst = options["burst"]
+        self.stop = threading.Event()
+        worker_id = f"{socket.gethostname()}:{os.getpid()}"
+
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: self.stop.set())
+
+        stale_after = timedelta(seconds=max(1, options["stale_after"]))
+        # Renew leases well within the stale window so live jobs are never requeued
+        beat_interval = max(0.5, stale_after.total_seconds() / 4)
+        self._recover(stale_after)
+        connections.close_all()
+
+        self.stdout.write(f"Worker {worker_id} consuming {', '.join(queues) if queues else 'all queues'} with concurrency {concurrency}")
+        threads = [
+            threading.Thread(target=self._loop, args=(f"{worker_id}/{i}", queues), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        next_beat = time.monotonic() + beat_interval
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=0.5)
+            if time.monotonic() >= next_beat:
+                next_beat = time.monotonic() + beat_interval
+                self._beat(worker_id, stale_after)
+        connections.close_all()
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id} stopped."))
+
+    def _recover(self, stale_after):
+        requeued, failed = requeue_stale(stale_after)
+        if requeued or failed:
+            self.stdout.write(f"Recovered stale jobs: {requeued} requeued, {failed} failed.")
+
+    def _beat(self, worker_id, stale_after):
+        close_old_connections()
+        try:
+            heartbeat(worker_id)
+            # Also pick up jobs of workers that died while this one is running
+            self._recover(stale_after)
+        except DatabaseError as exc:
+            self.stderr.write(f"{worker_id} could not renew its job leases: {exc}")
+            connections.close_all()
+
+    def _loop(self, worker_id, queues):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                try:
+                    job = claim_job(worker_id, queues)
+                except DatabaseError as exc:
+                    # Lost connection or lock timeout: keep the thread alive and retry
+                    self.stderr.write(f"{worker_id} could not claim a job: {exc}")
+                    connections.close_all()
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if job is None:
+                    if self.burst:
+                        return
+                    self.stop.wait(self.poll_interval)
+                    continue
+                if execute(job):
+                    self.stdout.write(f"{worker_id} finished {job.name} #{job.pk}")
+                else:
+                    self.stderr.write(f"{worker_id} failed {job.name} #{job.pk} (attempt {job.attempts}/{job.max_attempts})")
+        finally:
+            connections.close_all()
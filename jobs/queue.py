@@ -0,0 +1,237 @@
+"""Database-backed job queue.
+
+Slow work (image resizing, PDF rendering, storage cleanup) is registered with
+`@task` and queued with `enqueue()`; `manage.py run_worker` claims and runs it.
+The queue lives in the `jobs_job` table, so no broker is needed, and a job
+enqueued inside a transaction only becomes visible if that transaction commits.
+
+Workers claim jobs with `SELECT ... FOR UPDATE SKIP LOCKED` where the database
+supports it (Postgres), so concurrent workers never wait on each other's rows;
+the claim itself is a conditional UPDATE on `status='queued'`, which keeps
+databases without row locks (SQLite in development) correct as well.
+
+A claimed job is leased to its worker: the worker refreshes `locked_at` with
+`heartbeat()` while the job runs, and `requeue_stale()` only returns jobs
+whose lease was not refreshed for a while, i.e. whose worker died. Outcomes
+are only recorded while the worker still holds the lease.
+
+Failed jobs are retried with exponential backoff (JOBS_BACKOFF_BASE seconds,
+doubling per attempt, capped at JOBS_BACKOFF_MAX) until `max_attempts`.
+Set JOBS_EAGER to run jobs in-process right after the enqueuing transaction
+commits instead of waiting for a worker.
+"""
+import hashlib
+import logging
+import random
+import traceback
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+
+DEFAULT_QUEUE = 'default'
+DEFAULT_MAX_ATTEMPTS = 5
+CLAIM_CANDIDATES = 10
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    func: object
+    queue: str
+    priority: int
+    max_attempts: int
+    concurrency: int = None
+
+
+def task(func=None, *, queue=DEFAULT_QUEUE, priority=0, max_attempts=DEFAULT_MAX_ATTEMPTS, concurrency=None):
+    """Register a function as a job.
+
+    `concurrency` caps how many jobs of this task may run at once across all
+    workers. Arguments must be JSON serializable; pass ids, not model instances.
+    """
+    def register(func):
+        name = f"{func.__module__}.{func.__name__}"
+        TASKS[name] = Task(name, func, queue, priority, max_attempts, concurrency)
+        func.task_name = name
+        return func
+
+    if func is not None:
+        return register(func)
+    return register
+
+
+def _resolve(task_or_name):
+    name = getattr(task_or_name, 'task_name', task_or_name)
+    try:
+        return TASKS[name]
+    except KeyError:
+        raise LookupError(f"Unknown job task: {name}")
+
+
+def enqueue(task_or_name, *args, priority=None, queue=None, delay=None, max_attempts=None, **kwargs):
+    """Queue `task_or_name(*args, **kwargs)` and return the Job row."""
+    registered = _resolve(task_or_name)
+    run_at = timezone.now()
+    if delay:
+        run_at += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+    job = Job.objects.create(
+        name=registered.name,
+        queue=queue or registered.queue,
+        priority=registered.priority if priority is None else priority,
+        max_attempts=max_attempts or registered.max_attempts,
+        run_at=run_at,
+        args=list(args),
+        kwargs=kwargs,
+    )
+    if getattr(settings, 'JOBS_EAGER', False) and not delay:
+        transaction.on_commit(lambda: _run_eager(job.pk))
+    return job
+
+
+def _run_eager(job_id):
+    job = claim_job(job_id=job_id, worker_id='eager')
+    if job is not None:
+        execute(job)
+
+
+def backoff(attempts):
+    base = getattr(settings, 'JOBS_BACKOFF_BASE', 10)
+    cap = getattr(settings, 'JOBS_BACKOFF_MAX', 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return timedelta(seconds=delay + random.uniform(0, delay / 10))
+
+
+def _saturated_tasks():
+    limited = {name: t.concurrency for name, t in TASKS.items() if t.concurrency}
+    if not limited:
+        return []
+    running = (
+        Job.objects.filter(status=Job.RUNNING, name__in=limited)
+        .values('name').annotate(n=Count('id')).order_by()
+    )
+    return [row['name'] for row in running if row['n'] >= limited[row['name']]]
+
+
+def _lock_task(name):
+    """Serialize claims of task `name` until the transaction ends.
+
+    PostgreSQL takes a transaction-level advisory lock; SQLite already lets
+    only one transaction write at a time.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    key = int.from_bytes(hashlib.blake2b(name.encode('utf-8'), digest_size=8).digest(), 'big', signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_xact_lock(%s)', [key])
+
+
+def _below_limit(name):
+    """Whether another job of task `name` may start; call inside the claim transaction."""
+    registered = TASKS.get(name)
+    if registered is None or not registered.concurrency:
+        return True
+    _lock_task(name)
+    return Job.objects.filter(status=Job.RUNNING, name=name).count() < registered.concurrency
+
+
+def claim_job(worker_id, queues=None, job_id=None):
+    """Mark the next ready job as running for `worker_id` and return it, or None.
+
+    `queues` limits the claim to those queue names; None claims from every queue.
+    """
+    now = timezone.now()
+    if job_id is not None:
+        candidates = Job.objects.filter(pk=job_id, status=Job.QUEUED)
+    else:
+        candidates = (
+            Job.objects.filter(status=Job.QUEUED, run_at__lte=now)
+            .exclude(name__in=_saturated_tasks())
+            .order_by('-priority', 'run_at', 'id')
+        )
+        if queues:
+            candidates = candidates.filter(queue__in=queues)
+    with transaction.atomic():
+        if connection.features.has_select_for_update_skip_locked:
+            rows = list(candidates.select_for_update(skip_locked=True).values_list('pk', 'name')[:1])
+        else:
+            rows = list(candidates.values_list('pk', 'name')[:CLAIM_CANDIDATES])
+        for pk, name in rows:
+            # _saturated_tasks() was only a hint; the cap is enforced under the task's lock
+            if not _below_limit(name):
+                continue
+            claimed = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+                status=Job.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_by=worker_id,
+                locked_at=now,
+            )
+            if claimed:
+                return Job.objects.get(pk=pk)
+    return None
+
+
+def execute(job):
+    """Run a claimed job and record the outcome. Returns True on success."""
+    try:
+        registered = _resolve(job.name)
+    except LookupError as exc:
+        _finish(job, Job.FAILED, str(exc))
+        return False
+    try:
+        registered.func(*job.args, **job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            retry_at = timezone.now() + backoff(job.attempts)
+            logger.warning(f"Job {job.pk} ({job.name}) failed, attempt {job.attempts}/{job.max_attempts}; retrying at {retry_at}")
+            _leased(job).update(
+                status=Job.QUEUED, run_at=retry_at, locked_by='', locked_at=None, last_error=error,
+            )
+        else:
+            logger.error(f"Job {job.pk} ({job.name}) failed permanently after {job.attempts} attempts")
+            _finish(job, Job.FAILED, error)
+        return False
+    _finish(job, Job.DONE, '')
+    return True
+
+
+def _leased(job):
+    """The job's row if `job`'s worker still holds it (it was not requeued as stale meanwhile)."""
+    return Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by)
+
+
+def _finish(job, status, error):
+    _leased(job).update(
+        status=status, finished_at=timezone.now(), locked_by='', locked_at=None, last_error=error,
+    )
+
+
+def heartbeat(worker_id):
+    """Renew the lease of every job running on `worker_id` (or its `worker_id/<n>` threads)."""
+    return (
+        Job.objects.filter(status=Job.RUNNING)
+        .filter(Q(locked_by=worker_id) | Q(locked_by__startswith=f"{worker_id}/"))
+        .update(locked_at=timezone.now())
+    )
+
+
+def requeue_stale(older_than):
+    """Return jobs whose lease was not renewed within `older_than` to the queue (or fail them if out of attempts)."""
+    cutoff = timezone.now() - older_than
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=cutoff)
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=timezone.now(), locked_by='', locked_at=None,
+        last_error='Worker stopped while running the job',
+    )
+    requeued = stale.update(status=Job.QUEUED, run_at=timezone.now(), locked_by='', locked_at=None)
+    return requeued, failed
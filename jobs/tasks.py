@@ -0,0 +1,8 @@
+from core.media import release
+from .queue import task
+
+
+@task(priority=-10, max_attempts=3)
+def release_media(names):
+    """Delete content-addressed blobs that no tracked row references any more."""
+    release(names)
@@ -0,0 +1,105 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError, close_old_connections, connections
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .queue import claim_job, enqueue, execute, heartbeat, requeue_stale, task
+
+
+@task
+def noop():
+    pass
+
+
+@task(concurrency=2)
+def capped():
+    pass
+
+
+class ClaimTests(TestCase):
+
+    def test_concurrency_cap_is_checked_inside_the_claim(self):
+        for _ in range(3):
+            enqueue(capped)
+        # A stale saturation hint (another worker claimed after it was computed) must not matter
+        with mock.patch("jobs.queue._saturated_tasks", return_value=[]):
+            claimed = [claim_job("w1/0"), claim_job("w1/1"), claim_job("w1/2")]
+        self.assertIsNotNone(claimed[0])
+        self.assertIsNotNone(claimed[1])
+        self.assertIsNone(claimed[2])
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 2)
+
+    def test_heartbeat_keeps_a_running_job_from_being_requeued(self):
+        enqueue(noop)
+        enqueue(noop)
+        live, dead = claim_job("w1/0"), claim_job("w2/0")
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(heartbeat("w1"), 1)
+        requeued, failed = requeue_stale(timedelta(minutes=10))
+
+        self.assertEqual((requeued, failed), (1, 0))
+        self.assertEqual(Job.objects.get(pk=live.pk).status, Job.RUNNING)
+        self.assertEqual(Job.objects.get(pk=dead.pk).status, Job.QUEUED)
+
+    def test_requeued_job_outcome_is_not_recorded_by_the_old_worker(self):
+        enqueue(noop)
+        first = claim_job("w1/0")
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        requeue_stale(timedelta(minutes=10))
+        second = claim_job("w2/0")
+
+        execute(first)
+
+        job = Job.objects.get(pk=first.pk)
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertEqual(job.locked_by, second.locked_by)
+
+
+class ParallelClaimTests(TransactionTestCase):
+    """Claims from several threads against the real database."""
+
+    def claim_all(self, workers, attempts=50):
+        claimed = []
+        lock = threading.Lock()
+
+        def run(worker_id):
+            try:
+                for _ in range(attempts):
+                    try:
+                        job = claim_job(worker_id)
+                    except DatabaseError:
+                        # SQLite reports a concurrent writer as "database is locked"
+                        close_old_connections()
+                        continue
+                    if job is None:
+                        return
+                    with lock:
+                        claimed.append(job.pk)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=run, args=(f"w{i}/0",)) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return claimed
+
+    def test_every_job_is_claimed_once(self):
+        ids = {enqueue(noop).pk for _ in range(20)}
+        claimed = self.claim_all(workers=4)
+        self.assertEqual(len(claimed), len(set(claimed)))
+        self.assertEqual(set(claimed), ids)
+
+    def test_concurrency_cap_holds_under_parallel_claims(self):
+        for _ in range(10):
+            enqueue(capped)
+        with mock.patch("jobs.queue._saturated_tasks", return_value=[]):
+            claimed = self.claim_all(workers=4)
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(Job.objects.filter(status=Job.RUNNING).count(), 2)
@@ -1,7 +1,8 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Cart, CartItem, Order, OrderItem
+from analytics import daily
+from .models import Cart, CartItem, IdempotencyKey, Order, OrderItem
 
 
 @admin.register(Cart)
@@ -26,13 +27,18 @@ class OrderAdmin(admin.ModelAdmin):
 
 	def mark_as_paid(self, request, queryset):
 		from django.utils import timezone
+		# Queryset updates skip the signals that maintain the daily rollups
+		days = daily.order_days(queryset)
 		updated = queryset.update(is_paid=True, paid_at=timezone.now())
+		daily.schedule_refresh(days)
 		self.message_user(request, f"Marked {updated} order(s) as paid.")
 
 	mark_as_paid.short_description = "Mark selected orders as paid"
 
 	def mark_as_unpaid(self, request, queryset):
+		days = daily.order_days(queryset)
 		updated = queryset.update(is_paid=False, paid_at=None)
+		daily.schedule_refresh(days)
 		self.message_user(request, f"Marked {updated} order(s) as unpaid.")
 
 	mark_as_unpaid.short_description = "Mark selected orders as unpaid"
@@ -49,3 +55,11 @@ class OrderItemInline(admin.TabularInline):
 	extra = 0
 
 OrderAdmin.inlines = [OrderItemInline]
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+	list_display = ("key", "user", "status", "response_status", "created_at", "expires_at")
+	list_filter = ("status",)
+	search_fields = ("key", "user__email")
+	raw_id_fields = ("user",)
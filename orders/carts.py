@@ -0,0 +1,68 @@
+"""Cart read path and mutation bookkeeping.
+
+A cart is serialized from one Prefetch of its items with their products,
+categories, discounts and images, so reading it costs a fixed number of
+queries whatever its size; totals are computed from the same rows (see
+orders/pricing.py). Every mutation increments `Cart.version`, which clients
+use to tell whether their cached copy is current and which is part of the
+cart's ETag.
+"""
+from django.db.models import F, Max, Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from core.conditional import make_validators
+from . import pricing
+from .models import Cart, CartItem
+
+
+DEFAULT_COLOR = "Default"
+COLOR_MAX_LENGTH = CartItem._meta.get_field("color").max_length
+
+
+def clean_color(value):
+    """The color of a cart line from request data; raises ValueError unless it fits CartItem.color."""
+    if value in (None, ""):
+        return DEFAULT_COLOR
+    if not isinstance(value, str) or len(value) > COLOR_MAX_LENGTH:
+        raise ValueError(f"color must be text of at most {COLOR_MAX_LENGTH} characters")
+    return value
+
+
+def items_queryset():
+    """Cart items with everything CartItemSerializer reads."""
+    return (
+        CartItem.objects.select_related("product__category", "product__discount")
+        .prefetch_related("product__images")
+        .order_by("pk")
+    )
+
+
+def load_items(cart):
+    """Prefetch `cart.items` for serialization and totals."""
+    prefetch_related_objects([cart], Prefetch("items", queryset=items_queryset()))
+    return cart
+
+
+def totals(cart):
+    """Totals of a cart whose items are prefetched, as strings like the other money fields."""
+    return {name: str(value) for name, value in pricing.cart_totals(cart.items.all()).items()}
+
+
+def line_totals(cart):
+    """Totals without loading the full items payload (products and discounts only)."""
+    items = cart.items.select_related("product", "product__discount")
+    return {name: str(value) for name, value in pricing.cart_totals(items).items()}
+
+
+def touch(cart):
+    """Record a mutation: bump the version and updated_at, and return the new version."""
+    Cart.objects.filter(pk=cart.pk).update(version=F("version") + 1, updated_at=timezone.now())
+    cart.version = Cart.objects.filter(pk=cart.pk).values_list("version", flat=True).get()
+    return cart.version
+
+
+def validators(cart):
+    """ETag / Last-Modified for a cart, from its version and its products' last change."""
+    latest = cart.items.aggregate(latest=Max("product__updated_at"))["latest"]
+    latest = max(filter(None, [latest, cart.updated_at]))
+    return make_validators([cart.pk, cart.version, latest.isoformat()], latest)
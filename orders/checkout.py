@@ -0,0 +1,78 @@
+"""Checkout as one atomic pipeline with a fixed number of queries.
+
+The cart row is locked first, so concurrent checkouts of one cart run one
+after the other and the later one finds it already checked out. The cart's
+items and their products (with discounts) are read and locked with
+one joined SELECT, stock holds are consumed (see orders/stock.py), totals are
+computed in Decimal (see orders/pricing.py), and the order, all of its items
+(one `bulk_create`) and the cart deactivation are written in the same
+transaction. Nothing in the pipeline queries per item as long as the cart's
+holds are live; an expired hold costs one conditional UPDATE per product.
+"""
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
+
+from . import pricing, stock
+from .models import Cart, Order, OrderItem
+
+
+class EmptyCart(Exception):
+    pass
+
+
+class CartClosed(Exception):
+    """The cart was checked out (or deactivated) since it was read."""
+
+
+def order_response_queryset():
+    """Relations the nested OrderSerializer reads, loaded in a fixed number of queries."""
+    return OrderItem.objects.select_related("product__category", "product__discount").prefetch_related("product__images")
+
+
+def place_order(user, cart, shipping=None, colors=None):
+    """Turn `cart` into an Order; raises CartClosed, EmptyCart or stock.OutOfStock (nothing is written then).
+
+    `colors` optionally maps cart item ids to the color to record on the order line.
+    """
+    shipping = shipping or {}
+    colors = colors or {}
+    with transaction.atomic():
+        if not Cart.objects.select_for_update().filter(pk=cart.pk, is_active=True).values_list("pk", flat=True):
+            raise CartClosed()
+        # Lock the cart item rows; products are locked by the stock UPDATEs in id order
+        items = list(
+            cart.items.select_for_update(of=("self",))
+            .select_related("product", "product__discount")
+            .order_by("pk")
+        )
+        if not items:
+            raise EmptyCart()
+        stock.consume(items)
+        totals = pricing.cart_totals(items)
+
+        order = Order.objects.create(
+            user=user,
+            cart=cart,
+            total_amount=totals["total"],
+            phone=shipping.get("phone", ""),
+            address=shipping.get("address", "") or user.email,
+            city=shipping.get("city", ""),
+            postal_code=shipping.get("postal", ""),
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(
+                order=order,
+                product=item.product,
+                quantity=item.quantity,
+                price=pricing.unit_price(item.product),
+                color=colors.get(item.id, item.color),
+            )
+            for item in items
+        ])
+        Cart.objects.filter(pk=cart.pk).update(is_active=False, updated_at=timezone.now())
+        cart.is_active = False
+
+    order.user = user
+    prefetch_related_objects([order], Prefetch("items", queryset=order_response_queryset()))
+    return order
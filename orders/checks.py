@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Backends that keep entries inside one process (or not at all)
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_guest_cart_cache(app_configs, **kwargs):
+    """Guest carts live only in their cache, so it must be shared by every worker process."""
+    if settings.DEBUG:
+        return []
+    alias = settings.GUEST_CART_CACHE_ALIAS
+    backend = settings.CACHES.get(alias, {}).get("BACKEND", "")
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"Guest carts are stored in the '{alias}' cache, which uses {backend.rsplit('.', 1)[-1]}.",
+            hint=(
+                "Each worker process then sees only the guest carts it wrote itself. Set "
+                "GUEST_CART_CACHE_BACKEND / GUEST_CART_CACHE_LOCATION to a shared cache such as Redis."
+            ),
+            id="orders.W001",
+        )
+    ]
@@ -0,0 +1,64 @@
+"""Order export rows for core.exports.
+
+NDJSON gets one object per order with its items nested; CSV gets one line per
+order item with the order columns repeated (orders without items get one line
+with empty item columns).
+"""
+from django.contrib.auth import get_user_model
+
+from core.exports import DEFAULT_CHUNK_SIZE, keyset_pages
+from .filters import filter_orders
+from .models import Order, OrderItem
+
+ORDER_COLUMNS = (
+    "id", "user_id", "username", "email", "status", "total_amount", "is_paid", "paid_at",
+    "phone", "address", "city", "postal_code", "created_at", "updated_at",
+)
+ITEM_COLUMNS = ("product_id", "sku", "product_name", "quantity", "price", "color")
+ORDER_ITEM_COLUMNS = ORDER_COLUMNS + ITEM_COLUMNS
+
+_ORDER_VALUES = tuple(c for c in ORDER_COLUMNS if c not in ("username", "email"))
+
+
+def order_rows(queryset=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield one dict per order (newest first) with an `items` list."""
+    queryset = Order.objects.all() if queryset is None else queryset
+    for chunk in keyset_pages(queryset.values(*_ORDER_VALUES), ("-created_at", "-id"), chunk_size):
+        order_ids = [r["id"] for r in chunk]
+        users = {
+            u["id"]: u
+            for u in get_user_model().objects.filter(id__in={r["user_id"] for r in chunk}).values("id", "username", "email")
+        }
+        items = {}
+        for item in (
+            OrderItem.objects.filter(order_id__in=order_ids)
+            .order_by("order_id", "id")
+            .values("order_id", "product_id", "product__sku", "product__name", "quantity", "price", "color")
+        ):
+            items.setdefault(item.pop("order_id"), []).append({
+                "product_id": item["product_id"],
+                "sku": item["product__sku"],
+                "product_name": item["product__name"],
+                "quantity": item["quantity"],
+                "price": item["price"],
+                "color": item["color"],
+            })
+        for row in chunk:
+            user = users.get(row["user_id"], {})
+            row["username"] = user.get("username")
+            row["email"] = user.get("email")
+            row["items"] = items.get(row["id"], [])
+            yield row
+
+
+def order_item_rows(orders):
+    """Flatten `order_rows()` output to one row per item for CSV."""
+    for order in orders:
+        items = order.pop("items")
+        for item in items or [{}]:
+            yield {**order, **item}
+
+
+def export_queryset(params):
+    """Orders selected by the admin list filters (see orders.filters.filter_orders)."""
+    return filter_orders(Order.objects.all(), params)
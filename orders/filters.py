@@ -0,0 +1,64 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from catalog.filters import FALSE_VALUES, TRUE_VALUES
+from .models import Order
+
+
+def _parse_day(params, name):
+    try:
+        day = parse_date(params[name])
+    except ValueError:
+        day = None
+    if day is None:
+        raise serializers.ValidationError({name: "Expected a date (YYYY-MM-DD)."})
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _parse_bool(params, name):
+    value = params[name].lower()
+    if value in TRUE_VALUES:
+        return True
+    if value in FALSE_VALUES:
+        return False
+    raise serializers.ValidationError({name: "Expected true or false."})
+
+
+def filter_orders(queryset, params):
+    """Apply the admin order filters in `params` to `queryset`.
+
+      * `status` - one or more statuses, comma separated
+      * `is_paid` - true / false
+      * `created_after` / `created_before` - dates (YYYY-MM-DD), inclusive
+      * `email` - the customer's email address (case-insensitive, exact)
+
+    Dates become `created_at` ranges rather than `__date` lookups so the
+    (status, created_at) and (user, created_at) indexes stay usable.
+    """
+    if params.get("status"):
+        statuses = [s.strip() for s in params["status"].split(",") if s.strip()]
+        valid = {choice for choice, _ in Order.STATUS_CHOICES}
+        unknown = [s for s in statuses if s not in valid]
+        if unknown:
+            raise serializers.ValidationError({"status": f"Unknown status: {', '.join(unknown)}"})
+        queryset = queryset.filter(status__in=statuses)
+    if params.get("is_paid"):
+        queryset = queryset.filter(is_paid=_parse_bool(params, "is_paid"))
+    if params.get("created_after"):
+        queryset = queryset.filter(created_at__gte=_parse_day(params, "created_after"))
+    if params.get("created_before"):
+        queryset = queryset.filter(created_at__lt=_parse_day(params, "created_before") + timedelta(days=1))
+    if params.get("email"):
+        queryset = queryset.filter(user__email__iexact=params["email"].strip())
+    return queryset
+
+
+class AdminOrderFilter(BaseFilterBackend):
+    """Admin order list filters; see `filter_orders`."""
+
+    def filter_queryset(self, request, queryset, view):
+        return filter_orders(queryset, request.query_params)
@@ -0,0 +1,185 @@
+"""Guest carts kept in the cache instead of the database.
+
+An anonymous visitor's cart lives under one cache key for GUEST_CART_TTL
+seconds (refreshed on every change) and is identified by a signed token the
+client sends back in the `X-Cart-Token` header or a `cart_token` field. The
+token only carries a random id, and the signature stops clients from guessing
+other carts' keys. Guest carts do not reserve stock, so an abandoned one costs
+nothing beyond the cache entry expiring.
+
+When the visitor logs in, `merge()` moves the lines into the user's Cart:
+existing rows are read with one query, stock is reserved per product (see
+orders/stock.py) and all rows are written with one upsert.
+"""
+import logging
+import uuid
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import caches
+from django.db import transaction
+
+from catalog.models import Product
+from . import carts, pricing, stock
+from .models import Cart, CartItem
+
+logger = logging.getLogger(__name__)
+
+SALT = "orders.guest-cart"
+KEY = "guest-cart:{}"
+HEADER = "HTTP_X_CART_TOKEN"
+
+
+class GuestCartFull(Exception):
+    pass
+
+
+def get_cache():
+    return caches[settings.GUEST_CART_CACHE_ALIAS]
+
+
+def new_token():
+    return signing.dumps(uuid.uuid4().hex, salt=SALT)
+
+
+def cache_key(token):
+    """Cache key for a token, or None if the token is missing or was not issued by us."""
+    if not token:
+        return None
+    try:
+        return KEY.format(signing.loads(token, salt=SALT))
+    except signing.BadSignature:
+        return None
+
+
+def request_token(request):
+    token = request.META.get(HEADER)
+    if not token and hasattr(request, "data"):
+        try:
+            token = request.data.get("cart_token")
+        except AttributeError:
+            token = None
+    return token
+
+
+def _line_key(product_id, color):
+    return f"{product_id}:{color}"
+
+
+def _split_key(key):
+    product_id, color = key.split(":", 1)
+    return int(product_id), color
+
+
+def load(token):
+    """`{"lines": {"<product_id>:<color>": quantity}, "version": n}`; empty for unknown tokens."""
+    key = cache_key(token)
+    data = get_cache().get(key) if key else None
+    return data or {"lines": {}, "version": 0}
+
+
+def save(token, data):
+    data["version"] += 1
+    get_cache().set(cache_key(token), data, timeout=settings.GUEST_CART_TTL)
+    return data
+
+
+def add(token, product_id, quantity, color):
+    data = load(token)
+    key = _line_key(product_id, color)
+    if key not in data["lines"] and len(data["lines"]) >= settings.GUEST_CART_MAX_LINES:
+        raise GuestCartFull()
+    data["lines"][key] = data["lines"].get(key, 0) + quantity
+    return save(token, data)
+
+
+def remove(token, product_id, color):
+    data = load(token)
+    if data["lines"].pop(_line_key(product_id, color), None) is None:
+        return None
+    return save(token, data)
+
+
+class GuestItem:
+    """A guest cart line shaped like a CartItem for pricing and serialization."""
+
+    def __init__(self, product, quantity, color):
+        self.id = _line_key(product.pk, color)
+        self.product = product
+        self.product_id = product.pk
+        self.quantity = quantity
+        self.color = color
+
+
+def items(data):
+    """Lines whose product is still on sale, with products loaded in a fixed number of queries."""
+    lines = [(*_split_key(key), quantity) for key, quantity in data["lines"].items()]
+    products = Product.objects.filter(pk__in={pid for pid, _, _ in lines}, is_active=True).select_related(
+        "category", "discount",
+    ).prefetch_related("images").in_bulk()
+    return [GuestItem(products[pid], quantity, color) for pid, color, quantity in lines if pid in products]
+
+
+def totals(guest_items):
+    return {name: str(value) for name, value in pricing.cart_totals(guest_items).items()}
+
+
+def merge(user, token):
+    """Move a guest cart into `user`'s active Cart and drop it from the cache.
+
+    Returns `{"merged": lines, "skipped": [product ids out of stock]}`, or None
+    when there was no guest cart.
+    """
+    key = cache_key(token)
+    data = get_cache().get(key) if key else None
+    if not data or not data["lines"]:
+        return None
+
+    lines = defaultdict(dict)
+    for line, quantity in data["lines"].items():
+        product_id, color = _split_key(line)
+        if len(color) > carts.COLOR_MAX_LENGTH:
+            # Added before colors were validated; it could never be stored
+            continue
+        lines[product_id][color] = quantity
+
+    skipped = []
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user, is_active=True)
+        existing = {
+            (item.product_id, item.color): item
+            for item in CartItem.objects.select_for_update().filter(cart=cart, product_id__in=lines)
+        }
+        expiry = stock.hold_expiry()
+        rows = []
+        for product_id in sorted(lines):
+            units = sum(lines[product_id].values())
+            try:
+                # One savepoint per product so a sold-out product doesn't undo the others
+                with transaction.atomic():
+                    stock.take({product_id: units})
+            except stock.OutOfStock:
+                skipped.append(product_id)
+                continue
+            for color, quantity in lines[product_id].items():
+                item = existing.get((product_id, color))
+                rows.append(CartItem(
+                    cart=cart,
+                    product_id=product_id,
+                    color=color,
+                    quantity=quantity + (item.quantity if item else 0),
+                    reserved_quantity=quantity + (item.reserved_quantity if item else 0),
+                    reserved_until=expiry,
+                ))
+        if rows:
+            CartItem.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["cart", "product", "color"],
+                update_fields=["quantity", "reserved_quantity", "reserved_until", "updated_at"],
+            )
+            carts.touch(cart)
+        transaction.on_commit(lambda: get_cache().delete(key))
+    logger.info(f"Merged guest cart into cart {cart.pk}: {len(rows)} lines, {len(skipped)} products out of stock")
+    return {"merged": len(rows), "skipped": skipped}
@@ -0,0 +1,150 @@
+"""`Idempotency-Key` support for retried POSTs (checkout, cart changes).
+
+The first request with a given key inserts an in-progress `IdempotencyKey`
+row; the unique (user, key) constraint makes exactly one concurrent request
+win. The winner runs the view and stores its response (anything below 500)
+on the row; a failure deletes the row so the client can retry with the same
+key. Other requests with the key:
+
+  * replay the stored response with `Idempotent-Replayed: true`, without
+    touching carts or orders,
+  * wait up to IDEMPOTENCY_WAIT seconds for an in-flight request to finish and
+    then replay it, or get 409 if it is still running,
+  * take over a row whose request has been in progress for longer than
+    IDEMPOTENCY_LOCK_TIMEOUT seconds (the worker died),
+  * get 422 if they reuse the key for a different request.
+
+Rows expire after IDEMPOTENCY_KEY_TTL seconds and are removed by
+`manage.py purge_idempotency_keys`.
+"""
+import functools
+import hashlib
+import json
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+POLL_INTERVAL = 0.1
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder, default=str)
+    return hashlib.sha256(f"{request.method}\n{request.path}\n{body}".encode("utf-8")).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _error(message, code):
+    return Response({"error": message}, status=code)
+
+
+def begin(user, key, request_fingerprint):
+    """Claim `key` for this request. Returns (record, None) to proceed or (None, response) to answer with."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    claim = True
+    while True:
+        now = timezone.now()
+        if claim:
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=user,
+                        key=key,
+                        fingerprint=request_fingerprint,
+                        locked_at=now,
+                        expires_at=now + timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL),
+                    )
+                return record, None
+            except IntegrityError:
+                claim = False
+
+        record = IdempotencyKey.objects.filter(user=user, key=key).first()
+        if record is None:
+            # Deleted in the meantime (failed or expired); try to claim it again
+            claim = True
+            continue
+        if record.expires_at <= now:
+            IdempotencyKey.objects.filter(pk=record.pk, expires_at__lte=now).delete()
+            claim = True
+            continue
+        if record.fingerprint != request_fingerprint:
+            return None, _error("Idempotency-Key was already used for a different request", status.HTTP_422_UNPROCESSABLE_ENTITY)
+        if record.status == IdempotencyKey.COMPLETE:
+            return None, _replay(record)
+
+        stale = now - timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+        if record.locked_at <= stale:
+            # Take over from a request that died; the conditional update lets only one retry win
+            taken = IdempotencyKey.objects.filter(
+                pk=record.pk, status=IdempotencyKey.IN_PROGRESS, locked_at=record.locked_at,
+            ).update(locked_at=now)
+            if taken:
+                record.locked_at = now
+                return record, None
+            continue
+        if time.monotonic() >= deadline:
+            response = _error("A request with this Idempotency-Key is still in progress", status.HTTP_409_CONFLICT)
+            response["Retry-After"] = "1"
+            return None, response
+        time.sleep(POLL_INTERVAL)
+
+
+def finish(record, response):
+    """Store the response of a claimed key, or release the key if the request failed."""
+    if not isinstance(response, Response) or response.status_code >= 500:
+        IdempotencyKey.objects.filter(pk=record.pk).delete()
+        return
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        status=IdempotencyKey.COMPLETE,
+        response_status=response.status_code,
+        response_body=response.data,
+    )
+
+
+def idempotent(view_method):
+    """Make an APIView handler honour the `Idempotency-Key` header for authenticated users."""
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return _error(f"Idempotency-Key must be at most {MAX_KEY_LENGTH} characters", status.HTTP_400_BAD_REQUEST)
+
+        record, response = begin(request.user, key, fingerprint(request))
+        if response is not None:
+            return response
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except BaseException:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            raise
+        finish(record, response)
+        return response
+
+    return wrapper
+
+
+def purge_expired(now=None):
+    """Delete expired keys. Returns the number deleted."""
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
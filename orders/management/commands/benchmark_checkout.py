@@ -0,0 +1,98 @@
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from catalog.models import Category, Product
+from orders.models import Cart, CartItem, Order, OrderItem
+from orders.views import AddToCartView, CheckoutView
+
+
+class Command(BaseCommand):
+    help = (
+        "Run many parallel add-to-cart + checkout flows against one SKU and check that it is "
+        "never oversold. Creates (and afterwards deletes) a throwaway product, category and users."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--buyers", type=int, default=200, help="Number of concurrent customers")
+        parser.add_argument("--stock", type=int, default=50, help="Units of the SKU on sale")
+        parser.add_argument("--quantity", type=int, default=1, help="Units each customer buys")
+        parser.add_argument("--concurrency", type=int, default=32, help="Worker threads (each with its own DB connection)")
+        parser.add_argument("--keep", action="store_true", help="Keep the benchmark data")
+
+    def handle(self, *args, **options):
+        buyers, quantity = options["buyers"], options["quantity"]
+        if buyers < 1 or quantity < 1 or options["concurrency"] < 1:
+            raise CommandError("--buyers, --quantity and --concurrency must be positive")
+        run = uuid.uuid4().hex[:8]
+        User = get_user_model()
+        category = Category.objects.create(name=f"Benchmark {run}")
+        product = Product.objects.create(
+            name=f"Benchmark {run}", sku=f"BENCH-{run}", price="10.00", stock=options["stock"], category=category,
+        )
+        User.objects.bulk_create(
+            [User(username=f"bench-{run}-{i}", email=f"bench-{run}-{i}@example.com") for i in range(buyers)]
+        )
+        users = list(User.objects.filter(username__startswith=f"bench-{run}-"))
+        factory = APIRequestFactory()
+        add_view, checkout_view = AddToCartView.as_view(), CheckoutView.as_view()
+
+        def buy(user):
+            started = time.perf_counter()
+            try:
+                request = factory.post("/api/cart/add/", {"product_id": product.pk, "quantity": quantity}, format="json")
+                force_authenticate(request, user=user)
+                response = add_view(request)
+                if response.status_code == 200:
+                    request = factory.post("/api/orders/checkout/", {}, format="json")
+                    force_authenticate(request, user=user)
+                    response = checkout_view(request)
+                return response.status_code, time.perf_counter() - started
+            except Exception as e:
+                return type(e).__name__, time.perf_counter() - started
+            finally:
+                # Each thread has its own connection; don't leave them open
+                connection.close()
+
+        if connection.vendor == "sqlite":
+            self.stderr.write("SQLite serializes all writers; expect 'database is locked' failures. Use PostgreSQL for real numbers.")
+        self.stdout.write(f"{buyers} buyers x {quantity} unit(s) against {options['stock']} in stock, {options['concurrency']} threads ({connection.vendor})")
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+            results = list(pool.map(buy, users))
+        elapsed = time.perf_counter() - started
+
+        outcomes = {}
+        for outcome, _ in results:
+            outcomes[outcome] = outcomes.get(outcome, 0) + 1
+        latencies = sorted(duration for _, duration in results)
+        product.refresh_from_db()
+        sold = OrderItem.objects.filter(product=product).aggregate(units=Sum("quantity"))["units"] or 0
+        orders = OrderItem.objects.filter(product=product).values("order").distinct().count()
+        # Flows that failed after add-to-cart still hold their units until expiry
+        held = CartItem.objects.filter(product=product).aggregate(units=Sum("reserved_quantity"))["units"] or 0
+        self.stdout.write(f"Outcomes: {', '.join(f'{k}={v}' for k, v in sorted(outcomes.items(), key=str))}")
+        self.stdout.write(
+            f"{orders} orders, {sold} units sold, {held} held, {product.stock} left; "
+            f"{len(results) / elapsed:.1f} flows/s, p50 {statistics.median(latencies) * 1000:.0f} ms, "
+            f"p95 {latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000:.0f} ms"
+        )
+        balanced = sold + held + product.stock == options["stock"]
+
+        if not options["keep"]:
+            Order.objects.filter(user__in=users).delete()
+            Cart.objects.filter(user__in=users).delete()
+            User.objects.filter(pk__in=[u.pk for u in users]).delete()
+            product.delete()
+            category.delete()
+
+        if not balanced:
+            raise CommandError(f"Stock accounting is off: {sold} sold + {held} held + {product.stock} left != {options['stock']}")
+        self.stdout.write(self.style.SUCCESS("No overselling."))
@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework import serializers
+
+from core.exports import DEFAULT_CHUNK_SIZE, FORMATS, write_export
+from orders.exports import ORDER_COLUMNS, ORDER_ITEM_COLUMNS, export_queryset, order_item_rows, order_rows
+
+
+class Command(BaseCommand):
+    help = "Export orders as CSV (one line per item) or NDJSON (items nested), streaming in chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=FORMATS, default="csv")
+        parser.add_argument("--output", help="File to write (default: stdout)")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+        parser.add_argument("--status", help="Comma separated statuses")
+        parser.add_argument("--created-after", dest="created_after", help="YYYY-MM-DD")
+        parser.add_argument("--created-before", dest="created_before", help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        params = {k: options[k] for k in ("status", "created_after", "created_before") if options[k]}
+        try:
+            queryset = export_queryset(params)
+        except serializers.ValidationError as e:
+            raise CommandError(e.detail)
+        rows = order_rows(queryset, chunk_size=options["chunk_size"])
+        columns = ORDER_COLUMNS
+        if options["format"] == "csv":
+            rows, columns = order_item_rows(rows), ORDER_ITEM_COLUMNS
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8", newline="") as fh:
+                count = write_export(options["format"], columns, rows, fh)
+            self.stderr.write(self.style.SUCCESS(f"Exported {count} rows to {options['output']}."))
+        else:
+            write_export(options["format"], columns, rows, sys.stdout)
@@ -0,0 +1,29 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Drop `include` from the model state of order_user_history_idx.
+
+    The index itself is left as 0011 built it: covering on PostgreSQL, plain on
+    backends without INCLUDE support (which therefore no longer warn, models.W040).
+    """
+
+    dependencies = [
+        ('orders', '0011_order_user_history_index'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='order',
+                    name='order_user_history_idx',
+                ),
+                migrations.AddIndex(
+                    model_name='order',
+                    index=models.Index(fields=['user', '-created_at', '-id'], name='order_user_history_idx'),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
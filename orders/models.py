@@ -1,4 +1,5 @@
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
 from catalog.models import Product
@@ -9,6 +10,8 @@ class Cart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    # Incremented on every change to the cart's items (see orders/carts.py)
+    version = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ["-created_at"]
@@ -22,11 +25,17 @@ class CartItem(models.Model):
     product = models.ForeignKey(Product, related_name="cart_items", on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
     color = models.CharField(max_length=100, default="Default")
+    # Units already taken from Product.stock for this item, until reserved_until (see orders/stock.py)
+    reserved_quantity = models.PositiveIntegerField(default=0)
+    reserved_until = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("cart", "product", "color")
+        indexes = [
+            models.Index(fields=["reserved_until"], condition=models.Q(reserved_quantity__gt=0), name="cartitem_hold_expiry_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"{self.product.name} ({self.color}) x {self.quantity}"
@@ -56,6 +65,16 @@ class Order(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # Admin list filters and keyset pagination on (created_at, id)
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+            # A customer's order history in keyset order. On PostgreSQL migration
+            # 0011 built it with INCLUDE (status, total_amount, is_paid) so the page
+            # is read from the index; other backends have the plain index
+            models.Index(fields=["user", "-created_at", "-id"], name="order_user_history_idx"),
+            # Recent orders on the dashboard and per-day rollups
+            models.Index(fields=["created_at"], name="order_created_idx"),
+        ]
 
     def __str__(self) -> str:
         return f"Order #{self.pk} - {self.user}"
@@ -70,3 +89,32 @@ class OrderItem(models.Model):
 
     def __str__(self) -> str:
         return f"{self.product.name} ({self.quantity})"
+
+
+class IdempotencyKey(models.Model):
+    """First response to a request sent with an `Idempotency-Key` header (see orders/idempotency.py)."""
+    IN_PROGRESS = "in_progress"
+    COMPLETE = "complete"
+    STATUS_CHOICES = [
+        (IN_PROGRESS, "In progress"),
+        (COMPLETE, "Complete"),
+    ]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="idempotency_keys", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    # SHA-256 of method, path and body; a key reused for another request is rejected
+    fingerprint = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=IN_PROGRESS)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    locked_at = models.DateTimeField()
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="idempotencykey_user_key_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.key} ({self.status}) for {self.user_id}"
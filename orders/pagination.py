@@ -0,0 +1,20 @@
+from rest_framework.pagination import CursorPagination
+
+
+class OrderCursorPagination(CursorPagination):
+    """Keyset pagination for the admin order list, newest first.
+
+    The cursor is on (`created_at`, `id`), matching the (status, created_at)
+    and (user, created_at, id) indexes on Order, so deep pages cost the same
+    as the first one.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class CustomerOrderCursorPagination(OrderCursorPagination):
+    """Keyset pagination for a customer's own orders; served by the (user, -created_at, -id) index."""
+    page_size = 20
+    max_page_size = 100
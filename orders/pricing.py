@@ -0,0 +1,42 @@
+"""Cart and order amounts, always in Decimal.
+
+A product sells at its active discount price when it has one, otherwise at
+its price. Delivery charges are per product: a cart pays each product's
+`delivery_charges` once, whatever the quantity or the number of colors.
+Items must be loaded with `select_related("product", "product__discount")`.
+"""
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.exceptions import ObjectDoesNotExist
+
+TWO_PLACES = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def money(value):
+    return Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+
+
+def unit_price(product):
+    try:
+        discount = product.discount
+    except ObjectDoesNotExist:
+        discount = None
+    if discount is not None and discount.is_active:
+        return discount.discount_price
+    return product.price
+
+
+def cart_totals(items):
+    """`{"subtotal", "delivery", "total"}` for cart items (or anything with product and quantity)."""
+    subtotal = ZERO
+    delivery = {}
+    for item in items:
+        subtotal += unit_price(item.product) * item.quantity
+        delivery[item.product_id] = item.product.delivery_charges
+    delivery_total = sum(delivery.values(), ZERO)
+    return {
+        "subtotal": money(subtotal),
+        "delivery": money(delivery_total),
+        "total": money(subtotal + delivery_total),
+    }
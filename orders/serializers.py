@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from . import carts
+from .transitions import MAX_BULK_TRANSITION
 from .models import Cart, CartItem, Order, OrderItem
 from catalog.serializers import ProductSerializer
 from accounts.serializers import UserSerializer
@@ -14,10 +16,14 @@ class CartItemSerializer(serializers.ModelSerializer):
 
 class CartSerializer(serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
+    totals = serializers.SerializerMethodField()
 
     class Meta:
         model = Cart
-        fields = ("id", "user", "items", "created_at", "updated_at")
+        fields = ("id", "user", "items", "totals", "version", "created_at", "updated_at")
+
+    def get_totals(self, obj):
+        return carts.totals(obj)
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -36,3 +42,41 @@ class OrderSerializer(serializers.ModelSerializer):
         model = Order
         fields = ("id", "user", "status", "total_amount", "is_paid", "paid_at", "phone", "address", "city", "postal_code", "items", "created_at")
         read_only_fields = ("paid_at",)
+
+
+class OrderItemCompactSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source="product.sku", read_only=True)
+    product_name = serializers.CharField(source="product.name", read_only=True)
+
+    class Meta:
+        model = OrderItem
+        fields = ("id", "product_id", "sku", "product_name", "quantity", "price", "color")
+
+
+class AdminOrderListSerializer(serializers.ModelSerializer):
+    """Admin order list row: the order, its customer and flat item lines without nested products."""
+    items = OrderItemCompactSerializer(many=True, read_only=True)
+    user = UserSerializer(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ("id", "user", "status", "total_amount", "is_paid", "paid_at", "city", "items", "created_at")
+
+
+class OrderStatusUpdateSerializer(serializers.Serializer):
+    """An admin PATCH of one order: a new `status` (see orders.transitions) and/or `is_paid`."""
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+    is_paid = serializers.BooleanField(required=False)
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    """A bulk status change: the target `status` and either `ids` or admin list `filter` params."""
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False, allow_empty=False, max_length=MAX_BULK_TRANSITION)
+    filter = serializers.DictField(required=False, allow_empty=False)
+    is_paid = serializers.BooleanField(required=False, allow_null=True, default=None)
+
+    def validate(self, attrs):
+        if ("ids" in attrs) == ("filter" in attrs):
+            raise serializers.ValidationError("Send either ids or filter.")
+        return attrs
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from . import stock
+from .models import CartItem
+
+
+@receiver(post_delete, sender=CartItem)
+def release_stock_hold(sender, instance, **kwargs):
+    # Removed items (and items of deleted carts) give their reserved units back
+    if instance.reserved_quantity:
+        stock.give_back({instance.product_id: instance.reserved_quantity})
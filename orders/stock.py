@@ -0,0 +1,175 @@
+"""Stock reservations ("holds") for cart items.
+
+`Product.stock` is the number of units still available to buy. Adding an item
+to a cart takes its units from stock straight away with a conditional
+`UPDATE product SET stock = stock - q WHERE id = ... AND stock >= q`, so the
+check and the decrement are one statement and concurrent buyers never read a
+stale count or wait on each other for longer than that statement's row lock.
+The units taken are recorded on the item (`reserved_quantity`) until
+`reserved_until`; any cart activity extends the holds of the whole cart.
+
+At checkout the holds are consumed (any shortfall, e.g. after a hold expired,
+is taken the same way) inside the order transaction. Holds of carts that are
+abandoned expire and are handed back by `release_expired()`, run with
+`manage.py release_stock_holds`.
+
+Admin writes of stock (product edit, bulk PATCH, CSV import) give the
+on-hand count. Units held by carts are part of that count but already
+missing from `Product.stock` and come back to it when their holds expire, so
+those paths store `available_stock()`: on-hand minus every unit still held
+(expired holds count until they are released), never below zero. Admin reads
+of stock (admin product API, export) show `on_hand_stock()` for the same
+reason, so a value read can be written back unchanged.
+
+Product rows are always updated in ascending id order so that transactions
+touching several products cannot deadlock each other.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from catalog import cache, cards
+from catalog.models import Product
+from .models import CartItem
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfStock(Exception):
+    """Raised with `{product_id: units requested}` for products that cannot cover a request."""
+
+    def __init__(self, shortages):
+        self.shortages = shortages
+        super().__init__(f"Not enough stock for products {sorted(shortages)}")
+
+
+def hold_expiry():
+    return timezone.now() + timedelta(seconds=settings.STOCK_HOLD_TTL)
+
+
+def _stock_changed(product_ids):
+    # Stock is part of the product responses: refresh the listing cards and
+    # invalidate cached responses (validators follow Product.updated_at)
+    product_ids = list(product_ids)
+    transaction.on_commit(lambda: cards.sync_stock(product_ids))
+    cache.schedule_bump(cache.PRODUCT)
+
+
+def held_units(product_ids):
+    """`{product_id: units}` held by cart items, counting expired holds not yet released."""
+    rows = (
+        CartItem.objects.filter(product_id__in=list(product_ids), reserved_quantity__gt=0)
+        .values("product_id").order_by()
+        .annotate(units=Sum("reserved_quantity"))
+    )
+    return {row["product_id"]: row["units"] for row in rows}
+
+
+def available_stock(on_hand):
+    """The `Product.stock` to store for on-hand counts `{product_id: units}`.
+
+    Call it with the products locked (select_for_update) so no hold is taken
+    or handed back between reading the holds and writing the stock.
+    """
+    held = held_units(on_hand)
+    return {pk: max(units - held.get(pk, 0), 0) for pk, units in on_hand.items()}
+
+
+def on_hand_stock(available):
+    """The on-hand counts for `Product.stock` values `{product_id: units}`: stock plus the units held."""
+    held = held_units(available)
+    return {pk: units + held.get(pk, 0) for pk, units in available.items()}
+
+
+def take(quantities):
+    """Decrement stock for `{product_id: units}`; raises OutOfStock if any product falls short.
+
+    Must run inside a transaction, which the caller rolls back on OutOfStock.
+    """
+    shortages = {}
+    for product_id in sorted(quantities):
+        units = quantities[product_id]
+        if units <= 0:
+            continue
+        taken = Product.objects.filter(pk=product_id, is_active=True, stock__gte=units).update(
+            stock=F("stock") - units, updated_at=timezone.now(),
+        )
+        if not taken:
+            shortages[product_id] = units
+    if shortages:
+        raise OutOfStock(shortages)
+    _stock_changed(quantities)
+
+
+def give_back(quantities):
+    """Return `{product_id: units}` to stock."""
+    quantities = {pk: units for pk, units in quantities.items() if units > 0}
+    for product_id in sorted(quantities):
+        Product.objects.filter(pk=product_id).update(stock=F("stock") + quantities[product_id], updated_at=timezone.now())
+    if quantities:
+        _stock_changed(quantities)
+
+
+def hold(item, quantity):
+    """Make `item` (locked by the caller) hold exactly `quantity` units and refresh the cart's holds."""
+    with transaction.atomic():
+        delta = quantity - item.reserved_quantity
+        if delta > 0:
+            take({item.product_id: delta})
+        elif delta < 0:
+            give_back({item.product_id: -delta})
+        item.reserved_quantity = quantity
+        item.reserved_until = hold_expiry()
+        CartItem.objects.filter(cart_id=item.cart_id, reserved_quantity__gt=0).exclude(pk=item.pk).update(
+            reserved_until=item.reserved_until,
+        )
+
+
+def consume(items):
+    """Turn the holds of cart `items` (locked by the caller) into sold units at checkout.
+
+    Units an item does not hold any more are taken from stock now; raises
+    OutOfStock, leaving everything to the caller's rollback, if they are gone.
+    """
+    shortfall = defaultdict(int)
+    surplus = defaultdict(int)
+    for item in items:
+        missing = item.quantity - item.reserved_quantity
+        if missing > 0:
+            shortfall[item.product_id] += missing
+        elif missing < 0:
+            surplus[item.product_id] -= missing
+    take(shortfall)
+    give_back(surplus)
+    CartItem.objects.filter(pk__in=[item.pk for item in items], reserved_quantity__gt=0).update(
+        reserved_quantity=0, reserved_until=None,
+    )
+
+
+def release_expired(now=None, batch_size=500):
+    """Hand the units of expired holds back to stock. Returns the number of holds released."""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            # Holds being consumed by a checkout right now are skipped, not waited for
+            items = list(
+                CartItem.objects.select_for_update(skip_locked=True)
+                .filter(reserved_quantity__gt=0, reserved_until__lte=now)
+                .order_by("pk")
+                .values_list("pk", "product_id", "reserved_quantity")[:batch_size]
+            )
+            if not items:
+                return released
+            quantities = defaultdict(int)
+            for _, product_id, units in items:
+                quantities[product_id] += units
+            CartItem.objects.filter(pk__in=[pk for pk, _, _ in items]).update(reserved_quantity=0, reserved_until=None)
+            give_back(quantities)
+        released += len(items)
+        logger.info(f"Released {len(items)} expired stock holds")
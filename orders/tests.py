@@ -1,3 +1,465 @@
-from django.test import TestCase
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import DatabaseError, close_old_connections, connections, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from rest_framework.views import APIView
+
+from catalog.models import Category, Product
+from . import idempotency, stock
+from .checkout import CartClosed, place_order
+from .exports import order_rows
+from .models import Cart, CartItem, IdempotencyKey, Order
+
+
+class StockValidatorTests(APITestCase):
+    """Taking stock into a cart must change the product's and the cart's validators."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=3, category=category)
+        self.client.force_authenticate(self.user)
+
+    def add_to_cart(self, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": quantity}, format="json")
+        self.assertIn(response.status_code, (200, 201))
+        return response
+
+    def test_product_detail_reports_new_stock(self):
+        url = f"/api/catalog/products/{self.product.pk}/"
+        first = self.client.get(url)
+        self.assertEqual(first.data["stock"], 3)
+
+        self.add_to_cart(2)
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["stock"], 1)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+    def test_cart_etag_changes_when_stock_moves(self):
+        self.add_to_cart(1)
+        first = self.client.get("/api/cart/")
+        self.assertEqual(self.client.get("/api/cart/", HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+        # Another buyer takes stock of the same product
+        other = get_user_model().objects.create_user("other", "other@example.com")
+        self.client.force_authenticate(other)
+        self.add_to_cart(1)
+        self.client.force_authenticate(self.user)
+
+        response = self.client.get("/api/cart/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+
+
+class OnHandStockTests(APITestCase):
+    """Admin stock writes are on-hand counts; cart holds must not be counted twice."""
+
+    def setUp(self):
+        self.admin = get_user_model().objects.create_superuser("admin", "admin@example.com")
+        self.buyer = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=10, category=category)
+
+    def test_bulk_stock_subtracts_holds_until_they_are_released(self):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 2}, format="json")
+        self.assertIn(response.status_code, (200, 201))
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.patch(
+            "/api/catalog/admin/products/bulk/", [{"id": self.product.pk, "stock": 5}], format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+        stock.release_expired(now=timezone.now() + timedelta(days=1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+    def hold(self, quantity):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": quantity}, format="json")
+        self.assertIn(response.status_code, (200, 201))
+        self.client.force_authenticate(self.admin)
+
+    def assert_stock_after_release(self, expected):
+        stock.release_expired(now=timezone.now() + timedelta(days=1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, expected)
+
+    def test_admin_stock_read_can_be_written_back(self):
+        self.hold(3)
+        url = f"/api/catalog/admin/products/{self.product.pk}/"
+        self.assertEqual(self.client.get(url).data["stock"], 10)
+        self.assertEqual(self.client.get("/api/catalog/admin/products/").data[0]["stock"], 10)
+
+        response = self.client.patch(url, {"stock": 10}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["stock"], 10)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        self.assert_stock_after_release(10)
+
+    def test_export_can_be_imported_back(self):
+        self.hold(3)
+        export = self.client.get("/api/catalog/admin/products/export/", {"as": "csv"})
+        self.assertEqual(export.status_code, 200)
+        body = b"".join(export.streaming_content)
+        self.assertIn(b",10,", body)
+
+        upload = SimpleUploadedFile("products.csv", body, content_type="text/csv")
+        response = self.client.post("/api/catalog/admin/products/import/", {"file": upload})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["failed"], 0)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 7)
+        self.assert_stock_after_release(10)
+
+
+class CartColorTests(APITestCase):
+
+    def setUp(self):
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=5, category=category)
+
+    def test_guest_cart_rejects_colors_that_cannot_be_stored(self):
+        for color in ("x" * 101, ["red"], 7):
+            response = self.client.post(
+                "/api/cart/guest/add/", {"product_id": self.product.pk, "color": color}, format="json",
+            )
+            self.assertEqual(response.status_code, 400, color)
+
+    def test_cart_rejects_colors_that_cannot_be_stored(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("buyer", "buyer@example.com"))
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "color": "x" * 101}, format="json")
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "color": "x" * 100}, format="json")
+        self.assertIn(response.status_code, (200, 201))
+
+
+class CheckoutTests(APITestCase):
+    """A cart read before another checkout of it committed must not be checked out again."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        category = Category.objects.create(name="Shoes")
+        self.product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=5, category=category)
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/api/cart/add/", {"product_id": self.product.pk, "quantity": 2}, format="json")
+        self.assertIn(response.status_code, (200, 201))
+        self.cart = Cart.objects.get(user=self.user, is_active=True)
+
+    def test_stale_cart_is_not_checked_out_again(self):
+        stale = Cart.objects.get(pk=self.cart.pk)
+        place_order(self.user, self.cart)
+
+        with self.assertRaises(CartClosed):
+            place_order(self.user, stale)
+        self.assertEqual(Order.objects.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 3)
+
+    def test_checkout_of_a_closed_cart_is_a_conflict(self):
+        stale = Cart.objects.get(pk=self.cart.pk)
+        self.assertEqual(self.client.post("/api/orders/checkout/", {}, format="json").status_code, 201)
+
+        with mock.patch("orders.views.get_object_or_404", return_value=stale):
+            response = self.client.post("/api/orders/checkout/", {}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class AdminOrderStatusTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_superuser("admin", "admin@example.com"))
+        self.user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+
+    def order(self, status, **fields):
+        return Order.objects.create(user=self.user, total_amount=10, status=status, **fields)
+
+    def test_patch_follows_the_allowed_transitions(self):
+        order = self.order("delivered", is_paid=True)
+        response = self.client.patch(f"/api/admin/orders/{order.pk}/", {"status": "pending"}, format="json")
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["allowed"], [])
+        order.refresh_from_db()
+        self.assertEqual(order.status, "delivered")
+
+        self.assertEqual(self.client.patch(f"/api/admin/orders/{order.pk}/", {"status": "lost"}, format="json").status_code, 400)
+
+    def test_patch_to_delivered_marks_the_order_paid(self):
+        order = self.order("shipped")
+        response = self.client.patch(f"/api/admin/orders/{order.pk}/", {"status": "delivered"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data["status"], response.data["is_paid"]), ("delivered", True))
+        order.refresh_from_db()
+        self.assertIsNotNone(order.paid_at)
+
+    def test_patch_is_paid_alone(self):
+        order = self.order("pending", is_paid=True, paid_at=timezone.now())
+        response = self.client.patch(f"/api/admin/orders/{order.pk}/", {"is_paid": "false"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        order.refresh_from_db()
+        self.assertEqual((order.is_paid, order.paid_at), (False, None))
+
+    def test_bulk_status(self):
+        paid_at = timezone.now() - timedelta(days=3)
+        already_paid = self.order("shipped", is_paid=True, paid_at=paid_at)
+        unpaid = self.order("shipped")
+        final = self.order("cancelled")
+        response = self.client.post(
+            "/api/admin/orders/bulk-status/",
+            {"status": "delivered", "ids": [already_paid.pk, unpaid.pk, final.pk, 999999]}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.data["updated"]), [already_paid.pk, unpaid.pk])
+        self.assertEqual(response.data["skipped"], [{"id": final.pk, "status": "cancelled"}])
+        self.assertEqual(response.data["not_found"], [999999])
+
+        already_paid.refresh_from_db()
+        unpaid.refresh_from_db()
+        final.refresh_from_db()
+        self.assertEqual((already_paid.status, already_paid.paid_at), ("delivered", paid_at))
+        self.assertTrue(unpaid.is_paid)
+        self.assertGreater(unpaid.paid_at, paid_at)
+        self.assertEqual(final.status, "cancelled")
+
+    def test_bulk_status_by_filter_is_capped(self):
+        for _ in range(3):
+            self.order("pending")
+        body = {"status": "processing", "filter": {"status": "pending"}}
+        with mock.patch("orders.transitions.MAX_BULK_TRANSITION", 2):
+            response = self.client.post("/api/admin/orders/bulk-status/", body, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.filter(status="processing").exists())
+
+        response = self.client.post("/api/admin/orders/bulk-status/", body, format="json")
+        self.assertEqual(len(response.data["updated"]), 3)
+
+
+class OrderExportTests(TestCase):
+
+    def test_pages_cover_every_order_once_in_order(self):
+        user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        orders = [Order.objects.create(user=user, total_amount=i) for i in range(7)]
+        # Ties on created_at are ordered by id
+        same = timezone.now() - timedelta(days=1)
+        Order.objects.filter(pk__in=[o.pk for o in orders[1:5]]).update(created_at=same)
+        expected = list(Order.objects.order_by("-created_at", "-id").values_list("id", flat=True))
+
+        with self.assertNumQueries(3 * 3):
+            rows = list(order_rows(chunk_size=3))
+        self.assertEqual([row["id"] for row in rows], expected)
+
+
+class CountingView(APIView):
+    """Counts its runs; `status` in the body picks the response code, `block` waits for an event."""
+    calls = 0
+    started = threading.Event()
+    proceed = threading.Event()
+
+    @idempotency.idempotent
+    def post(self, request):
+        type(self).calls += 1
+        if request.data.get("block"):
+            type(self).started.set()
+            type(self).proceed.wait(10)
+        return Response({"call": type(self).calls}, status=int(request.data.get("status", 201)))
+
+
+class IdempotencyMixin:
+
+    def setUp(self):
+        CountingView.calls = 0
+        CountingView.started = threading.Event()
+        CountingView.proceed = threading.Event()
+        self.user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+
+    def send(self, body, key="key-1"):
+        request = APIRequestFactory().post("/api/orders/checkout/", body, format="json", HTTP_IDEMPOTENCY_KEY=key)
+        force_authenticate(request, user=self.user)
+        response = CountingView.as_view()(request)
+        response.render()
+        return response
+
+
+class IdempotencyTests(IdempotencyMixin, TestCase):
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.send({"item": 1})
+        second = self.send({"item": 1})
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual((second.status_code, second.data), (first.status_code, first.data))
+        self.assertEqual(second[idempotency.REPLAYED_HEADER], "true")
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.send({"item": 1})
+        response = self.send({"item": 2})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(CountingView.calls, 1)
+
+    def test_server_error_releases_the_key(self):
+        self.assertEqual(self.send({"status": 503}).status_code, 503)
+        self.assertFalse(IdempotencyKey.objects.exists())
+        # The retry runs the view again instead of replaying the failure
+        self.assertEqual(self.send({"status": 503}).status_code, 503)
+        self.assertEqual(CountingView.calls, 2)
+
+    def test_stale_in_progress_key_is_taken_over(self):
+        fingerprint = "f" * 64
+        record, response = idempotency.begin(self.user, "key-1", fingerprint)
+        self.assertIsNone(response)
+        IdempotencyKey.objects.filter(pk=record.pk).update(locked_at=timezone.now() - timedelta(hours=1))
+
+        taken, response = idempotency.begin(self.user, "key-1", fingerprint)
+        self.assertIsNone(response)
+        self.assertEqual(taken.pk, record.pk)
+        self.assertGreater(taken.locked_at, timezone.now() - timedelta(minutes=1))
+
+
+class IdempotencyConcurrencyTests(IdempotencyMixin, TransactionTestCase):
+    """A retry arriving while the first request is still running, against the real database."""
+
+    def run_first(self, results):
+        def first():
+            try:
+                results["first"] = self.send({"block": True})
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=first)
+        thread.start()
+        self.assertTrue(CountingView.started.wait(10))
+        return thread
+
+    @override_settings(IDEMPOTENCY_WAIT=10)
+    def test_retry_waits_for_the_first_request_and_replays_it(self):
+        results = {}
+        thread = self.run_first(results)
+        threading.Timer(0.3, CountingView.proceed.set).start()
+        second = self.send({"block": True})
+        thread.join()
+
+        self.assertEqual(CountingView.calls, 1)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, results["first"].data)
+        self.assertEqual(second[idempotency.REPLAYED_HEADER], "true")
+
+    @override_settings(IDEMPOTENCY_WAIT=0.2)
+    def test_retry_gets_409_while_the_first_request_is_still_running(self):
+        results = {}
+        thread = self.run_first(results)
+        try:
+            second = self.send({"block": True})
+        finally:
+            CountingView.proceed.set()
+            thread.join()
+        self.assertEqual(second.status_code, 409)
+        self.assertEqual(CountingView.calls, 1)
+
+
+class StockHoldConcurrencyTests(TransactionTestCase):
+    """Parallel buyers of the last units, against the real database."""
+
+    def test_parallel_holds_never_oversell(self):
+        category = Category.objects.create(name="Shoes")
+        product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=5, category=category)
+        users = [get_user_model().objects.create_user(f"buyer{i}", f"buyer{i}@example.com") for i in range(10)]
+        carts = [Cart.objects.create(user=user) for user in users]
+        outcomes = []
+        lock = threading.Lock()
+
+        def buy(cart):
+            try:
+                for _ in range(200):
+                    try:
+                        with transaction.atomic():
+                            item = CartItem.objects.select_for_update().get_or_create(cart=cart, product=product)[0]
+                            stock.hold(item, 1)
+                            item.save()
+                        outcome = "held"
+                    except stock.OutOfStock:
+                        outcome = "sold out"
+                    except DatabaseError:
+                        # SQLite reports a concurrent writer as "database table is locked"
+                        close_old_connections()
+                        time.sleep(0.005)
+                        continue
+                    with lock:
+                        outcomes.append(outcome)
+                    return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=buy, args=(cart,)) for cart in carts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        product.refresh_from_db()
+        self.assertEqual(len(outcomes), 10)
+        self.assertEqual(outcomes.count("held"), 5)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(sum(CartItem.objects.values_list("reserved_quantity", flat=True)), 5)
+
+        stock.release_expired(now=timezone.now() + timedelta(days=1))
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 5)
+
+    def test_parallel_checkouts_of_one_cart_place_one_order(self):
+        category = Category.objects.create(name="Shoes")
+        product = Product.objects.create(name="Runner", sku="RUN-1", price=10, stock=5, category=category)
+        user = get_user_model().objects.create_user("buyer", "buyer@example.com")
+        cart = Cart.objects.create(user=user)
+        item = CartItem.objects.create(cart=cart, product=product, quantity=2)
+        with transaction.atomic():
+            stock.hold(item, 2)
+            item.save()
+        outcomes = []
+        lock = threading.Lock()
+
+        def checkout():
+            # Each thread read the cart while it was still active
+            stale = Cart.objects.get(pk=cart.pk)
+            try:
+                for _ in range(200):
+                    try:
+                        place_order(user, stale)
+                        outcome = "placed"
+                    except CartClosed:
+                        outcome = "closed"
+                    except DatabaseError:
+                        close_old_connections()
+                        time.sleep(0.005)
+                        continue
+                    with lock:
+                        outcomes.append(outcome)
+                    return
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=checkout) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ["closed", "placed"])
+        self.assertEqual(Order.objects.count(), 1)
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 3)
@@ -0,0 +1,83 @@
+"""Order status transitions applied to many orders with one UPDATE.
+
+`ALLOWED` lists the states an order may move to from each state; delivered
+and cancelled orders are final. Moving orders to "delivered" also marks
+them paid (orders are settled on delivery at the latest), and an explicit
+`is_paid` sets or clears payment in the same statement. `paid_at` always
+follows `is_paid`: it is stamped when an order becomes paid, kept when it
+already was, and cleared when it is marked unpaid. The admin PATCH of a
+single order goes through `transition()` too, so both paths agree.
+
+Queryset updates skip the order signals, so the daily order rollups of the
+touched days are recomputed after commit (see analytics/daily.py). Order
+counts do not change. The sales rollups pick up newly paid orders on their
+next run; cancellations of older orders need `rollup_sales --days N`.
+"""
+import logging
+
+from django.db import transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from analytics import daily
+from .models import Order
+
+logger = logging.getLogger(__name__)
+
+# Largest number of orders changed by one bulk transition
+MAX_BULK_TRANSITION = 1000
+
+ALLOWED = {
+    "pending": {"processing", "shipped", "cancelled"},
+    "processing": {"shipped", "cancelled"},
+    "shipped": {"delivered"},
+    "delivered": set(),
+    "cancelled": set(),
+}
+# Reaching one of these states marks the order paid
+PAID_ON = {"delivered"}
+
+
+class TooManyOrders(Exception):
+    pass
+
+
+def sources(target):
+    """The states an order can move to `target` from."""
+    return sorted(state for state, targets in ALLOWED.items() if target in targets)
+
+
+def transition(queryset, target, is_paid=None):
+    """Move the orders in `queryset` that may go to `target` there with one UPDATE.
+
+    Returns `(updated_ids, skipped)` where `skipped` maps the id of each order
+    left alone to its current status. Raises TooManyOrders when `queryset`
+    holds more than MAX_BULK_TRANSITION orders.
+    """
+    if target in PAID_ON and is_paid is None:
+        is_paid = True
+    now = timezone.now()
+    with transaction.atomic():
+        # Lock in primary key order so concurrent transitions cannot deadlock
+        rows = list(
+            queryset.select_for_update(of=("self",)).order_by("pk")
+            .values_list("id", "status", "created_at")[:MAX_BULK_TRANSITION + 1]
+        )
+        if len(rows) > MAX_BULK_TRANSITION:
+            raise TooManyOrders()
+        allowed = set(sources(target))
+        ids = [pk for pk, current, _ in rows if current in allowed]
+        skipped = {pk: current for pk, current, _ in rows if current not in allowed}
+        if not ids:
+            return [], skipped
+
+        changes = {"status": target, "updated_at": now}
+        if is_paid is True:
+            changes.update(is_paid=True, paid_at=Coalesce("paid_at", Value(now)))
+        elif is_paid is False:
+            changes.update(is_paid=False, paid_at=None)
+        Order.objects.filter(pk__in=ids, status__in=allowed).update(**changes)
+        daily.schedule_refresh({daily.order_day(created_at) for pk, current, created_at in rows if current in allowed})
+    logger.info(f"Moved {len(ids)} orders to {target}, skipped {len(skipped)}")
+    return ids, skipped
@@ -5,7 +5,12 @@ from .views import (
     AddToCartView,
     RemoveFromCartView,
     CheckoutView,
+    GuestCartView,
+    GuestAddToCartView,
+    GuestRemoveFromCartView,
+    MergeGuestCartView,
     AdminOrderViewSet,
+    CustomerOrderViewSet,
     AdminStatsView,
 )
 
@@ -13,11 +18,16 @@ app_name = "orders"
 
 router = routers.DefaultRouter()
 router.register(r"admin/orders", AdminOrderViewSet, basename="admin-orders")
+router.register(r"orders/mine", CustomerOrderViewSet, basename="my-orders")
 
 urlpatterns = [
     path("cart/", UserCartView.as_view(), name="user-cart"),
     path("cart/add/", AddToCartView.as_view(), name="cart-add"),
     path("cart/remove/", RemoveFromCartView.as_view(), name="cart-remove"),
+    path("cart/guest/", GuestCartView.as_view(), name="guest-cart"),
+    path("cart/guest/add/", GuestAddToCartView.as_view(), name="guest-cart-add"),
+    path("cart/guest/remove/", GuestRemoveFromCartView.as_view(), name="guest-cart-remove"),
+    path("cart/merge/", MergeGuestCartView.as_view(), name="cart-merge"),
     path("orders/checkout/", CheckoutView.as_view(), name="checkout"),
     path("admin/stats/", AdminStatsView.as_view(), name="admin-stats"),
     path("", include(router.urls)),
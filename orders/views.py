@@ -1,45 +1,182 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from django.db import transaction
+from django.db.models import Count, OuterRef, Prefetch, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 
-from .models import Cart, CartItem, Order
-from .serializers import CartSerializer, CartItemSerializer, OrderSerializer
-from catalog.models import Product, Category
+from .models import Cart, CartItem, Order, OrderItem
+from .serializers import AdminOrderListSerializer, CartSerializer, CartItemSerializer, OrderBulkStatusSerializer, OrderSerializer, OrderStatusUpdateSerializer
+from . import carts, guest, stock
+from .checkout import CartClosed, EmptyCart, order_response_queryset, place_order
+from .filters import AdminOrderFilter, filter_orders
+from .pagination import CustomerOrderCursorPagination, OrderCursorPagination
+from .idempotency import idempotent
+from .transitions import ALLOWED, MAX_BULK_TRANSITION, TooManyOrders, transition
+from .exports import ORDER_COLUMNS, ORDER_ITEM_COLUMNS, export_queryset, order_item_rows, order_rows
+from core.conditional import not_modified, set_validators
+from core.exports import FORMATS as EXPORT_FORMATS, streaming_response
+from core.fastserializers import FastReadSerializerMixin, serialize
+from analytics import counters, daily
+from catalog.models import Product
+from catalog.serializers import ProductSerializer, absolute_media_url
 import logging
 from rest_framework.permissions import IsAdminUser
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from django.utils import timezone
 
 
-class AdminOrderViewSet(viewsets.ModelViewSet):
-	"""Admin-only endpoints to list and retrieve orders and mark them paid via a custom action."""
+class AdminOrderViewSet(FastReadSerializerMixin, viewsets.ModelViewSet):
+	"""Admin-only endpoints to list and retrieve orders and mark them paid via a custom action.
+
+	The list is keyset-paginated, filtered by `status`, `is_paid`, `created_after` /
+	`created_before` and `email` (see orders.filters), and uses a compact row without
+	nested products; retrieve returns the full order.
+	"""
 	queryset = Order.objects.all().order_by("-created_at")
 	serializer_class = OrderSerializer
 	permission_classes = [IsAdminUser]
+	pagination_class = OrderCursorPagination
+	filter_backends = [AdminOrderFilter]
+
+	def get_queryset(self):
+		queryset = Order.objects.select_related("user")
+		if self.action == "list":
+			items = OrderItem.objects.select_related("product").only(
+				"id", "order_id", "product_id", "quantity", "price", "color", "product__sku", "product__name",
+			).order_by("pk")
+			return queryset.prefetch_related(Prefetch("items", queryset=items))
+		return queryset.prefetch_related(Prefetch("items", queryset=order_response_queryset()))
+
+	def get_serializer_class(self):
+		if self.action == "list":
+			return AdminOrderListSerializer
+		return OrderSerializer
 
 	def partial_update(self, request, *args, **kwargs):
-		# allow admins to update status or is_paid
+		"""Change `status` and/or `is_paid` of one order.
+
+		A status change follows the same rules as bulk-status (orders.transitions):
+		a transition that is not allowed is a 409, and delivery marks the order paid.
+		"""
 		order = self.get_object()
-		data = request.data
-		changed = False
-		if "status" in data:
-			order.status = data.get("status")
-			changed = True
-		if "is_paid" in data:
-			is_paid = bool(data.get("is_paid"))
-			order.is_paid = is_paid
-			if is_paid and not order.paid_at:
+		serializer = OrderStatusUpdateSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		data = serializer.validated_data
+		if "status" in data and data["status"] != order.status:
+			updated, skipped = transition(Order.objects.filter(pk=order.pk), data["status"], is_paid=data.get("is_paid"))
+			if not updated:
+				current = skipped.get(order.pk, order.status)
+				return Response(
+					{"error": f"A {current} order cannot be moved to {data['status']}", "allowed": sorted(ALLOWED.get(current, ()))},
+					status=status.HTTP_409_CONFLICT,
+				)
+			order = self.get_object()
+		elif "is_paid" in data:
+			order.is_paid = data["is_paid"]
+			if order.is_paid and not order.paid_at:
 				order.paid_at = timezone.now()
-			if not is_paid:
+			if not order.is_paid:
 				order.paid_at = None
-			changed = True
-		if changed:
 			order.save()
-		return Response(OrderSerializer(order).data)
+		return Response(serialize(OrderSerializer, order))
 
+	@action(detail=False, methods=["post"], url_path="bulk-status")
+	def bulk_status(self, request):
+		"""Move many orders to a new status with one UPDATE.
 
-class UserCartView(generics.RetrieveAPIView):
+		Takes `{"status": ..., "ids": [...]}` or `{"status": ..., "filter": {...}}` (the list
+		filters, e.g. `{"status": "processing", "created_before": "2025-01-31"}`) and an
+		optional `is_paid`. Orders that cannot move to the status from their current one
+		are skipped; see orders.transitions for the allowed transitions.
+		"""
+		serializer = OrderBulkStatusSerializer(data=request.data)
+		serializer.is_valid(raise_exception=True)
+		data = serializer.validated_data
+		if "ids" in data:
+			queryset = Order.objects.filter(pk__in=data["ids"])
+		else:
+			params = {
+				name: ",".join(map(str, value)) if isinstance(value, list) else str(value).lower() if isinstance(value, bool) else str(value)
+				for name, value in data["filter"].items()
+			}
+			queryset = filter_orders(Order.objects.all(), params)
+		try:
+			updated, skipped = transition(queryset, data["status"], is_paid=data["is_paid"])
+		except TooManyOrders:
+			return Response(
+				{"error": f"The filter matches more than {MAX_BULK_TRANSITION} orders; narrow it down"},
+				status=status.HTTP_400_BAD_REQUEST,
+			)
+		response = {
+			"status": data["status"],
+			"updated": updated,
+			"skipped": [{"id": pk, "status": current} for pk, current in sorted(skipped.items())],
+		}
+		if "ids" in data:
+			found = set(updated) | set(skipped)
+			response["not_found"] = sorted(set(data["ids"]) - found)
+		return Response(response)
+
+	@action(detail=False, methods=["get"], url_path="export")
+	def export(self, request):
+		"""Stream orders as CSV (one line per item) or NDJSON (items nested), `?as=csv|ndjson`.
+
+		Filters: `status` (comma separated), `created_after` / `created_before` (YYYY-MM-DD).
+		"""
+		fmt = request.query_params.get("as", "csv")
+		if fmt not in EXPORT_FORMATS:
+			return Response({"error": f"as must be one of {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+		rows = order_rows(export_queryset(request.query_params))
+		if fmt == "csv":
+			return streaming_response(fmt, "orders", ORDER_ITEM_COLUMNS, order_item_rows(rows))
+		return streaming_response(fmt, "orders", ORDER_COLUMNS, rows)
+
+
+class CustomerOrderViewSet(FastReadSerializerMixin, viewsets.ReadOnlyModelViewSet):
+	"""The signed-in customer's own orders, newest first.
+
+	The list is keyset-paginated and built from one annotated query: item and unit
+	counts are aggregates over the order lines and `thumbnail` is the first line's
+	product card image, so no order line or product is loaded. Retrieve returns the
+	full order with its lines prefetched.
+	"""
+	permission_classes = [permissions.IsAuthenticated]
+	pagination_class = CustomerOrderCursorPagination
+	serializer_class = OrderSerializer
+
+	def get_queryset(self):
+		queryset = Order.objects.filter(user=self.request.user)
+		if self.action == "list":
+			first_image = OrderItem.objects.filter(order=OuterRef("pk")).order_by("pk").values("product__card__image")[:1]
+			return queryset.values("id", "status", "total_amount", "is_paid", "created_at").annotate(
+				item_count=Count("items"),
+				units=Coalesce(Sum("items__quantity"), 0),
+				thumbnail=Subquery(first_image),
+			)
+		return queryset.select_related("user").prefetch_related(Prefetch("items", queryset=order_response_queryset()))
+
+	def list(self, request, *args, **kwargs):
+		page = self.paginate_queryset(self.get_queryset())
+		return self.get_paginated_response([
+			{
+				"id": row["id"],
+				"status": row["status"],
+				"total_amount": str(row["total_amount"]),
+				"is_paid": row["is_paid"],
+				"item_count": row["item_count"],
+				"units": row["units"],
+				"thumbnail": absolute_media_url(row["thumbnail"], request) or None,
+				"created_at": row["created_at"].isoformat(),
+			}
+			for row in page
+		])
+
+
+class UserCartView(FastReadSerializerMixin, generics.RetrieveAPIView):
+	"""The user's active cart with server-computed totals and a `version`; honours If-None-Match."""
 	serializer_class = CartSerializer
 	permission_classes = [permissions.IsAuthenticated]
 
@@ -47,91 +184,198 @@ class UserCartView(generics.RetrieveAPIView):
 		cart, _ = Cart.objects.get_or_create(user=self.request.user, is_active=True)
 		return cart
 
+	def retrieve(self, request, *args, **kwargs):
+		cart = self.get_object()
+		etag, last_modified = carts.validators(cart)
+		response = not_modified(request, etag, last_modified)
+		if response is None:
+			response = Response(self.get_serializer(carts.load_items(cart)).data)
+		return set_validators(response, etag, last_modified)
+
 
-class AddToCartView(APIView):
+class CartMutationMixin:
+	"""Answer a cart change with the whole cart, or with `?response=delta` only the changed line and new totals."""
+
+	def cart_response(self, cart, item=None, removed=None):
+		if self.request.query_params.get("response") != "delta":
+			return Response(serialize(CartSerializer, carts.load_items(cart)))
+		data = {"version": cart.version, "totals": carts.line_totals(cart)}
+		if item is not None:
+			data["item"] = serialize(CartItemSerializer, carts.items_queryset().get(pk=item.pk))
+		if removed is not None:
+			data["removed"] = removed
+		return Response(data)
+
+
+class AddToCartView(CartMutationMixin, APIView):
 	permission_classes = [permissions.IsAuthenticated]
 
+	@idempotent
 	def post(self, request):
 		product_id = request.data.get("product_id")
-		quantity = int(request.data.get("quantity", 1))
-		color = request.data.get("color", "Default")
+		try:
+			quantity = int(request.data.get("quantity", 1))
+		except (TypeError, ValueError):
+			quantity = 0
+		if quantity < 1:
+			return Response({"error": "quantity must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			color = carts.clean_color(request.data.get("color"))
+		except ValueError as e:
+			return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 		product = get_object_or_404(Product, pk=product_id, is_active=True)
 		cart, _ = Cart.objects.get_or_create(user=request.user, is_active=True)
-		item, created = CartItem.objects.get_or_create(cart=cart, product=product, color=color)
-		if not created:
-			item.quantity = item.quantity + quantity
-		else:
-			item.quantity = quantity
-		item.save()
-		return Response(CartSerializer(cart).data)
+		try:
+			with transaction.atomic():
+				item, created = CartItem.objects.select_for_update().get_or_create(cart=cart, product=product, color=color)
+				new_quantity = quantity if created else item.quantity + quantity
+				# Reserve the units now; they are held until checkout or expiry
+				stock.hold(item, new_quantity)
+				item.quantity = new_quantity
+				item.save()
+				carts.touch(cart)
+		except stock.OutOfStock:
+			available = Product.objects.filter(pk=product.pk).values_list("stock", flat=True).first()
+			return Response({"error": "Not enough stock", "product_id": product.pk, "available": available}, status=status.HTTP_409_CONFLICT)
+		return self.cart_response(cart, item=item)
 
 
-class RemoveFromCartView(APIView):
+class RemoveFromCartView(CartMutationMixin, APIView):
 	permission_classes = [permissions.IsAuthenticated]
 
+	@idempotent
 	def post(self, request):
 		item_id = request.data.get("item_id")
 		cart = get_object_or_404(Cart, user=request.user, is_active=True)
 		item = get_object_or_404(CartItem, pk=item_id, cart=cart)
-		item.delete()
-		return Response(CartSerializer(cart).data)
+		removed = item.pk
+		with transaction.atomic():
+			item.delete()
+			carts.touch(cart)
+		return self.cart_response(cart, removed=removed)
+
+
+def guest_cart_response(token, data):
+	guest_items = guest.items(data)
+	return Response({
+		"token": token,
+		"items": [
+			{"id": item.id, "product": serialize(ProductSerializer, item.product), "quantity": item.quantity, "color": item.color}
+			for item in guest_items
+		],
+		"totals": guest.totals(guest_items),
+		"version": data["version"],
+	})
+
+
+class GuestCartView(APIView):
+	"""Anonymous cart identified by the `X-Cart-Token` header (see orders/guest.py)."""
+	permission_classes = [permissions.AllowAny]
+
+	def get(self, request):
+		token = guest.request_token(request)
+		if guest.cache_key(token) is None:
+			return Response({"error": "Missing or invalid cart token"}, status=status.HTTP_400_BAD_REQUEST)
+		return guest_cart_response(token, guest.load(token))
+
+
+class GuestAddToCartView(APIView):
+	"""Add to an anonymous cart, issuing a new token when the request has none."""
+	permission_classes = [permissions.AllowAny]
+
+	def post(self, request):
+		token = guest.request_token(request)
+		if guest.cache_key(token) is None:
+			token = guest.new_token()
+		try:
+			quantity = int(request.data.get("quantity", 1))
+		except (TypeError, ValueError):
+			quantity = 0
+		if quantity < 1:
+			return Response({"error": "quantity must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			product_id = int(request.data.get("product_id"))
+		except (TypeError, ValueError):
+			return Response({"error": "product_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			color = carts.clean_color(request.data.get("color"))
+		except ValueError as e:
+			return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+		if not Product.objects.filter(pk=product_id, is_active=True).exists():
+			return Response({"error": "Product not found"}, status=status.HTTP_404_NOT_FOUND)
+		try:
+			data = guest.add(token, product_id, quantity, color)
+		except guest.GuestCartFull:
+			return Response({"error": "Cart is full"}, status=status.HTTP_400_BAD_REQUEST)
+		return guest_cart_response(token, data)
+
+
+class GuestRemoveFromCartView(APIView):
+	permission_classes = [permissions.AllowAny]
+
+	def post(self, request):
+		token = guest.request_token(request)
+		try:
+			product_id = int(request.data.get("product_id"))
+		except (TypeError, ValueError):
+			return Response({"error": "product_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+		data = guest.remove(token, product_id, request.data.get("color", "Default")) if guest.cache_key(token) else None
+		if data is None:
+			return Response({"error": "Item not found"}, status=status.HTTP_404_NOT_FOUND)
+		return guest_cart_response(token, data)
+
+
+class MergeGuestCartView(CartMutationMixin, APIView):
+	"""Move a guest cart (`X-Cart-Token` / `cart_token`) into the authenticated user's cart."""
+	permission_classes = [permissions.IsAuthenticated]
+
+	def post(self, request):
+		result = guest.merge(request.user, guest.request_token(request))
+		cart, _ = Cart.objects.get_or_create(user=request.user, is_active=True)
+		response = self.cart_response(cart)
+		response.data["merge"] = result
+		return response
 
 
 class CheckoutView(APIView):
 	permission_classes = [permissions.IsAuthenticated]
 
+	@idempotent
 	def post(self, request):
 		cart = get_object_or_404(Cart, user=request.user, is_active=True)
-		
-		shipping_data = request.data.get("shipping", {})
-		items_data = request.data.get("items", [])
-		
-		total = 0
-		for it in cart.items.all():
-			total += float(it.product.price) * it.quantity
-		
-		phone = shipping_data.get("phone", "")
-		address = shipping_data.get("address", "") or request.user.email
-		city = shipping_data.get("city", "")
-		postal = shipping_data.get("postal", "")
-		
-		order = Order.objects.create(
-			user=request.user,
-			cart=cart,
-			total_amount=total,
-			phone=phone,
-			address=address,
-			city=city,
-			postal_code=postal
-		)
-		
-		color_map = {item["id"]: item.get("color", "Default") for item in items_data}
-		
-		for it in cart.items.all():
-			color = color_map.get(it.id, "Default")
-			order.items.create(
-				product=it.product,
-				quantity=it.quantity,
-				price=it.product.price,
-				color=color
-			)
-		
-		cart.is_active = False
-		cart.save()
-		return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
+		shipping_data = request.data.get("shipping") or {}
+		items_data = request.data.get("items") or []
+		color_map = {item["id"]: item.get("color", "Default") for item in items_data if isinstance(item, dict) and "id" in item}
+		try:
+			order = place_order(request.user, cart, shipping_data, color_map)
+		except CartClosed:
+			return Response({"error": "Cart was already checked out"}, status=status.HTTP_409_CONFLICT)
+		except EmptyCart:
+			return Response({"error": "Cart is empty"}, status=status.HTTP_400_BAD_REQUEST)
+		except stock.OutOfStock as e:
+			return Response({"error": "Not enough stock", "products": sorted(e.shortages)}, status=status.HTTP_409_CONFLICT)
+		return Response(serialize(OrderSerializer, order), status=status.HTTP_201_CREATED)
 
 
 class AdminStatsView(APIView):
 	"""Return small, fast summary stats for the admin dashboard.
 	Provides counts and small recent lists so the admin dashboard can render quickly.
+	Counts come from maintained counters and `daily` from the per-day rollups (see
+	analytics/), so no request scans the product or order tables. `?days=` sets the
+	length of the daily series (default 30, max 366).
 	"""
 	permission_classes = [IsAdminUser]
 
 	def get(self, request):
 		try:
-			product_count = Product.objects.count()
-			category_count = Category.objects.count()
-			order_count = Order.objects.count()
+			days = min(max(int(request.query_params.get("days", 30)), 1), 366)
+		except ValueError:
+			return Response({"error": "days must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+		try:
+			counts = counters.get_counts([counters.PRODUCTS, counters.CATEGORIES, counters.ORDERS])
+			product_count = counts[counters.PRODUCTS]
+			category_count = counts[counters.CATEGORIES]
+			order_count = counts[counters.ORDERS]
 
 			recent_orders_qs = Order.objects.select_related('user').order_by('-created_at')[:4]
 			recent_orders = [
@@ -150,7 +394,7 @@ class AdminStatsView(APIView):
 				for o in recent_orders_qs
 			]
 
-			low_stock_qs = Product.objects.filter(stock__lt=10).order_by('stock')[:4]
+			low_stock_qs = Product.objects.filter(stock__lt=10).only('id', 'name', 'sku', 'stock').order_by('stock')[:4]
 			low_stock = [
 				{
 					'id': p.id,
@@ -167,6 +411,7 @@ class AdminStatsView(APIView):
 				'order_count': order_count,
 				'recent_orders': recent_orders,
 				'low_stock': low_stock,
+				'daily': daily.recent(days),
 			})
 		except Exception as e:
 			logger = logging.getLogger(__name__)
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import UploadSession
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "target", "target_id", "filename", "size", "status", "created_at", "expires_at")
+    list_filter = ("status", "target")
+    search_fields = ("filename",)
+    readonly_fields = ("created_at", "updated_at")
@@ -0,0 +1,99 @@
+"""On-disk part files for chunked uploads.
+
+Each session owns one sparse file in UPLOAD_TEMP_DIR sized to the final
+upload. Chunks are streamed from the request straight to their offset, so
+neither a chunk nor the whole file is ever held in memory, chunks can arrive
+in any order or be re-sent, and completing an upload hands the part file to
+the storage as an already-on-disk temporary file (a rename, not a copy).
+
+The storage is given a hard link to the part file rather than the part file
+itself, so if attaching the file fails and its transaction rolls back the
+part file is still there and the upload can be completed again.
+"""
+import hashlib
+import os
+import shutil
+
+from django.core.files import File
+
+READ_SIZE = 64 * 1024
+
+
+class ChunkSizeError(ValueError):
+    pass
+
+
+def create_part(session):
+    os.makedirs(os.path.dirname(session.part_path), exist_ok=True)
+    with open(session.part_path, "wb") as fh:
+        fh.truncate(session.size)
+
+
+def write_chunk(session, index, stream, length):
+    """Copy `length` bytes from `stream` to chunk `index` of the part file."""
+    expected = session.chunk_length(index)
+    if length != expected:
+        raise ChunkSizeError(f"Chunk {index} must be {expected} bytes, got {length}.")
+    # Each request has its own handle, so chunks written concurrently never share a file position
+    with open(session.part_path, "r+b") as fh:
+        fh.seek(index * session.chunk_size)
+        remaining = length
+        while remaining:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                raise ChunkSizeError(f"Chunk {index} ended after {length - remaining} of {length} bytes.")
+            fh.write(data)
+            remaining -= len(data)
+
+
+def sha256_of(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_head(path, size=8):
+    with open(path, "rb") as fh:
+        return fh.read(size)
+
+
+class AssembledFile(File):
+    """The completed part file, exposed like a TemporaryUploadedFile so storages move it.
+
+    What the storage moves is a hard link (a copy where links are not
+    supported), which leaves the part file in place.
+    """
+
+    def __init__(self, path, name):
+        super().__init__(open(path, "rb"), name)
+        self.size = os.path.getsize(path)
+        self._path = path
+        self._link = None
+
+    def temporary_file_path(self):
+        if self._link is None or not os.path.exists(self._link):
+            self._link = f"{self._path}.{os.getpid()}.link"
+            if os.path.lexists(self._link):
+                os.remove(self._link)
+            try:
+                os.link(self._path, self._link)
+            except OSError:
+                shutil.copyfile(self._path, self._link)
+        return self._link
+
+    def close(self):
+        super().close()
+        if self._link is not None:
+            try:
+                os.remove(self._link)
+            except FileNotFoundError:
+                pass
+
+
+def discard_part(session):
+    try:
+        os.remove(session.part_path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from uploads.files import discard_part
+from uploads.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired chunked upload sessions and their partial files."
+
+    def handle(self, *args, **options):
+        expired = UploadSession.objects.filter(expires_at__lte=timezone.now()).exclude(status=UploadSession.COMPLETING)
+        count = 0
+        for session in expired.iterator():
+            discard_part(session)
+            count += 1
+        expired.delete()
+        self.stdout.write(self.style.SUCCESS(f"Purged {count} expired upload sessions."))
@@ -0,0 +1,77 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.db import models
+
+
+class UploadSession(models.Model):
+    TARGET_BLOG_PDF = 'blog_pdf'
+    TARGET_PRODUCT_IMAGE = 'product_image'
+    TARGET_CHOICES = (
+        (TARGET_BLOG_PDF, 'Blog PDF'),
+        (TARGET_PRODUCT_IMAGE, 'Product image'),
+    )
+
+    OPEN = 'open'
+    COMPLETING = 'completing'
+    COMPLETE = 'complete'
+    STATUS_CHOICES = (
+        (OPEN, 'Open'),
+        (COMPLETING, 'Completing'),
+        (COMPLETE, 'Complete'),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="upload_sessions", on_delete=models.CASCADE)
+    target = models.CharField(max_length=20, choices=TARGET_CHOICES)
+    target_id = models.PositiveBigIntegerField()
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    size = models.PositiveBigIntegerField()
+    chunk_size = models.PositiveIntegerField()
+    # Optional SHA-256 of the whole file, checked when the upload is completed
+    sha256 = models.CharField(max_length=64, blank=True)
+    # Extra fields for the target, e.g. color / alt_text of a product image
+    metadata = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default=OPEN)
+    result_id = models.PositiveBigIntegerField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"Upload {self.pk} ({self.filename})"
+
+    @property
+    def total_chunks(self):
+        return max(1, -(-self.size // self.chunk_size))
+
+    def chunk_length(self, index):
+        """Expected byte length of chunk `index` (the last one may be shorter)."""
+        if index == self.total_chunks - 1:
+            return self.size - index * self.chunk_size
+        return self.chunk_size
+
+    @property
+    def part_path(self):
+        return os.path.join(str(settings.UPLOAD_TEMP_DIR), f"{self.pk}.part")
+
+
+class UploadChunk(models.Model):
+    session = models.ForeignKey(UploadSession, related_name="chunks", on_delete=models.CASCADE)
+    index = models.PositiveIntegerField()
+    size = models.PositiveIntegerField()
+    received_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["index"]
+        constraints = [
+            models.UniqueConstraint(fields=["session", "index"], name="uploadchunk_session_index_uniq"),
+        ]
+
+    def __str__(self) -> str:
+        return f"Chunk {self.index} of {self.session_id}"
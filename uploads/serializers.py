@@ -0,0 +1,62 @@
+import re
+
+from django.conf import settings
+from rest_framework import serializers
+
+from .models import UploadSession
+from .targets import TARGETS
+
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.IntegerField(required=False)
+    total_chunks = serializers.IntegerField(read_only=True)
+    received = serializers.SerializerMethodField()
+    next_chunk = serializers.SerializerMethodField()
+
+    class Meta:
+        model = UploadSession
+        fields = (
+            "id", "target", "target_id", "filename", "content_type", "size", "chunk_size", "sha256",
+            "metadata", "status", "total_chunks", "received", "next_chunk", "result_id", "created_at", "expires_at",
+        )
+        read_only_fields = ("id", "status", "result_id", "created_at", "expires_at")
+
+    def _received(self, obj):
+        if not hasattr(obj, "_received_indexes"):
+            obj._received_indexes = list(obj.chunks.values_list("index", flat=True)) if obj.pk else []
+        return obj._received_indexes
+
+    def get_received(self, obj):
+        return self._received(obj)
+
+    def get_next_chunk(self, obj):
+        """First chunk the server does not have yet; where a client resumes."""
+        received = set(self._received(obj))
+        return next((i for i in range(obj.total_chunks) if i not in received), None)
+
+    def validate_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive.")
+        if value > settings.UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Uploads are limited to {settings.UPLOAD_MAX_SIZE} bytes.")
+        return value
+
+    def validate_chunk_size(self, value):
+        if not settings.UPLOAD_MIN_CHUNK_SIZE <= value <= settings.UPLOAD_MAX_CHUNK_SIZE:
+            raise serializers.ValidationError(
+                f"Chunk size must be between {settings.UPLOAD_MIN_CHUNK_SIZE} and {settings.UPLOAD_MAX_CHUNK_SIZE} bytes."
+            )
+        return value
+
+    def validate_sha256(self, value):
+        value = value.lower()
+        if value and not SHA256_RE.match(value):
+            raise serializers.ValidationError("Expected a hex SHA-256 digest.")
+        return value
+
+    def validate(self, attrs):
+        attrs.setdefault("chunk_size", settings.UPLOAD_CHUNK_SIZE)
+        TARGETS[attrs["target"]].validate(attrs)
+        return attrs
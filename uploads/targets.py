@@ -0,0 +1,81 @@
+"""What a completed upload is attached to.
+
+Each target checks the session when it is created (so a client learns about
+a missing blog or product before sending any data), checks the assembled
+file, and attaches it, returning the response payload. `field` is the file
+field the upload is saved to.
+"""
+from rest_framework import serializers
+
+from blogs.models import Blog
+from blogs.serializers import BlogSerializer
+from catalog.models import Product, ProductImage
+from catalog.serializers import AdminProductSerializer, ProductImageSerializer
+from catalog.tasks import generate_product_image_derivatives
+from jobs.queue import enqueue
+from .files import read_head
+from .models import UploadSession
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
+
+
+class BlogPDFTarget:
+    field = Blog._meta.get_field("pdf_file")
+
+    def validate(self, attrs):
+        if not Blog.objects.filter(pk=attrs["target_id"]).exists():
+            raise serializers.ValidationError({"target_id": "Blog not found"})
+        if not attrs["filename"].lower().endswith(".pdf") and attrs.get("content_type") != "application/pdf":
+            raise serializers.ValidationError({"filename": "File must be a PDF"})
+
+    def check_file(self, path):
+        if not read_head(path, 5) == b"%PDF-":
+            raise serializers.ValidationError({"error": "File must be a PDF"})
+
+    def attach(self, session, file, request):
+        blog = Blog.objects.get(pk=session.target_id)
+        blog.pdf_file.save(session.filename, file, save=True)
+        return blog.pk, BlogSerializer(blog, context={"request": request}).data
+
+
+class ProductImageTarget:
+    field = ProductImage._meta.get_field("image")
+
+    def validate(self, attrs):
+        if not Product.objects.filter(pk=attrs["target_id"]).exists():
+            raise serializers.ValidationError({"target_id": "Product not found"})
+        if not attrs["filename"].lower().endswith(IMAGE_EXTENSIONS):
+            raise serializers.ValidationError({"filename": "File must be an image"})
+
+    def check_file(self, path):
+        from PIL import Image, UnidentifiedImageError
+
+        try:
+            with Image.open(path) as image:
+                image.verify()
+        except (UnidentifiedImageError, OSError, SyntaxError):
+            raise serializers.ValidationError({"error": "File is not a valid image"})
+
+    def attach(self, session, file, request):
+        product = Product.objects.get(pk=session.target_id)
+        product_image = ProductImage(
+            product=product,
+            color=session.metadata.get("color", "Default"),
+            alt_text=session.metadata.get("alt_text", ""),
+        )
+        product_image.image.save(session.filename, file, save=True)
+        enqueue(generate_product_image_derivatives, product_image.id)
+        # Same rule as UploadProductImageView: the first image becomes the main image
+        if not product.image:
+            product.image = product_image.image
+            product.save()
+        return product_image.pk, {
+            "image": ProductImageSerializer(product_image, context={"request": request}).data,
+            "product": AdminProductSerializer(product, context={"request": request}).data,
+        }
+
+
+TARGETS = {
+    UploadSession.TARGET_BLOG_PDF: BlogPDFTarget(),
+    UploadSession.TARGET_PRODUCT_IMAGE: ProductImageTarget(),
+}
@@ -0,0 +1,142 @@
+import hashlib
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from blogs.models import Blog
+from .models import UploadSession
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) + b"\n%%EOF\n"
+
+
+class UploadTests(APITestCase):
+    """The chunked upload protocol, end to end against a temporary MEDIA_ROOT."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings = override_settings(
+            MEDIA_ROOT=media_root,
+            UPLOAD_TEMP_DIR=f"{media_root}/.uploads",
+            UPLOAD_MIN_CHUNK_SIZE=16,
+            UPLOAD_MAX_SIZE=4096,
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.admin = get_user_model().objects.create_superuser("admin", "admin@example.com")
+        self.blog = Blog.objects.create(title="Catalogue", blog_type="pdf")
+        self.client.force_authenticate(self.admin)
+
+    def start(self, data=PDF, chunk_size=100, **extra):
+        body = {"target": "blog_pdf", "target_id": self.blog.pk, "filename": "catalogue.pdf", "size": len(data), "chunk_size": chunk_size}
+        response = self.client.post("/api/uploads/", {**body, **extra}, format="json")
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data
+
+    def put(self, session, index, data):
+        return self.client.put(f"/api/uploads/{session['id']}/chunks/{index}/", data, content_type="application/octet-stream")
+
+    def send(self, session, index, data=PDF):
+        size = session["chunk_size"]
+        response = self.put(session, index, data[index * size:(index + 1) * size])
+        self.assertEqual(response.status_code, 200, response.data)
+        return response
+
+    def complete(self, session):
+        return self.client.post(f"/api/uploads/{session['id']}/complete/")
+
+    def test_chunks_in_any_order_and_resent_assemble_the_file(self):
+        session = self.start()
+        self.assertEqual(session["total_chunks"], 3)
+        for index in (2, 0, 0, 1):
+            response = self.send(session, index)
+        self.assertEqual(response.data["received"], 3)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.blog.refresh_from_db()
+        with self.blog.pdf_file.open("rb") as fh:
+            self.assertEqual(fh.read(), PDF)
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.COMPLETE)
+
+        self.assertEqual(self.complete(session).status_code, 409)
+        self.assertEqual(self.put(session, 0, PDF[:100]).status_code, 409)
+
+    def test_complete_with_missing_chunks_reports_them_and_can_resume(self):
+        session = self.start()
+        self.send(session, 1)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["missing"], [0, 2])
+        detail = self.client.get(f"/api/uploads/{session['id']}/").data
+        self.assertEqual((detail["status"], detail["next_chunk"]), (UploadSession.OPEN, 0))
+
+        self.send(session, 0)
+        self.send(session, 2)
+        self.assertEqual(self.complete(session).status_code, 201)
+
+    def test_checksum_mismatch_is_rejected(self):
+        session = self.start(sha256=hashlib.sha256(b"something else").hexdigest())
+        for index in range(3):
+            self.send(session, index)
+
+        response = self.complete(session)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("SHA-256", str(response.data))
+        self.assertEqual(UploadSession.objects.get().status, UploadSession.OPEN)
+        self.blog.refresh_from_db()
+        self.assertFalse(self.blog.pdf_file)
+
+    def test_matching_checksum_is_accepted(self):
+        session = self.start(sha256=hashlib.sha256(PDF).hexdigest())
+        for index in range(3):
+            self.send(session, index)
+        self.assertEqual(self.complete(session).status_code, 201)
+
+    def test_chunk_of_the_wrong_size_or_index_is_rejected(self):
+        session = self.start()
+        self.assertEqual(self.put(session, 0, PDF[:99]).status_code, 400)
+        # The last chunk is the remainder, not a full chunk
+        self.assertEqual(self.put(session, 2, PDF[200:300] + b"x" * 100).status_code, 400)
+        self.assertEqual(self.put(session, 3, PDF[:100]).status_code, 400)
+        self.assertEqual(self.client.get(f"/api/uploads/{session['id']}/").data["received"], [])
+
+    def test_size_limits(self):
+        body = {"target": "blog_pdf", "target_id": self.blog.pk, "filename": "catalogue.pdf"}
+        for extra in ({"size": 4097}, {"size": 0}, {"size": 100, "chunk_size": 15}, {"size": 100, "chunk_size": 64 * 1024 * 1024 + 1}):
+            response = self.client.post("/api/uploads/", {**body, **extra}, format="json")
+            self.assertEqual(response.status_code, 400, extra)
+        self.assertFalse(UploadSession.objects.exists())
+
+    def test_file_that_is_not_a_pdf_is_rejected(self):
+        data = b"not a pdf" * 20
+        session = self.start(data=data)
+        for index in range(session["total_chunks"]):
+            self.send(session, index, data)
+        self.assertEqual(self.complete(session).status_code, 400)
+
+    def test_sessions_of_other_users_are_not_found(self):
+        session = self.start()
+        self.client.force_authenticate(get_user_model().objects.create_superuser("other", "other@example.com"))
+
+        url = f"/api/uploads/{session['id']}/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.put(session, 0, PDF[:100]).status_code, 404)
+        self.assertEqual(self.complete(session).status_code, 404)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+        self.assertTrue(UploadSession.objects.filter(pk=session["id"]).exists())
+
+    def test_uploads_need_an_admin(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("buyer", "buyer@example.com"))
+        body = {"target": "blog_pdf", "target_id": self.blog.pk, "filename": "catalogue.pdf", "size": 10}
+        self.assertEqual(self.client.post("/api/uploads/", body, format="json").status_code, 403)
+
+    def test_abort_removes_the_session(self):
+        session = self.start()
+        self.send(session, 0)
+        self.assertEqual(self.client.delete(f"/api/uploads/{session['id']}/").status_code, 204)
+        self.assertFalse(UploadSession.objects.exists())
@@ -0,0 +1,12 @@
+from django.urls import path
+
+from .views import UploadChunkView, UploadCompleteView, UploadSessionCreateView, UploadSessionDetailView
+
+app_name = "uploads"
+
+urlpatterns = [
+    path("", UploadSessionCreateView.as_view(), name="upload-session-create"),
+    path("<uuid:session_id>/", UploadSessionDetailView.as_view(), name="upload-session-detail"),
+    path("<uuid:session_id>/chunks/<int:index>/", UploadChunkView.as_view(), name="upload-chunk"),
+    path("<uuid:session_id>/complete/", UploadCompleteView.as_view(), name="upload-complete"),
+]
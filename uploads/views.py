@@ -0,0 +1,161 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core import media
+from .files import AssembledFile, ChunkSizeError, create_part, discard_part, sha256_of, write_chunk
+from .models import UploadChunk, UploadSession
+from .serializers import UploadSessionSerializer
+from .targets import TARGETS
+
+logger = logging.getLogger(__name__)
+
+
+def _expiry():
+    return timezone.now() + timedelta(seconds=settings.UPLOAD_SESSION_TTL)
+
+
+def _release_attempt(session):
+    """Queue release of the blob a failed attach may have written; the part file is still intact."""
+    field = TARGETS[session.target].field
+    # Only tracked fields are counted as references, so only their blobs can be released safely
+    if (field.model, field.name) not in media.REFERENCES:
+        return
+    try:
+        name = media.blob_name(field.generate_filename(None, session.filename), sha256_of(session.part_path))
+    except OSError:
+        return
+    media.schedule_release([name])
+
+
+def _get_session(request, session_id):
+    return UploadSession.objects.filter(pk=session_id, user=request.user, expires_at__gt=timezone.now()).first()
+
+
+class UploadSessionCreateView(APIView):
+    """Start a chunked upload.
+
+    Body: `target` (blog_pdf / product_image), `target_id`, `filename`, `size`
+    and optionally `chunk_size`, `content_type`, `sha256` and `metadata`
+    (`color` / `alt_text` for product images). Chunks are then sent with
+    `PUT <id>/chunks/<index>/` and the upload finished with `POST <id>/complete/`.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        session = serializer.save(user=request.user, expires_at=_expiry())
+        create_part(session)
+        logger.info(f"Upload session {session.pk} started for {session.target} {session.target_id} ({session.size} bytes)")
+        return Response(UploadSessionSerializer(session).data, status=status.HTTP_201_CREATED)
+
+
+class UploadSessionDetailView(APIView):
+    """Upload progress (`received` chunks and the `next_chunk` to resume from), or abort it."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, session_id):
+        session = _get_session(request, session_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(UploadSessionSerializer(session).data)
+
+    def delete(self, request, session_id):
+        session = _get_session(request, session_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if session.status == UploadSession.COMPLETING:
+            return Response({"error": "Upload is being completed"}, status=status.HTTP_409_CONFLICT)
+        discard_part(session)
+        session.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class UploadChunkView(APIView):
+    """Write one chunk from the raw request body (application/octet-stream).
+
+    Chunks may be sent in any order, concurrently, and re-sent; re-sending a
+    chunk simply overwrites the same bytes.
+    """
+    permission_classes = [permissions.IsAdminUser]
+
+    def put(self, request, session_id, index):
+        session = _get_session(request, session_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        if session.status != UploadSession.OPEN:
+            return Response({"error": "Upload is no longer accepting chunks"}, status=status.HTTP_409_CONFLICT)
+        if index >= session.total_chunks:
+            return Response({"error": f"Chunk index must be below {session.total_chunks}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        try:
+            # The body is read straight from the socket in small blocks; request.data is never touched
+            write_chunk(session, index, request.stream, length)
+        except ChunkSizeError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        UploadChunk.objects.get_or_create(session=session, index=index, defaults={"size": length})
+        # Activity keeps a slow upload alive
+        UploadSession.objects.filter(pk=session.pk).update(expires_at=_expiry(), updated_at=timezone.now())
+        received = session.chunks.count()
+        return Response({"index": index, "received": received, "total_chunks": session.total_chunks})
+
+
+class UploadCompleteView(APIView):
+    """Check that every chunk arrived, then attach the assembled file to its target."""
+    permission_classes = [permissions.IsAdminUser]
+
+    def post(self, request, session_id):
+        session = _get_session(request, session_id)
+        if session is None:
+            return Response({"error": "Upload not found"}, status=status.HTTP_404_NOT_FOUND)
+        # Only one request may complete a session
+        claimed = UploadSession.objects.filter(pk=session.pk, status=UploadSession.OPEN).update(status=UploadSession.COMPLETING)
+        if not claimed:
+            return Response({"error": "Upload is already completed"}, status=status.HTTP_409_CONFLICT)
+
+        received = set(session.chunks.values_list("index", flat=True))
+        missing = [i for i in range(session.total_chunks) if i not in received]
+        if missing:
+            UploadSession.objects.filter(pk=session.pk).update(status=UploadSession.OPEN)
+            return Response({"error": "Upload is missing chunks", "missing": missing[:100]}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            if session.sha256 and sha256_of(session.part_path) != session.sha256:
+                raise serializers.ValidationError({"error": "SHA-256 of the uploaded file does not match"})
+            target = TARGETS[session.target]
+            target.check_file(session.part_path)
+
+            file = AssembledFile(session.part_path, session.filename)
+            try:
+                with transaction.atomic():
+                    result_id, data = target.attach(session, file, request)
+                    UploadSession.objects.filter(pk=session.pk).update(
+                        status=UploadSession.COMPLETE, result_id=result_id, updated_at=timezone.now(),
+                    )
+            finally:
+                file.close()
+        except serializers.ValidationError as e:
+            UploadSession.objects.filter(pk=session.pk).update(status=UploadSession.OPEN)
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            UploadSession.objects.filter(pk=session.pk).update(status=UploadSession.OPEN)
+            logger.exception(f"Error completing upload {session.pk}: {str(e)}")
+            _release_attempt(session)
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        # The storage moved the part file into place, or already had the same content
+        discard_part(session)
+        logger.info(f"Upload session {session.pk} attached to {session.target} {session.target_id}")
+        return Response(data, status=status.HTTP_201_CREATED)